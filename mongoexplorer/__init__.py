@@ -0,0 +1,4 @@
+"""
+Mongo Explorer: explorador de MongoDB con interfaz Tk (mongoexplorer.gui) y línea de
+comandos (mongoexplorer.cli) sobre un mismo núcleo de acceso a datos (mongoexplorer.core).
+"""
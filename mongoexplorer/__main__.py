@@ -0,0 +1,25 @@
+"""
+Punto de entrada: `python -m mongoexplorer` abre la interfaz gráfica y
+`python -m mongoexplorer <subcomando> ...` ejecuta la línea de comandos sin cargar Tk.
+"""
+import sys
+
+from .cli import COMMANDS
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Las opciones globales (--uri, --metrics) pueden ir antes del subcomando; la ayuda es la de la CLI
+    if any(arg in COMMANDS or arg in ('-h', '--help') for arg in argv):
+        from .cli import main as cli_main
+        return cli_main(argv)
+    # La conexión arranca antes de importar la interfaz para solaparse con la carga de Tk
+    from .startup import EarlyConnection, startup_uri
+    uri = startup_uri(argv)
+    early_connection = EarlyConnection(uri) if uri else None
+    from .gui import main as gui_main
+    return gui_main(argv, early_connection)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
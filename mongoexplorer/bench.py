@@ -0,0 +1,260 @@
+"""Banco de pruebas reproducible: entidades sintéticas al estilo Orion y medición de las rutas críticas, sin dependencias de Tk."""
+import os
+import platform
+import random
+import tempfile
+import time
+
+from bson import json_util
+import pymongo
+
+from .core import KeysetPaginator, format_cell, get_clean_id, parse_id
+from .exporter import ExportJob
+from .importer import ImportJob
+from .metrics import percentile
+
+BENCH_SEED = 42
+BENCH_COUNT = 10000  # Entidades de la colección sintética
+BENCH_ATTRS = 30  # Atributos por entidad (además de location)
+BENCH_REPEAT = 5  # Repeticiones de cada medida sin servidor
+BENCH_PAGE_SIZE = 100
+BENCH_PAGES = 50  # Páginas recorridas en la prueba de paginación profunda
+BENCH_EDITS = 50  # Documentos abiertos y guardados en la prueba del editor
+BENCH_DB = 'mongoexplorer_bench'
+BENCH_COLLECTION = 'entities'
+BENCH_TOLERANCE = 0.10  # Empeoramiento de la mediana a partir del cual se considera regresión
+BENCH_FORMAT_VERSION = 1
+
+ENTITY_TYPES = ('Device', 'WeatherObserved', 'ParkingSpot', 'Streetlight')
+SERVICE_PATHS = ('/', '/ciudad', '/ciudad/norte', '/ciudad/sur')
+BASE_TIME = 1700000000.0  # Fechas fijas para que el conjunto no dependa del momento de generarlo
+
+
+def _attribute(rng, number, when):
+    kind = number % 4
+    if kind == 0:
+        attr_type, value = 'Number', round(rng.uniform(-50, 50), 3)
+    elif kind == 1:
+        attr_type, value = 'Text', ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz ') for _ in range(rng.randint(8, 80)))
+    elif kind == 2:
+        attr_type, value = 'StructuredValue', {'readings': [rng.random() for _ in range(rng.randint(1, 12))],
+                                               'unit': rng.choice(('C', 'hPa', '%', 'lux'))}
+    else:
+        attr_type, value = 'DateTime', when - rng.randint(0, 86400)
+    return {'value': value, 'type': attr_type, 'mdNames': [], 'creDate': when, 'modDate': when}
+
+
+def orion_entity(rng, index, attrs=BENCH_ATTRS):
+    """Entidad con el formato interno de Orion: _id compuesto, attrs, attrNames y location."""
+    entity_type = rng.choice(ENTITY_TYPES)
+    created = BASE_TIME + index
+    modified = created + rng.randint(0, 30 * 86400)
+    attr_map = {f"attr{number:03d}": _attribute(rng, number, modified) for number in range(attrs)}
+    coordinates = [round(-3.7 + rng.uniform(-0.2, 0.2), 6), round(40.4 + rng.uniform(-0.2, 0.2), 6)]
+    attr_map['location'] = {'value': {'type': 'Point', 'coordinates': coordinates}, 'type': 'geo:json',
+                            'mdNames': [], 'creDate': created, 'modDate': modified}
+    return {
+        '_id': {'id': f"urn:ngsi-ld:{entity_type}:{index:08d}", 'type': entity_type,
+                'servicePath': rng.choice(SERVICE_PATHS)},
+        'attrNames': list(attr_map),
+        'attrs': attr_map,
+        'creDate': created,
+        'modDate': modified,
+        'location': {'attrName': 'location', 'coords': {'type': 'Point', 'coordinates': coordinates}},
+        'lastCorrelator': f"{rng.getrandbits(128):032x}",
+    }
+
+
+def generate_entities(count=BENCH_COUNT, attrs=BENCH_ATTRS, seed=BENCH_SEED):
+    """Entidades sintéticas deterministas: la misma semilla produce siempre los mismos documentos."""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield orion_entity(rng, index, attrs)
+
+
+def summarize(samples, items=1):
+    """Estadísticas de una lista de duraciones en segundos; items es lo procesado en cada muestra."""
+    median = percentile(samples, 50)
+    return {
+        'runs': len(samples),
+        'items': items,
+        'min_ms': min(samples) * 1000,
+        'median_ms': median * 1000,
+        'p90_ms': percentile(samples, 90) * 1000,
+        'max_ms': max(samples) * 1000,
+        'per_second': items / median if median else None,
+    }
+
+
+def _repeat(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# --- PRUEBAS SIN SERVIDOR ---
+def bench_format_cells(docs, repeat=BENCH_REPEAT):
+    """Formato de todas las celdas de las filas, como al pintar la tabla."""
+    columns = sorted({key for doc in docs for key in doc})
+    return summarize(_repeat(lambda: [format_cell(doc.get(col)) for doc in docs for col in columns], repeat),
+                     len(docs) * len(columns))
+
+
+def bench_id_resolution(docs, repeat=BENCH_REPEAT):
+    """Id legible del _id nativo de cada fila y lectura de un _id escrito como texto (CLI)."""
+    id_texts = [json_util.dumps(doc['_id']) for doc in docs]
+
+    def run():
+        for id_text, doc in zip(id_texts, docs):
+            get_clean_id(doc['_id'])
+            parse_id(id_text)
+
+    return summarize(_repeat(run, repeat), len(docs))
+
+
+def bench_editor_serialize(docs, repeat=BENCH_REPEAT):
+    """Texto del editor de documentos (JSON extendido con sangría) y su lectura al guardar."""
+    return summarize(_repeat(lambda: [json_util.loads(json_util.dumps(doc, indent=4)) for doc in docs], repeat),
+                     len(docs))
+
+
+# --- PRUEBAS CON SERVIDOR ---
+def seed_collection(collection, count=BENCH_COUNT, attrs=BENCH_ATTRS, seed=BENCH_SEED, batch_size=1000):
+    """Vaciar la colección y cargar las entidades sintéticas; devuelve las estadísticas de la carga."""
+    collection.drop()
+    started = time.perf_counter()
+    batch = []
+    for doc in generate_entities(count, attrs, seed):
+        batch.append(doc)
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    return summarize([time.perf_counter() - started], count)
+
+
+def bench_deep_paging(repository, db_name, collection_name, sort_column=None, use_keyset=True,
+                      page_size=BENCH_PAGE_SIZE, pages=BENCH_PAGES):
+    """Recorrer pages páginas seguidas; con use_keyset=False cada página salta las anteriores con skip."""
+    session = repository.session(db_name, collection_name, page_size=page_size)
+    session.set_sort(sort_column, 1, use_keyset=use_keyset)
+    samples = []
+    move = KeysetPaginator.FIRST
+    for _ in range(pages):
+        started = time.perf_counter()
+        page = session.page(move)
+        samples.append(time.perf_counter() - started)
+        if page is None or not session.paginator.has_next:
+            break
+        move = KeysetPaginator.NEXT
+    stats = summarize(samples, page_size)
+    # La última página es la más profunda: con skip es la que delata el coste creciente
+    stats['last_ms'] = samples[-1] * 1000
+    return stats
+
+
+def bench_editor_roundtrip(repository, db_name, collection_name, edits=BENCH_EDITS):
+    """Abrir (leer por _id y serializar) y guardar (leer el texto y reemplazar) documentos del editor."""
+    collection = repository.collection(db_name, collection_name)
+    ids = [doc['_id'] for doc in collection.find({}, {'_id': 1}).limit(edits)]
+    samples = []
+    for doc_id in ids:
+        started = time.perf_counter()
+        document = repository.get(db_name, collection_name, doc_id)
+        text = json_util.dumps(document, indent=4)
+        repository.replace(db_name, collection_name, doc_id, json_util.loads(text))
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, 1)
+
+
+def bench_export_import(collection, target, batch_size=1000):
+    """Exportar la colección a JSON Lines y volver a importarla en target; devuelve ambas estadísticas."""
+    handle, path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(handle)
+    try:
+        started = time.perf_counter()
+        exported = ExportJob(collection, path, 'jsonl', batch_size=batch_size).run()
+        export_stats = summarize([time.perf_counter() - started], exported['exported'])
+        export_stats['bytes'] = exported['bytes']
+        target.drop()
+        started = time.perf_counter()
+        imported = ImportJob(target, path, 'jsonl', batch_size=batch_size).run()
+        import_stats = summarize([time.perf_counter() - started], imported['read'])
+        import_stats['failed'] = imported['failed']
+        return export_stats, import_stats
+    finally:
+        os.remove(path)
+        if os.path.exists(f"{path}.resume"):
+            os.remove(f"{path}.resume")
+
+
+def run_benchmarks(repository=None, count=BENCH_COUNT, attrs=BENCH_ATTRS, seed=BENCH_SEED, repeat=BENCH_REPEAT,
+                   page_size=BENCH_PAGE_SIZE, pages=BENCH_PAGES, db_name=BENCH_DB, reseed=True, progress=None):
+    """
+    Ejecutar el banco de pruebas. Sin repository solo se miden las rutas de Python (formato,
+    resolución de _id, serialización del editor) sobre una página de entidades; con él se carga
+    además la colección sintética y se miden paginación profunda, editor, exportación e importación.
+    Devuelve un dict serializable con 'meta' y 'benchmarks'.
+    """
+    def step(name):
+        if progress:
+            progress(name)
+
+    page_docs = list(generate_entities(min(count, 1000), attrs, seed))
+    results = {}
+    step('format_cells')
+    results['format_cells'] = bench_format_cells(page_docs, repeat)
+    step('format_cells_large')
+    # Entidades con muchos más atributos: el formato de una página no debe depender de su tamaño
+    results['format_cells_large'] = bench_format_cells(list(generate_entities(100, attrs * 20, seed)), repeat)
+    step('id_resolution')
+    results['id_resolution'] = bench_id_resolution(page_docs, repeat)
+    step('editor_serialize')
+    results['editor_serialize'] = bench_editor_serialize(page_docs[:100], repeat)
+
+    server = None
+    if repository is not None:
+        collection = repository.collection(db_name, BENCH_COLLECTION)
+        if reseed or collection.estimated_document_count() != count:
+            step('seed')
+            results['seed_insert'] = seed_collection(collection, count, attrs, seed)
+        # La misma consulta (orden por _id) con rango y con skip: solo cambia la forma de paginar
+        step('deep_paging_keyset')
+        results['deep_paging_keyset'] = bench_deep_paging(repository, db_name, BENCH_COLLECTION, None, True, page_size, pages)
+        step('deep_paging_skip')
+        results['deep_paging_skip'] = bench_deep_paging(repository, db_name, BENCH_COLLECTION, None, False, page_size, pages)
+        step('editor_roundtrip')
+        results['editor_roundtrip'] = bench_editor_roundtrip(repository, db_name, BENCH_COLLECTION)
+        step('export_import')
+        target = repository.collection(db_name, f"{BENCH_COLLECTION}_import")
+        results['export'], results['import'] = bench_export_import(collection, target)
+        target.drop()
+        server = repository.client.server_info().get('version')
+
+    return {
+        'meta': {
+            'format': BENCH_FORMAT_VERSION, 'at': time.time(), 'python': platform.python_version(),
+            'pymongo': pymongo.version, 'server': server, 'machine': platform.machine(),
+            'count': count, 'attrs': attrs, 'seed': seed, 'repeat': repeat, 'page_size': page_size, 'pages': pages,
+        },
+        'benchmarks': results,
+    }
+
+
+def compare(current, baseline, tolerance=BENCH_TOLERANCE):
+    """
+    Comparar la mediana de cada prueba con la de una ejecución de referencia.
+    Devuelve filas (prueba, mediana de referencia, mediana actual, cociente, regresión).
+    """
+    rows = []
+    for name, stats in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base or not base.get('median_ms'):
+            continue
+        ratio = stats['median_ms'] / base['median_ms']
+        rows.append((name, base['median_ms'], stats['median_ms'], ratio, ratio > 1 + tolerance))
+    return rows
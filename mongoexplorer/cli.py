@@ -0,0 +1,315 @@
+"""Línea de comandos de Mongo Explorer: listados, consultas paginadas, exportación e importación sin interfaz gráfica."""
+import argparse
+import json
+import os
+import sys
+
+from bson import json_util
+
+from .bench import (
+    BENCH_ATTRS, BENCH_COUNT, BENCH_DB, BENCH_PAGE_SIZE, BENCH_PAGES, BENCH_REPEAT, BENCH_SEED, BENCH_TOLERANCE,
+    compare, run_benchmarks,
+)
+from .core import (
+    DEFAULT_MONGO_URI, KeysetPaginator, Repository, SchemaService, parse_filter, parse_id, summarize_explain,
+)
+from .exporter import (
+    EXPORT_BATCH_SIZE, EXPORT_COMPRESSIONS, EXPORT_FORMATS, RELAXED_JSON, ExportJob, compression_for, format_for,
+)
+from .importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, IMPORT_MODES, IMPORT_WORKERS, ImportJob
+from .metrics import Metrics
+from .profiles import ProfileStore
+
+COMMANDS = ('dbs', 'collections', 'indexes', 'query', 'count', 'explain', 'get', 'export', 'import', 'bench')
+
+
+def _dump(document):
+    return json_util.dumps(document, json_options=RELAXED_JSON)
+
+
+def cmd_dbs(repository, args):
+    for db_name in repository.list_databases():
+        print(db_name)
+
+
+def cmd_collections(repository, args):
+    for collection_name in repository.list_collections(args.db):
+        print(collection_name)
+
+
+def cmd_indexes(repository, args):
+    for index in repository.list_indexes(args.db, args.collection):
+        keys = json_util.dumps(dict(index['key']))
+        ops = "?" if index['ops'] is None else index['ops']
+        options = f" {_dump(index['options'])}" if index['options'] else ""
+        print(f"{index['name']}\t{keys}\t{index['size']} bytes\t{ops} accesos{options}")
+
+
+def cmd_query(repository, args):
+    session = repository.session(args.db, args.collection, query_filter=parse_filter(args.filter),
+                                 page_size=args.page_size, preview=args.preview)
+    if args.sort:
+        session.set_sort(args.sort, -1 if args.desc else 1, use_keyset=session.sort_has_index(args.sort))
+
+    # La paginación por rango avanza página a página desde el extremo elegido
+    documents = session.page(KeysetPaginator.LAST if args.last else KeysetPaginator.FIRST)
+    for _ in range(args.page - 1):
+        move = KeysetPaginator.PREV if args.last else KeysetPaginator.NEXT
+        documents = session.page(move)
+        if documents is None:
+            print(f"La consulta no tiene {args.page} páginas.", file=sys.stderr)
+            return 1
+
+    for document in documents:
+        print(_dump(document))
+    print(session.paginator.page_label(), file=sys.stderr)
+
+
+def cmd_count(repository, args):
+    session = repository.session(args.db, args.collection, query_filter=parse_filter(args.filter))
+    total, exact = session.count(max_time_ms=args.max_time_ms)
+    print(total if exact else f"desconocido (no terminó en {args.max_time_ms} ms)")
+
+
+def cmd_explain(repository, args):
+    session = repository.session(args.db, args.collection, query_filter=parse_filter(args.filter),
+                                 page_size=args.page_size, preview=args.preview)
+    if args.sort:
+        session.set_sort(args.sort, -1 if args.desc else 1, use_keyset=session.sort_has_index(args.sort))
+    result = session.explain(session.plan(KeysetPaginator.FIRST))
+    if args.raw:
+        print(json_util.dumps(result, indent=4, json_options=RELAXED_JSON))
+        return
+    summary = summarize_explain(result)
+    print(f"Plan ganador: {summary['plan']}")
+    print(f"Índices: {', '.join(summary['indexes']) or 'ninguno'}")
+    print(f"Claves examinadas: {summary['keys_examined']}")
+    print(f"Documentos examinados: {summary['docs_examined']}")
+    print(f"Documentos devueltos: {summary['returned']}")
+    print(f"Tiempo en servidor: {summary['time_ms']} ms")
+    for warning in summary['warnings']:
+        print(f"AVISO: {warning}")
+
+
+def cmd_get(repository, args):
+    doc_id = parse_id(args.id)
+    document = repository.get(args.db, args.collection, doc_id)
+    if document is None:
+        print(f"Documento no encontrado: {_dump({'_id': doc_id})}", file=sys.stderr)
+        return 1
+    print(json_util.dumps(document, indent=4, json_options=RELAXED_JSON))
+
+
+def _print_progress(exported, written_bytes, rate):
+    print(f"\r{exported} documentos, {written_bytes / 1e6:.1f} MB, {rate:.0f} docs/s", end='', file=sys.stderr)
+
+
+def cmd_export(repository, args):
+    fmt = args.format or format_for(args.output)
+    compression = args.compress or compression_for(args.output)
+    if not args.output and (compression or args.resume or fmt == 'bson'):
+        print("La compresión, el formato BSON y --resume necesitan un fichero de salida (-o).", file=sys.stderr)
+        return 2
+
+    collection = repository.collection(args.db, args.collection)
+    columns = None
+    if fmt == 'csv':
+        # Las columnas del CSV son las del esquema muestreado, igual que en la tabla
+        schema = SchemaService()
+        namespace = (args.db, args.collection)
+        schema.store(namespace, schema.sample(collection))
+        columns = schema.columns(namespace)
+
+    job = ExportJob(collection, args.output, fmt, parse_filter(args.filter), args.sort, -1 if args.desc else 1,
+                    columns, compression, args.batch_size)
+    try:
+        result = job.run(progress=_print_progress, resume=args.resume)
+    except KeyboardInterrupt:
+        print("\nExportación interrumpida; continúa con --resume.", file=sys.stderr)
+        return 130
+    print(f"\n{result['exported']} documentos exportados en {result['elapsed']:.1f} s ({result['rate']:.0f} docs/s).",
+          file=sys.stderr)
+
+
+def _print_import_progress(read, written, failed, rate):
+    print(f"\r{read} leídos, {written} escritos, {failed} con error, {rate:.0f} docs/s", end='', file=sys.stderr)
+
+
+def cmd_import(repository, args):
+    job = ImportJob(repository.collection(args.db, args.collection), args.file, args.format, args.mode,
+                    args.batch_size, args.workers)
+    try:
+        report = job.run(progress=_print_import_progress)
+    except ValueError as e:
+        # Lo ya escrito se queda en la colección; el fichero no se puede seguir leyendo
+        print(f"\nFichero de entrada no válido: {e}", file=sys.stderr)
+        return 2
+    print(f"\n{report['read']} documentos leídos en {report['elapsed']:.1f} s ({report['rate']:.0f} docs/s): "
+          f"{report['inserted']} insertados, {report['upserted']} upsert, {report['modified']} reemplazados, "
+          f"{report['matched'] - report['modified']} sin cambios, "
+          f"{report['failed']} con error.", file=sys.stderr)
+    for batch_number, index, message in report['errors']:
+        position = f"documento {batch_number * args.batch_size + index}" if index is not None else f"lote {batch_number}"
+        print(f"  {position}: {message}", file=sys.stderr)
+    return 1 if report['failed'] else 0
+
+
+def cmd_bench(repository, args):
+    results = run_benchmarks(repository, count=args.count, attrs=args.attrs, seed=args.seed, repeat=args.repeat,
+                             page_size=args.page_size, pages=args.pages, db_name=args.db, reseed=not args.reuse,
+                             progress=lambda name: print(f"… {name}", file=sys.stderr))
+    for name, stats in results['benchmarks'].items():
+        rate = f"{stats['per_second']:.0f}/s" if stats['per_second'] else "-"
+        print(f"{name:<20} mediana {stats['median_ms']:10.2f} ms  p90 {stats['p90_ms']:10.2f} ms  {rate:>12}",
+              file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\nComparación con {args.baseline} (tolerancia {args.tolerance:.0%}):", file=sys.stderr)
+    for name, base_ms, current_ms, ratio, regression in compare(results, baseline, args.tolerance):
+        regressions += regression
+        print(f"{name:<20} {base_ms:10.2f} → {current_ms:10.2f} ms  ×{ratio:.2f}{'  ⚠ regresión' if regression else ''}",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m mongoexplorer', description="Mongo Explorer en línea de comandos (sin subcomando se abre la interfaz gráfica).")
+    parser.add_argument('--uri', help=f"URI de MongoDB (por defecto $MONGO_URI o {DEFAULT_MONGO_URI}; "
+                                      "bench con servidor la exige explícita).")
+    parser.add_argument('--metrics', metavar='FICHERO',
+                        help="Guardar al terminar las métricas de comandos (latencias, bytes, getMore) en JSON ('-' para stderr).")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('dbs', help="Listar las bases de datos.").set_defaults(func=cmd_dbs)
+
+    p = subparsers.add_parser('collections', help="Listar las colecciones de una base de datos.")
+    p.add_argument('db')
+    p.set_defaults(func=cmd_collections)
+
+    p = subparsers.add_parser('indexes', help="Listar los índices de una colección con tamaño y uso.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.set_defaults(func=cmd_indexes)
+
+    p = subparsers.add_parser('query', help="Mostrar una página de resultados como JSON, un documento por línea.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('filter', nargs='?', default='', help="Filtro JSON (ej. '{\"_id.type\": \"Device\"}').")
+    p.add_argument('--sort', help="Campo de ordenación (el _id siempre desempata).")
+    p.add_argument('--desc', action='store_true', help="Orden descendente.")
+    p.add_argument('--page-size', type=int, default=20)
+    p.add_argument('--page', type=int, default=1, help="Número de página contando desde el extremo elegido.")
+    p.add_argument('--last', action='store_true', help="Contar las páginas desde el final.")
+    p.add_argument('--preview', action='store_true', help="Resumir en el servidor los objetos y arrays grandes.")
+    p.set_defaults(func=cmd_query)
+
+    p = subparsers.add_parser('count', help="Contar los documentos que cumplen un filtro.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('filter', nargs='?', default='')
+    p.add_argument('--max-time-ms', type=int, default=10000)
+    p.set_defaults(func=cmd_count)
+
+    p = subparsers.add_parser('explain', help="Plan de ejecución (executionStats) de la primera página de una consulta.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('filter', nargs='?', default='')
+    p.add_argument('--sort', help="Campo de ordenación (el _id siempre desempata).")
+    p.add_argument('--desc', action='store_true', help="Orden descendente.")
+    p.add_argument('--page-size', type=int, default=20)
+    p.add_argument('--preview', action='store_true', help="Explicar la agregación de vista previa.")
+    p.add_argument('--raw', action='store_true', help="Mostrar el resultado completo del servidor.")
+    p.set_defaults(func=cmd_explain)
+
+    p = subparsers.add_parser('get', help="Mostrar un documento completo por su _id.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('id', help="_id exacto: JSON extendido (un _id compuesto completo), ObjectId o texto.")
+    p.set_defaults(func=cmd_get)
+
+    p = subparsers.add_parser('export', help="Exportar en streaming los documentos de un filtro a JSONL, CSV o BSON.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('filter', nargs='?', default='')
+    p.add_argument('-o', '--output', help="Fichero de salida (por defecto la salida estándar).")
+    p.add_argument('--format', choices=EXPORT_FORMATS, help="Formato (por defecto, según la extensión o jsonl).")
+    p.add_argument('--compress', choices=EXPORT_COMPRESSIONS, help="Compresión (por defecto, según la extensión .gz/.zst).")
+    p.add_argument('--sort', help="Campo de ordenación (el _id siempre desempata).")
+    p.add_argument('--desc', action='store_true', help="Orden descendente.")
+    p.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help="Documentos por lote del cursor.")
+    p.add_argument('--resume', action='store_true', help="Continuar una exportación interrumpida al mismo fichero.")
+    p.set_defaults(func=cmd_export)
+
+    p = subparsers.add_parser('import', help="Importar por lotes un fichero JSONL, array JSON o volcado BSON.")
+    p.add_argument('db')
+    p.add_argument('collection')
+    p.add_argument('file', help="Fichero de entrada (admite .gz y .zst).")
+    p.add_argument('--format', choices=IMPORT_FORMATS, help="Formato (por defecto, según la extensión).")
+    p.add_argument('--mode', choices=IMPORT_MODES, default='insert', help="insert, o upsert para reemplazar por _id.")
+    p.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="Documentos por escritura.")
+    p.add_argument('--workers', type=int, default=IMPORT_WORKERS, help="Lotes escritos en paralelo.")
+    p.set_defaults(func=cmd_import)
+
+    p = subparsers.add_parser('bench', help="Banco de pruebas con entidades sintéticas de Orion; resultados en JSON.")
+    p.add_argument('--offline', action='store_true', help="Medir solo las rutas de Python, sin conectar al servidor.")
+    p.add_argument('--db', default=BENCH_DB, help="Base de datos de pruebas (se vacía su colección 'entities').")
+    p.add_argument('--count', type=int, default=BENCH_COUNT, help="Entidades sintéticas.")
+    p.add_argument('--attrs', type=int, default=BENCH_ATTRS, help="Atributos por entidad.")
+    p.add_argument('--seed', type=int, default=BENCH_SEED)
+    p.add_argument('--repeat', type=int, default=BENCH_REPEAT, help="Repeticiones de las medidas sin servidor.")
+    p.add_argument('--page-size', type=int, default=BENCH_PAGE_SIZE)
+    p.add_argument('--pages', type=int, default=BENCH_PAGES, help="Páginas recorridas en la paginación profunda.")
+    p.add_argument('--reuse', action='store_true', help="Reutilizar la colección sintética si ya tiene --count documentos.")
+    p.add_argument('-o', '--output', help="Fichero JSON de resultados (por defecto la salida estándar).")
+    p.add_argument('--baseline', help="Resultados de referencia con los que comparar; sale con 1 si hay regresiones.")
+    p.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE, help="Empeoramiento tolerado (0.1 = 10%%).")
+    p.set_defaults(func=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics = Metrics() if args.metrics else None
+    if getattr(args, 'offline', False):
+        return args.func(None, args) or 0
+    if args.command == 'bench' and not args.uri:
+        # El banco vacía y recarga colecciones: nunca contra $MONGO_URI ni el túnel por defecto sin nombrarlos
+        print("bench borra y vuelve a cargar datos de prueba: indica el servidor con --uri (o usa --offline).", file=sys.stderr)
+        return 2
+    args.uri = args.uri or os.environ.get('MONGO_URI', DEFAULT_MONGO_URI)
+    try:
+        repository = Repository.connect(args.uri, ProfileStore().get(args.uri),
+                                        event_listeners=metrics.listeners() if metrics else None)
+    except Exception as e:
+        print(f"No se pudo conectar a {args.uri}: {e}", file=sys.stderr)
+        return 2
+    try:
+        return args.func(repository, args) or 0
+    except json.JSONDecodeError as e:
+        print(f"Filtro JSON inválido: {e}", file=sys.stderr)
+        return 2
+    except ValueError as e:
+        # Entradas que se leen pero no valen (un filtro que no es un objeto, un punto de reanudación ajeno...)
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        repository.client.close()
+        if metrics:
+            write_metrics(metrics, args.metrics)
+
+
+def write_metrics(metrics, path):
+    if path == '-':
+        print(metrics.to_json(), file=sys.stderr)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(metrics.to_json())
@@ -0,0 +1,1310 @@
+"""Núcleo de acceso a datos de Mongo Explorer, sin dependencias de Tk."""
+from pymongo import MongoClient, DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ExecutionTimeout
+from bson.objectid import ObjectId
+import json
+from bson import json_util
+from bson.son import SON
+import bson
+import bson.binary
+import bson.decimal128
+import bson.int64
+import bson.regex
+import bson.timestamp
+import re
+from collections import OrderedDict, deque
+import copy
+import datetime
+import itertools
+import threading
+import time
+
+from .profiles import DEFAULT_PROFILE, client_options
+
+# --- CONFIGURACIÓN GLOBAL ---
+MAX_COLUMN_WIDTH = 150
+CELL_CACHE_DOCUMENTS = 2000  # Documentos cuyas celdas formateadas se recuerdan entre páginas
+QUERY_MAX_TIME_MS = 30000  # Límite de tiempo en servidor para cada consulta lanzada desde la interfaz
+PAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Presupuesto de memoria de la caché de páginas
+PREVIEW_ITEMS = 5  # Claves/elementos que se conservan de cada objeto/array en la vista previa
+PREVIEW_MARKER = '__preview__'  # Marca de los valores resumidos por el servidor
+SCHEMA_SAMPLE_SIZE = 1000  # Documentos muestreados con $sample para descubrir los campos de una colección
+SCHEMA_TTL_SECONDS = 300  # Antigüedad a partir de la cual el esquema se refresca en segundo plano
+SCHEMA_RARE_THRESHOLD = 0.05  # Frecuencia por debajo de la cual un campo se considera poco usado
+COUNT_MAX_TIME_MS = 2000  # Presupuesto en servidor para contar los resultados de un filtro
+COUNT_TTL_SECONDS = 60  # Validez de un total en caché
+BULK_CHUNK_SIZE = 500  # Operaciones por bulk_write al actuar sobre una selección explícita de filas
+EXPLAIN_EXAMINED_RATIO = 10  # Documentos examinados por devuelto a partir de los que una consulta se marca como ineficiente
+QUERY_HISTORY_SIZE = 50  # Consultas recientes cuyos tiempos se conservan en la sesión
+FIELD_STATS_TOP = 20  # Valores más frecuentes que se muestran de un campo
+FIELD_STATS_BUCKETS = 10  # Tramos de los histogramas numéricos y de fechas
+FIELD_STATS_SAMPLE_SIZE = 10000  # Documentos de la muestra $sample cuando no se recorre toda la colección
+FIELD_STATS_MAX_TIME_MS = 120000  # Presupuesto en servidor del cálculo de estadísticas de un campo
+FIELD_STATS_TTL_SECONDS = 600  # Validez de unas estadísticas en caché
+AGGREGATE_PREVIEW_LIMIT = 1000  # $limit añadido al final de las agregaciones que se muestran en la tabla (0 = sin límite)
+AGGREGATE_PAGE_WINDOW = 10  # Páginas de una agregación que se conservan en memoria; las más antiguas se vuelven a pedir con $skip
+AGGREGATE_OUTPUT_MAX_TIME_MS = 600000  # Presupuesto en servidor de una agregación que escribe con $out/$merge
+JSON_COLUMNS = ['attrs', 'location', 'metadata', 'servicePath', 'attrNames', 'entityType']
+DEFAULT_MONGO_URI = "mongodb://127.0.0.1:27018/"
+SYSTEM_DATABASES = ["admin", "local", "config"]
+
+# --- CLASE DE PAGINACIÓN POR RANGO (KEYSET) ---
+class KeysetPaginator:
+    """
+    Calcula la consulta de cada página a partir de la clave frontera de la página actual
+    (el '_id', o la columna de ordenación más el '_id' como desempate) usando rangos
+    $gt/$lt en lugar de skip/limit, de modo que el coste no depende de la profundidad.
+    Si la ordenación no tiene un índice utilizable se recurre a skip como alternativa.
+
+    Un rango $gt/$lt solo encuentra valores del mismo tipo BSON que la frontera: si el campo de
+    ordenación mezcla tipos (_id ObjectId y texto, números y textos...), las páginas saltarían
+    grupos enteros. check_types() lo comprueba en el servidor y, si hay mezcla, se pagina con skip.
+    """
+
+    FIRST = 'first'
+    PREV = 'prev'
+    NEXT = 'next'
+    LAST = 'last'
+    RELOAD = 'reload'
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, sort_column=None, sort_direction=1, use_keyset=True):
+        self.sort_column = sort_column
+        self.sort_direction = sort_direction
+        self.use_keyset = use_keyset
+        self.anchor = 'start'  # 'start' = página contada desde el principio, 'end' = desde el final
+        self.page_index = 0
+        self.first_key = None
+        self.last_key = None
+        self.has_prev = False
+        self.has_next = False
+        self.current_plan = None
+        self.mixed_types = False  # El campo de ordenación tiene valores de varios tipos BSON
+        self.types_key = None  # Filtro y orden para los que se comprobó mixed_types
+
+    def sort_spec(self, reverse=False):
+        """Ordenación completa de la consulta; el '_id' siempre desempata."""
+        direction = -self.sort_direction if reverse else self.sort_direction
+        if self.sort_column and self.sort_column != '_id':
+            return [(self.sort_column, direction), ('_id', direction)]
+        return [('_id', direction)]
+
+    def boundary_key(self, doc):
+        return tuple(doc.get(field) for field, _ in self.sort_spec())
+
+    @staticmethod
+    def _is_rangeable(key):
+        # null no es comparable con $gt/$lt y los arrays se comparan elemento a elemento
+        return key is not None and all(v is not None and not isinstance(v, list) for v in key)
+
+    @staticmethod
+    def type_bracket(value):
+        """Grupo de tipos BSON que se comparan entre sí al ordenar (los números, por ejemplo, forman uno solo)."""
+        if value is None:
+            return 'null'
+        if isinstance(value, bool):
+            return 'bool'
+        for types, bracket in (((int, float, bson.int64.Int64, bson.decimal128.Decimal128), 'number'),
+                               ((str,), 'string'), ((dict,), 'object'), ((list, tuple), 'array'),
+                               ((bytes,), 'binData'), ((ObjectId,), 'objectId'), ((datetime.datetime,), 'date'),
+                               ((bson.timestamp.Timestamp,), 'timestamp'), ((bson.regex.Regex, re.Pattern), 'regex')):
+            if isinstance(value, types):
+                return bracket
+        return type(value).__name__
+
+    def check_types(self, collection, query_filter, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """
+        Comprobar (una vez por filtro y orden) si el campo principal de ordenación mezcla tipos BSON:
+        basta con comparar el primer y el último valor, porque al ordenar cada tipo forma un bloque.
+        El _id de desempate no se comprueba: solo importaría entre valores empatados.
+        """
+        if self.types_known(query_filter):
+            return self.mixed_types
+        field = self.sort_spec()[0][0]
+        options = {'max_time_ms': max_time_ms}
+        if comment:
+            options['comment'] = comment
+        try:
+            edges = [collection.find_one(query_filter, {field: 1}, sort=[(field, direction)], **options)
+                     for direction in (1, -1)]
+        except ExecutionTimeout:
+            # Sin respuesta a tiempo se mantiene el rango: la propia página tampoco llegaría con skip
+            return self.mixed_types
+        brackets = {self.type_bracket(doc.get(field)) for doc in edges if doc is not None}
+        self.mixed_types = len(brackets) > 1
+        self.types_key = self._types_key(query_filter)
+        return self.mixed_types
+
+    def _types_key(self, query_filter):
+        return json_util.dumps(query_filter, sort_keys=True), json_util.dumps(self.sort_spec())
+
+    def types_known(self, query_filter):
+        """Si check_types() ya se hizo para este filtro y el orden actual."""
+        return self.types_key == self._types_key(query_filter)
+
+    def range_filter(self, key, after):
+        """Filtro de los documentos situados después (after=True) o antes de key en el orden actual."""
+        spec = self.sort_spec()
+        clauses = []
+        for i, (field, direction) in enumerate(spec):
+            operator = '$gt' if (direction == 1) == after else '$lt'
+            clause = {prev_field: key[j] for j, (prev_field, _) in enumerate(spec[:i])}
+            clause[field] = {operator: key[i]}
+            clauses.append(clause)
+        return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+    def plan(self, move, page_size):
+        """
+        Devuelve el plan de consulta para el movimiento solicitado:
+        dict con 'range' (filtro adicional o None), 'sort', 'skip', 'reverse', 'anchor' y 'page_index'.
+        """
+        if move == self.RELOAD and self.current_plan:
+            return dict(self.current_plan)
+        if move in (self.FIRST, self.RELOAD):
+            return {'range': None, 'sort': self.sort_spec(), 'skip': 0, 'reverse': False,
+                    'anchor': 'start', 'page_index': 0}
+        if move == self.LAST:
+            return {'range': None, 'sort': self.sort_spec(reverse=True), 'skip': 0, 'reverse': True,
+                    'anchor': 'end', 'page_index': 0}
+
+        forward = move == self.NEXT
+        step = 1 if forward == (self.anchor == 'start') else -1
+        anchor = self.anchor
+        page_index = max(0, self.page_index + step)
+
+        key = self.last_key if forward else self.first_key
+        if self.use_keyset and not self.mixed_types and self._is_rangeable(key):
+            return {'range': self.range_filter(key, after=forward), 'sort': self.sort_spec(reverse=not forward),
+                    'skip': 0, 'reverse': not forward, 'anchor': anchor, 'page_index': page_index}
+
+        reverse = anchor == 'end'
+        return {'range': None, 'sort': self.sort_spec(reverse=reverse), 'skip': page_index * page_size,
+                'reverse': reverse, 'anchor': anchor, 'page_index': page_index}
+
+    def commit(self, plan, documents, page_size):
+        """
+        Registra el resultado de un plan (consultado con limit page_size + 1) y devuelve los
+        documentos de la página en orden de visualización.
+        """
+        more = len(documents) > page_size
+        documents = documents[:page_size]
+        if plan['reverse']:
+            documents.reverse()
+
+        self.current_plan = plan
+        self.anchor = plan['anchor']
+        self.page_index = plan['page_index']
+        at_start = self.anchor == 'start' and self.page_index == 0
+        at_end = self.anchor == 'end' and self.page_index == 0
+        if plan['reverse']:
+            self.has_prev = more
+            self.has_next = not at_end
+        else:
+            self.has_next = more
+            self.has_prev = not at_start
+
+        self.first_key = self.boundary_key(documents[0]) if documents else None
+        self.last_key = self.boundary_key(documents[-1]) if documents else None
+        return documents
+
+    def page_label(self):
+        if self.anchor == 'start':
+            return f"Página {self.page_index + 1}"
+        if self.page_index == 0:
+            return "Última página"
+        return f"Página {self.page_index + 1} desde el final"
+
+# --- CLASE DE CACHÉ DE PÁGINAS ---
+class PageCache:
+    """
+    Caché LRU de páginas ya consultadas, con un presupuesto de memoria en bytes.
+    La clave es (db, colección, filtro, orden, frontera de página). Cada colección lleva
+    un número de versión que se incrementa al escribir en ella: las páginas de esa
+    colección se descartan y las precargas lanzadas antes de la escritura no se guardan.
+    """
+
+    def __init__(self, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # clave -> (documentos, bytes)
+        self.total_bytes = 0
+        self.versions = {}
+
+    @staticmethod
+    def page_key(namespace, query_filter, plan, page_size, preview=False, fields=None):
+        return (namespace[0], namespace[1],
+                json_util.dumps(query_filter, sort_keys=True),
+                json_util.dumps(plan['sort']),
+                json_util.dumps(plan['range'], sort_keys=True),
+                plan['skip'], page_size, preview, fields)
+
+    @staticmethod
+    def estimate_bytes(documents):
+        try:
+            return sum(len(bson.encode(doc)) for doc in documents)
+        except Exception:
+            return len(documents) * 1024
+
+    def version(self, namespace):
+        return self.versions.get(namespace, 0)
+
+    def get(self, key, touch=True):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if touch:
+            self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, documents, size, version):
+        if version != self.version(key[:2]) or size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (documents, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def invalidate(self, namespace):
+        self.versions[namespace] = self.version(namespace) + 1
+        for key in [k for k in self.entries if k[:2] == namespace]:
+            self.total_bytes -= self.entries.pop(key)[1]
+
+# --- CLASE DE CACHÉ DE TOTALES ---
+class CountCache:
+    """
+    Totales de resultados por (db, colección, filtro). Un total puede ser exacto o, si el
+    conteo agotó su presupuesto de tiempo, desconocido (se muestra como cota inferior).
+    """
+
+    def __init__(self, ttl=COUNT_TTL_SECONDS):
+        self.ttl = ttl
+        self.entries = {}  # clave -> (total o None, exacto, instante)
+
+    @staticmethod
+    def key(namespace, query_filter):
+        return (namespace[0], namespace[1], json_util.dumps(query_filter, sort_keys=True))
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[2] > self.ttl:
+            return None
+        return entry[0], entry[1]
+
+    def put(self, key, total, exact):
+        self.entries[key] = (total, exact, time.monotonic())
+
+    def invalidate(self, namespace):
+        for key in [k for k in self.entries if k[:2] == namespace]:
+            del self.entries[key]
+
+    @staticmethod
+    def count(collection, query_filter, max_time_ms=COUNT_MAX_TIME_MS):
+        """
+        Sin filtro se usa estimated_document_count (solo metadatos); con filtro, count_documents
+        acotado por max_time_ms. Devuelve (total, exacto); (None, False) si se agota el tiempo.
+        """
+        if not query_filter:
+            return collection.estimated_document_count(maxTimeMS=QUERY_MAX_TIME_MS), True
+        try:
+            return collection.count_documents(query_filter, maxTimeMS=max_time_ms), True
+        except ExecutionTimeout:
+            return None, False
+
+# --- CLASE DE DESCUBRIMIENTO DE ESQUEMA ---
+class SchemaService:
+    """
+    Infiere los campos de cada colección (tipos y frecuencia) a partir de una muestra
+    $sample agregada en el servidor. El resultado se guarda por colección con un TTL:
+    mientras tanto se sirve la versión en caché y, al caducar, se refresca en segundo
+    plano. Sirve para dar a la tabla un juego de columnas estable entre páginas.
+    """
+
+    def __init__(self, sample_size=SCHEMA_SAMPLE_SIZE, ttl=SCHEMA_TTL_SECONDS):
+        self.sample_size = sample_size
+        self.ttl = ttl
+        self.entries = {}  # (db, colección) -> {'fields': {campo: {'count', 'types'}}, 'sampled', 'fetched_at'}
+        self.hidden = {}  # (db, colección) -> campos ocultos por el usuario
+
+    def sample(self, collection, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """Muestrear la colección y devolver la entrada de esquema (apto para ejecutarse en otro hilo)."""
+        pipeline = [
+            {'$sample': {'size': self.sample_size}},
+            {'$facet': {
+                'total': [{'$count': 'n'}],
+                'fields': [
+                    {'$project': {'field': {'$objectToArray': '$$ROOT'}}},
+                    {'$unwind': '$field'},
+                    {'$group': {'_id': '$field.k', 'count': {'$sum': 1}, 'types': {'$addToSet': {'$type': '$field.v'}}}},
+                ],
+            }},
+        ]
+        options = {'maxTimeMS': max_time_ms}
+        if comment:
+            options['comment'] = comment
+        result = next(collection.aggregate(pipeline, **options), {'total': [], 'fields': []})
+        sampled = result['total'][0]['n'] if result['total'] else 0
+        fields = {f['_id']: {'count': f['count'], 'types': sorted(f['types'])} for f in result['fields']}
+        return {'fields': fields, 'sampled': sampled, 'fetched_at': time.monotonic()}
+
+    def get(self, namespace):
+        return self.entries.get(namespace)
+
+    def is_stale(self, namespace):
+        entry = self.entries.get(namespace)
+        return entry is None or time.monotonic() - entry['fetched_at'] > self.ttl
+
+    def store(self, namespace, entry):
+        # Conservar los campos observados en páginas que la nueva muestra no haya recogido
+        previous = self.entries.get(namespace)
+        if previous:
+            for field, info in previous['fields'].items():
+                entry['fields'].setdefault(field, {'count': 0, 'types': info['types']})
+        self.entries[namespace] = entry
+
+    def observe(self, namespace, keys):
+        """Añadir al esquema los campos vistos en una página que no aparecían en la muestra."""
+        entry = self.entries.get(namespace)
+        if entry:
+            for key in keys:
+                entry['fields'].setdefault(key, {'count': 0, 'types': []})
+
+    def frequency(self, namespace, field):
+        entry = self.entries.get(namespace)
+        if not entry or not entry['sampled']:
+            return None
+        return entry['fields'].get(field, {'count': 0})['count'] / entry['sampled']
+
+    def columns(self, namespace, fallback_keys=()):
+        """Columnas visibles en orden estable: '_id' primero y el resto alfabéticamente."""
+        entry = self.entries.get(namespace)
+        keys = set(entry['fields']) if entry else set(fallback_keys)
+        keys -= self.hidden.get(namespace, set())
+        return ['_id'] + sorted(k for k in keys if k != '_id')
+
+    def projection(self, namespace):
+        """Campos a pedir al servidor, o None si no hay ninguno oculto (se piden todos)."""
+        if not self.hidden.get(namespace) or namespace not in self.entries:
+            return None
+        return tuple(self.columns(namespace))
+
+    def set_hidden(self, namespace, fields):
+        self.hidden[namespace] = set(fields) - {'_id'}
+
+    def rare_fields(self, namespace, threshold=SCHEMA_RARE_THRESHOLD):
+        entry = self.entries.get(namespace)
+        if not entry:
+            return set()
+        return {field for field in entry['fields'] if field != '_id' and (self.frequency(namespace, field) or 0) < threshold}
+
+# --- CLASE DE ESTADÍSTICAS DE CAMPOS ---
+class FieldStatsCache:
+    """
+    Estadísticas de un campo calculadas en el servidor con una sola agregación $facet: valores
+    más frecuentes, valores distintos, nulos y ausentes, tipos, mínimo y máximo e histogramas
+    de números y fechas. Se guardan por (db, colección, filtro, campo, tamaño de muestra).
+    """
+
+    def __init__(self, ttl=FIELD_STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self.entries = {}  # clave -> estadísticas (con 'fetched_at')
+
+    @staticmethod
+    def key(namespace, query_filter, field, sample_size=None):
+        return (namespace[0], namespace[1], json_util.dumps(query_filter, sort_keys=True), field, sample_size)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry['fetched_at'] > self.ttl:
+            return None
+        return entry
+
+    def put(self, key, stats):
+        self.entries[key] = stats
+
+    def invalidate(self, namespace):
+        for key in [k for k in self.entries if k[:2] == namespace]:
+            del self.entries[key]
+
+    @staticmethod
+    def pipeline(query_filter, field, sample_size=None, top=FIELD_STATS_TOP, buckets=FIELD_STATS_BUCKETS):
+        """Agregación que calcula todas las estadísticas del campo de una pasada (ver compute)."""
+        pipeline = []
+        if query_filter:
+            pipeline.append({'$match': query_filter})
+        if sample_size:
+            pipeline.append({'$sample': {'size': sample_size}})
+        # Solo viaja el valor del campo entre etapas; $facet reparte la misma entrada entre todos los cálculos
+        pipeline.append({'$project': {'_id': 0, 'v': f"${field}"}})
+        pipeline.append({'$facet': {
+            'total': [{'$count': 'n'}],
+            'types': [{'$group': {'_id': {'$type': '$v'}, 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}],
+            'top': [{'$group': {'_id': '$v', 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}, {'$limit': top}],
+            'distinct': [{'$group': {'_id': '$v'}}, {'$count': 'n'}],
+            'range': [{'$group': {'_id': None, 'min': {'$min': '$v'}, 'max': {'$max': '$v'}}}],
+            'numbers': [{'$match': {'v': {'$type': 'number'}}}, {'$bucketAuto': {'groupBy': '$v', 'buckets': buckets}}],
+            'dates': [{'$match': {'v': {'$type': 'date'}}}, {'$bucketAuto': {'groupBy': '$v', 'buckets': buckets}}],
+        }})
+        return pipeline
+
+    @classmethod
+    def compute(cls, collection, query_filter, field, sample_size=None, top=FIELD_STATS_TOP, buckets=FIELD_STATS_BUCKETS,
+                max_time_ms=FIELD_STATS_MAX_TIME_MS, comment=None):
+        """
+        Estadísticas del campo entre los documentos que cumplen el filtro (o una muestra $sample de
+        sample_size de ellos). Devuelve un dict con 'scanned', 'missing', 'null', 'distinct',
+        'types' [(tipo, n)], 'top' [(valor, n)], 'min', 'max' e 'histograms' {'number'|'date': [(desde, hasta, n)]}.
+        """
+        options = {'allowDiskUse': True, 'maxTimeMS': max_time_ms}
+        if comment:
+            options['comment'] = comment
+        result = next(collection.aggregate(cls.pipeline(query_filter, field, sample_size, top, buckets), **options), {})
+        types = [(t['_id'], t['count']) for t in result.get('types', [])]
+        counts = dict(types)
+        value_range = result['range'][0] if result.get('range') else {}
+        return {
+            'field': field,
+            'sample_size': sample_size,
+            'scanned': result['total'][0]['n'] if result.get('total') else 0,
+            'missing': counts.get('missing', 0),
+            'null': counts.get('null', 0),
+            'distinct': result['distinct'][0]['n'] if result.get('distinct') else 0,
+            'types': types,
+            'top': [(t['_id'], t['count']) for t in result.get('top', [])],
+            'min': value_range.get('min'),
+            'max': value_range.get('max'),
+            'histograms': {kind: [(b['_id']['min'], b['_id']['max'], b['count']) for b in result.get(name, [])]
+                           for kind, name in (('number', 'numbers'), ('date', 'dates')) if result.get(name)},
+            'fetched_at': time.monotonic(),
+        }
+
+# --- FORMATO DE CELDAS ---
+def _preview_expr(value, nested=False):
+    """
+    Expresión de agregación que reduce value para la vista previa: los strings largos se
+    cortan y los objetos/arrays se sustituyen por un resumen con su tamaño y, en el primer
+    nivel, sus primeras PREVIEW_ITEMS claves/elementos (resumidos a su vez).
+    """
+    object_summary = {PREVIEW_MARKER: 'object', 'size': {'$size': {'$objectToArray': value}}}
+    array_summary = {PREVIEW_MARKER: 'array', 'size': {'$size': value}}
+    if not nested:
+        object_summary['head'] = {'$arrayToObject': {'$map': {
+            'input': {'$slice': [{'$objectToArray': value}, PREVIEW_ITEMS]},
+            'as': 'item',
+            'in': {'k': '$$item.k', 'v': _preview_expr('$$item.v', nested=True)},
+        }}}
+        array_summary['head'] = {'$map': {
+            'input': {'$slice': [value, PREVIEW_ITEMS]},
+            'as': 'item',
+            'in': _preview_expr('$$item', nested=True),
+        }}
+    return {'$switch': {
+        'branches': [
+            {'case': {'$eq': [{'$type': value}, 'object']}, 'then': object_summary},
+            {'case': {'$isArray': value}, 'then': array_summary},
+            {'case': {'$and': [{'$eq': [{'$type': value}, 'string']},
+                               {'$gt': [{'$strLenCP': value}, MAX_COLUMN_WIDTH]}]},
+             'then': {'$substrCP': [value, 0, MAX_COLUMN_WIDTH]}},
+        ],
+        'default': value,
+    }}
+
+def build_preview_stage(raw_fields=('_id',)):
+    """Etapa $replaceRoot que aplica la vista previa a todos los campos salvo raw_fields (se devuelven completos)."""
+    raw_cases = [{'case': {'$eq': ['$$field.k', field]}, 'then': '$$field.v'} for field in raw_fields]
+    return {'$replaceRoot': {'newRoot': {'$arrayToObject': {'$map': {
+        'input': {'$objectToArray': '$$ROOT'},
+        'as': 'field',
+        'in': {'k': '$$field.k', 'v': {'$switch': {
+            'branches': raw_cases or [{'case': False, 'then': None}],
+            'default': _preview_expr('$$field.v'),
+        }}},
+    }}}}}
+
+class _CellFull(Exception):
+    """Se ha alcanzado el ancho de la celda: no hace falta seguir recorriendo el valor."""
+
+
+class _CellWriter:
+    def __init__(self, width):
+        self.width = width
+        self.parts = []
+        self.length = 0
+
+    def remaining(self):
+        return self.width - self.length
+
+    def write(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length > self.width:
+            raise _CellFull()
+
+    def text(self):
+        return "".join(self.parts)
+
+
+def _write_scalar(value, out):
+    """Escalares con un resumen según su tipo BSON; nunca se convierte entero un valor grande."""
+    if value is None:
+        out.write("null")
+    elif isinstance(value, (bool, int, float)):
+        out.write(json.dumps(value))
+    elif isinstance(value, str):
+        # Basta con la parte que cabe: el resto del string nunca se llega a escapar
+        out.write(json.dumps(value[:out.remaining() + 1]))
+    elif isinstance(value, ObjectId):
+        out.write(f"ObjectId({value})")
+    elif isinstance(value, datetime.datetime):
+        out.write(f"Date({value.isoformat()})")
+    elif isinstance(value, (bytes, bson.binary.Binary)):
+        out.write(f"Binary({len(value)} B)")
+    else:
+        out.write(str(value)[:out.remaining() + 1])
+
+
+def _write_value(value, out):
+    """JSON compacto de value (incluidos los resúmenes de la vista previa) escrito hasta llenar out."""
+    if isinstance(value, dict) and PREVIEW_MARKER in value:
+        size = value.get('size', 0)
+        head = value.get('head')
+        is_object = value[PREVIEW_MARKER] == 'object'
+        if head is None:
+            out.write(f"{{…{size} claves}}" if is_object else f"[…{size} elementos]")
+            return
+        out.write("{" if is_object else "[")
+        for i, item in enumerate(head.items() if is_object else head):
+            if i:
+                out.write(",")
+            if is_object:
+                out.write(json.dumps(item[0]) + ":")
+                item = item[1]
+            _write_value(item, out)
+        if size > len(head):
+            out.write(f",…+{size - len(head)}")
+        out.write("}" if is_object else "]")
+    elif isinstance(value, dict):
+        out.write("{")
+        for i, (key, item) in enumerate(value.items()):
+            if i:
+                out.write(",")
+            out.write(json.dumps(key) + ":")
+            _write_value(item, out)
+        out.write("}")
+    elif isinstance(value, (list, tuple)):
+        out.write("[")
+        for i, item in enumerate(value):
+            if i:
+                out.write(",")
+            _write_value(item, out)
+        out.write("]")
+    else:
+        _write_scalar(value, out)
+
+
+def format_cell(value, width=MAX_COLUMN_WIDTH):
+    """
+    Texto abreviado con el que se muestra un valor en la tabla. Los objetos y arrays se
+    recorren solo hasta llenar el ancho de la celda, así que el coste no depende de su tamaño;
+    si se cortan, se antepone su número de claves o elementos.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value[:width]
+    if isinstance(value, (bytes, bson.binary.Binary)):
+        return f"Binary({len(value)} B)"
+    if not isinstance(value, (dict, list, tuple)):
+        return str(value)[:width]
+    out = _CellWriter(width)
+    try:
+        _write_value(value, out)
+    except _CellFull:
+        if isinstance(value, dict) and PREVIEW_MARKER in value:
+            size = ""  # El resumen del servidor ya indica su tamaño
+        elif isinstance(value, dict):
+            size = f"({len(value)} {'clave' if len(value) == 1 else 'claves'}) "
+        else:
+            size = f"({len(value)} {'elemento' if len(value) == 1 else 'elementos'}) "
+        return (size + out.text())[:width] + "..."
+    except Exception:
+        return str(value)[:width]
+    return out.text()
+
+
+class CellFormatter:
+    """
+    Memoria de las celdas ya formateadas por (documento, campo). Cada documento recibido del
+    servidor es una versión: mientras se reutiliza el mismo objeto (al volver a una página en
+    caché, al recolocar filas) su formato no se repite; una nueva consulta, un cambio en vivo
+    o el modo de vista previa traen objetos nuevos y, con ellos, celdas nuevas. Se guarda una
+    referencia al documento para que su id() no se reutilice mientras la entrada exista.
+    """
+
+    def __init__(self, max_documents=CELL_CACHE_DOCUMENTS, width=MAX_COLUMN_WIDTH):
+        self.max_documents = max_documents
+        self.width = width
+        self.entries = OrderedDict()  # id(documento) -> (documento, {campo: texto})
+
+    def row(self, doc, columns):
+        """Textos de las columnas indicadas de un documento."""
+        entry = self.entries.get(id(doc))
+        if entry is None or entry[0] is not doc:
+            entry = (doc, {})
+            self.entries[id(doc)] = entry
+            while len(self.entries) > self.max_documents:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(id(doc))
+        cells = entry[1]
+        values = []
+        for column in columns:
+            text = cells.get(column)
+            if text is None:
+                text = cells[column] = format_cell(doc.get(column), self.width)
+            values.append(text)
+        return tuple(values)
+
+    def clear(self):
+        self.entries.clear()
+
+# --- IDENTIFICADORES DE DOCUMENTO ---
+def get_clean_id(doc_id):
+    """Valor legible del _id nativo de una fila (el 'id' de las entidades de Orion)."""
+    if isinstance(doc_id, dict) and 'id' in doc_id:
+        return doc_id['id']
+    return str(doc_id)
+
+def parse_id(id_str):
+    """
+    _id nativo a partir del texto con que lo escribe el usuario: JSON extendido (incluido un
+    _id compuesto completo, con sus campos en orden), un ObjectId en hexadecimal o texto literal.
+    """
+    try:
+        return json_util.loads(id_str)
+    except ValueError:
+        pass
+    if ObjectId.is_valid(id_str):
+        return ObjectId(id_str)
+    return id_str
+
+def parse_index_keys(keys_str):
+    """
+    Claves de un índice a partir de un objeto JSON que conserva el orden de los campos, p. ej.
+    {"_id.servicePath": 1, "_id.type": 1} o {"location.coords": "2dsphere"}.
+    """
+    keys = json.loads(keys_str, object_pairs_hook=list)
+    # Con object_pairs_hook=list un objeto llega como lista de tuplas (campo, tipo)
+    if not isinstance(keys, list) or not keys or not all(isinstance(key, tuple) for key in keys):
+        raise ValueError("Las claves del índice deben ser un objeto JSON con al menos un campo.")
+    for field, kind in keys:
+        if kind not in (1, -1) and not isinstance(kind, str):
+            raise ValueError(f"Tipo de índice no válido para '{field}': {kind!r} (1, -1, \"2dsphere\", \"text\"...).")
+    return keys
+
+def parse_filter(filter_str):
+    """
+    Filtro de consulta a partir del texto introducido por el usuario (vacío = todos), en JSON
+    extendido: {"modDate": {"$gt": {"$date": "2024-01-01T00:00:00Z"}}} o {"_id": {"$oid": "..."}}.
+    """
+    filter_str = (filter_str or "").strip()
+    if not filter_str:
+        return {}
+    query_filter = json_util.loads(filter_str)
+    if not isinstance(query_filter, dict):
+        raise ValueError("El filtro debe ser un objeto JSON.")
+    return query_filter
+
+def parse_pipeline(pipeline_str):
+    """Pipeline de agregación en JSON extendido: una lista de etapas (o una sola etapa) de la forma {"$etapa": ...}."""
+    pipeline = json_util.loads(pipeline_str or "[]")
+    if isinstance(pipeline, dict):
+        pipeline = [pipeline]
+    if not isinstance(pipeline, list):
+        raise ValueError("El pipeline debe ser una lista de etapas JSON.")
+    for number, stage in enumerate(pipeline, start=1):
+        if not isinstance(stage, dict) or len(stage) != 1 or not next(iter(stage)).startswith('$'):
+            raise ValueError(f"La etapa {number} debe ser un objeto con un único operador, p. ej. {{\"$match\": {{...}}}}.")
+    for stage in pipeline[:-1]:
+        if '$out' in stage or '$merge' in stage:
+            raise ValueError("$out y $merge solo pueden ser la última etapa del pipeline.")
+    return pipeline
+
+# --- ANÁLISIS DE CONSULTAS ---
+def _plan_stages(stage):
+    """Etapas de un plan de ejecución (winningPlan o executionStages), de la raíz a las hojas."""
+    stages = []
+    pending = [stage] if stage else []
+    while pending:
+        current = pending.pop(0)
+        stages.append(current)
+        if 'inputStage' in current:
+            pending.append(current['inputStage'])
+        pending.extend(current.get('inputStages', []))
+        # En los planes del motor SBE el árbol clásico cuelga de queryPlan
+        if 'queryPlan' in current:
+            pending.append(current['queryPlan'])
+    return stages
+
+def summarize_explain(result, examined_ratio=EXPLAIN_EXAMINED_RATIO):
+    """
+    Resumen legible de un explain('executionStats') de find o aggregate: plan ganador (COLLSCAN/IXSCAN),
+    índices usados, claves y documentos examinados, documentos devueltos y tiempo en servidor,
+    más avisos de ordenación en memoria y de consultas que examinan mucho más de lo que devuelven.
+    """
+    planner, stats = result.get('queryPlanner'), result.get('executionStats')
+    # En una agregación, la parte que resuelve el motor de consultas va en la etapa $cursor
+    for stage in result.get('stages', []):
+        if '$cursor' in stage:
+            planner = stage['$cursor'].get('queryPlanner', planner)
+            stats = stage['$cursor'].get('executionStats', stats)
+    planner, stats = planner or {}, stats or {}
+
+    stages = _plan_stages(planner.get('winningPlan'))
+    names = [stage.get('stage', '?') for stage in stages]
+    indexes = [stage['indexName'] for stage in stages if stage.get('indexName')]
+    summary = {
+        'plan': ' ← '.join(names) or '?',
+        'collscan': 'COLLSCAN' in names,
+        'indexes': indexes,
+        'keys_examined': stats.get('totalKeysExamined'),
+        'docs_examined': stats.get('totalDocsExamined'),
+        'returned': stats.get('nReturned'),
+        'time_ms': stats.get('executionTimeMillis'),
+        'in_memory_sort': 'SORT' in names or any(name.startswith('SORT_') and name != 'SORT_MERGE' for name in names),
+        'warnings': [],
+    }
+    if summary['collscan']:
+        summary['warnings'].append("Recorre la colección completa (COLLSCAN): ningún índice sirve para el filtro.")
+    if summary['in_memory_sort']:
+        summary['warnings'].append("Ordena en memoria (SORT): no hay un índice que cubra la ordenación.")
+    examined = max(summary['docs_examined'] or 0, summary['keys_examined'] or 0)
+    returned = summary['returned'] or 0
+    if examined > examined_ratio * max(returned, 1):
+        summary['warnings'].append(f"Examina {examined} claves/documentos para devolver {returned}.")
+    return summary
+
+
+class QueryHistory:
+    """Tiempos de las consultas recientes de la sesión, para detectar regresiones de un vistazo."""
+
+    def __init__(self, size=QUERY_HISTORY_SIZE):
+        self.entries = deque(maxlen=size)
+
+    def record(self, namespace, query_filter, plan, duration_ms, returned, source='servidor'):
+        self.entries.appendleft({
+            'at': time.time(),
+            'namespace': namespace,
+            'filter': query_filter,
+            'sort': plan['sort'],
+            'method': QueryHistory.method(plan),
+            'duration_ms': duration_ms,
+            'returned': returned,
+            'source': source,
+        })
+
+    @staticmethod
+    def method(plan):
+        if plan['range']:
+            return 'rango'
+        if plan['skip']:
+            return f"skip {plan['skip']}"
+        return 'final' if plan['anchor'] == 'end' else 'inicio'
+
+    def recent(self, namespace=None):
+        return [entry for entry in self.entries if namespace is None or entry['namespace'] == namespace]
+
+# --- CLASES DE ACCESO A DATOS ---
+class Repository:
+    """
+    Acceso a MongoDB independiente de la interfaz: listados de bases de datos y colecciones,
+    sesiones de consulta paginada y operaciones por documento. Lo usan tanto la interfaz Tk
+    como la línea de comandos.
+    """
+
+    def __init__(self, client, uri=None, profile=None):
+        self.client = client
+        self.uri = uri
+        self.profile = dict(DEFAULT_PROFILE, **(profile or {}))
+        self.batch_size = self.profile['batch_size']  # 0 = tamaño de lote del servidor
+
+    @classmethod
+    def connect(cls, uri=DEFAULT_MONGO_URI, profile=None, event_listeners=None):
+        """Crear el cliente con las opciones del perfil de conexión (compresión, pool, timeouts) y comprobarlo."""
+        profile = dict(DEFAULT_PROFILE, **(profile or {}))
+        client = MongoClient(
+            uri,
+            directConnection=True,
+            event_listeners=event_listeners or [],
+            **client_options(profile)
+        )
+        client.admin.command('ping')
+        return cls(client, uri, profile)
+
+    def matches(self, uri, profile):
+        """Indica si el cliente ya abierto sirve para uri con ese perfil, de modo que se pueda reutilizar."""
+        return self.uri == uri and self.profile == dict(DEFAULT_PROFILE, **profile)
+
+    def ping(self):
+        self.client.admin.command('ping')
+        return self
+
+    def close(self):
+        self.client.close()
+
+    def collection(self, db_name, collection_name):
+        return self.client[db_name][collection_name]
+
+    def list_databases(self):
+        return sorted(name for name in self.client.list_database_names() if name not in SYSTEM_DATABASES)
+
+    def list_collections(self, db_name):
+        return sorted(self.client[db_name].list_collection_names())
+
+    def database_stats(self, db_name):
+        """Resumen de dbStats: colecciones, documentos, tamaño en disco e índices."""
+        stats = self.client[db_name].command('dbStats')
+        return {'collections': stats.get('collections'), 'count': stats.get('objects'),
+                'storage': stats.get('storageSize'), 'indexes': stats.get('indexes')}
+
+    def collection_stats(self, db_name, collection_name):
+        """Resumen de collStats: documentos, tamaño de los datos, tamaño en disco e índices."""
+        stats = self.client[db_name].command('collStats', collection_name)
+        return {'count': stats.get('count'), 'size': stats.get('size'),
+                'storage': stats.get('storageSize'), 'indexes': stats.get('nindexes')}
+
+    def session(self, db_name, collection_name, **options):
+        return QuerySession(self, db_name, collection_name, **options)
+
+    def get(self, db_name, collection_name, doc_id, fields=None, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """Documento con el _id nativo doc_id (o solo los campos indicados)."""
+        options = {'max_time_ms': max_time_ms}
+        if comment:
+            options['comment'] = comment
+        projection = {field: 1 for field in fields} if fields else None
+        return self.collection(db_name, collection_name).find_one({"_id": doc_id}, projection, **options)
+
+    def update_field(self, db_name, collection_name, doc_id, field, value, fields=None):
+        """
+        Asignar un campo del documento con _id doc_id y devolverlo ya modificado (o solo los
+        campos indicados) en el mismo viaje; None si no existe.
+        """
+        projection = {name: 1 for name in fields} if fields else None
+        return self.collection(db_name, collection_name).find_one_and_update(
+            {"_id": doc_id}, {"$set": {field: value}}, projection=projection, return_document=ReturnDocument.AFTER)
+
+    def replace(self, db_name, collection_name, doc_id, new_doc, fields=None):
+        """Reemplazar el documento con _id doc_id (el _id de new_doc se ignora) y devolver el nuevo; None si no existe."""
+        new_doc = dict(new_doc)
+        new_doc.pop('_id', None)
+        projection = {name: 1 for name in fields} if fields else None
+        return self.collection(db_name, collection_name).find_one_and_replace(
+            {"_id": doc_id}, new_doc, projection=projection, return_document=ReturnDocument.AFTER)
+
+    def delete(self, db_name, collection_name, doc_id):
+        return self.collection(db_name, collection_name).delete_one({"_id": doc_id})
+
+    @staticmethod
+    def _selection_chunks(doc_ids, chunk_size):
+        for start in range(0, len(doc_ids), chunk_size):
+            yield doc_ids[start:start + chunk_size]
+
+    def count_matching(self, db_name, collection_name, query_filter=None, doc_ids=None, chunk_size=BULK_CHUNK_SIZE):
+        """
+        Simulación de una operación masiva: cuántos documentos afectaría, ya sea sobre las filas
+        seleccionadas (sus _id nativos, doc_ids) o sobre todos los que cumplen query_filter.
+        """
+        collection = self.collection(db_name, collection_name)
+        if doc_ids is None:
+            return collection.count_documents(query_filter or {})
+        return sum(collection.count_documents({'_id': {'$in': chunk}}) for chunk in self._selection_chunks(doc_ids, chunk_size))
+
+    def bulk_apply(self, db_name, collection_name, update=None, query_filter=None, doc_ids=None,
+                   chunk_size=BULK_CHUNK_SIZE, progress=None):
+        """
+        Borrar (update=None) o actualizar con update (p. ej. {'$set': {...}}) en una sola pasada:
+        delete_many/update_many sobre query_filter, o bulk_write no ordenado en bloques de
+        chunk_size operaciones sobre los _id de las filas seleccionadas. progress(hechas, total) tras cada bloque.
+        Devuelve un dict con 'matched', 'modified', 'deleted', 'errors' y 'elapsed'.
+        """
+        collection = self.collection(db_name, collection_name)
+        summary = {'matched': 0, 'modified': 0, 'deleted': 0, 'errors': []}
+        started = time.monotonic()
+        if doc_ids is None:
+            if update is None:
+                summary['deleted'] = collection.delete_many(query_filter or {}).deleted_count
+            else:
+                result = collection.update_many(query_filter or {}, update)
+                summary.update(matched=result.matched_count, modified=result.modified_count)
+        else:
+            done = 0
+            for chunk in self._selection_chunks(doc_ids, chunk_size):
+                # Una operación por fila, igual que al borrar o editar un documento suelto
+                requests = [DeleteOne({'_id': doc_id}) if update is None else UpdateOne({'_id': doc_id}, update)
+                            for doc_id in chunk]
+                try:
+                    result = collection.bulk_write(requests, ordered=False)
+                    summary['matched'] += result.matched_count
+                    summary['modified'] += result.modified_count
+                    summary['deleted'] += result.deleted_count
+                except BulkWriteError as e:
+                    summary['matched'] += e.details.get('nMatched', 0)
+                    summary['modified'] += e.details.get('nModified', 0)
+                    summary['deleted'] += e.details.get('nRemoved', 0)
+                    summary['errors'] += [error.get('errmsg', '') for error in e.details.get('writeErrors', [])]
+                done += len(chunk)
+                if progress:
+                    progress(done, len(doc_ids))
+        summary['elapsed'] = time.monotonic() - started
+        return summary
+
+    def list_indexes(self, db_name, collection_name):
+        """
+        Índices de la colección con su patrón de claves, opciones, tamaño (collStats) y
+        número de accesos desde el último arranque ($indexStats).
+        """
+        collection = self.collection(db_name, collection_name)
+        sizes = self.client[db_name].command('collStats', collection_name).get('indexSizes', {})
+        try:
+            usage = {stat['name']: stat['accesses'] for stat in collection.aggregate([{'$indexStats': {}}])}
+        except Exception:
+            # $indexStats necesita permisos de clusterMonitor o similares; sin ellos se omite el uso
+            usage = {}
+        indexes = []
+        for index in collection.list_indexes():
+            options = {k: v for k, v in index.items() if k not in ('v', 'key', 'name', 'ns')}
+            accesses = usage.get(index['name'], {})
+            indexes.append({
+                'name': index['name'],
+                'key': list(index['key'].items()),
+                'options': options,
+                'size': sizes.get(index['name']),
+                'ops': accesses.get('ops'),
+                'since': accesses.get('since'),
+            })
+        return indexes
+
+    def create_index(self, db_name, collection_name, keys, **options):
+        """Crear un índice (keys como la devuelve parse_index_keys); bloquea hasta que termina la construcción."""
+        return self.collection(db_name, collection_name).create_index(keys, **options)
+
+    def drop_index(self, db_name, collection_name, index_name):
+        self.collection(db_name, collection_name).drop_index(index_name)
+
+    def index_builds(self, db_name, collection_name):
+        """Construcciones de índices en curso sobre la colección, con su progreso según currentOp."""
+        # El comando createIndexes puede figurar con ns '<db>.$cmd'; el hilo de construcción, con el de la colección
+        current = self.client.admin.command('currentOp', **{'$or': [
+            {'ns': {'$regex': f"^{re.escape(db_name)}\\."}, 'command.createIndexes': collection_name},
+            {'ns': f"{db_name}.{collection_name}", 'msg': {'$regex': '^Index Build'}},
+        ]})
+        builds = []
+        for op in current.get('inprog', []):
+            progress = op.get('progress', {})
+            builds.append({'opid': op.get('opid'), 'msg': op.get('msg', 'Index Build'),
+                           'done': progress.get('done'), 'total': progress.get('total')})
+        return builds
+
+    def iter_documents(self, db_name, collection_name, query_filter=None, sort=None, batch_size=None):
+        """
+        Recorrer en streaming todos los documentos que cumplen el filtro. El batch_size indicado
+        manda; sin él se usa el del perfil y, si el perfil deja el del servidor, lotes de 1000.
+        """
+        cursor = self.collection(db_name, collection_name).find(query_filter or {}, batch_size=batch_size or self.batch_size or 1000)
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor
+
+
+class QuerySession:
+    """
+    Consulta paginada sobre una colección: filtro, orden, tamaño de página, vista previa y
+    campos a proyectar. plan() y commit() gestionan el estado de paginación; fetch() solo
+    hace E/S, por lo que puede ejecutarse en otro hilo entre ambos.
+    """
+
+    def __init__(self, repository, db_name, collection_name, query_filter=None, page_size=20, preview=False, fields=None):
+        self.repository = repository
+        self.namespace = (db_name, collection_name)
+        self.collection = repository.collection(db_name, collection_name)
+        self.query_filter = query_filter or {}
+        self.page_size = page_size
+        self.preview = preview
+        self.fields = fields
+        self.paginator = KeysetPaginator()
+
+    def with_options(self, **options):
+        """Copia de la sesión con otras opciones de consulta que comparte el estado de paginación."""
+        session = copy.copy(self)
+        session.__dict__.update(options)
+        return session
+
+    def set_sort(self, column, direction=1, use_keyset=True):
+        self.paginator.reset(column, direction, use_keyset)
+
+    def plan(self, move):
+        return self.paginator.plan(move, self.page_size)
+
+    def page_key(self, plan):
+        return PageCache.page_key(self.namespace, self.query_filter, plan, self.page_size, self.preview, self.fields)
+
+    def count_key(self):
+        return CountCache.key(self.namespace, self.query_filter)
+
+    def query_spec(self, plan):
+        """
+        Consulta exacta de un plan de página: dict con 'filter', 'projection', 'sort', 'skip' y 'limit'
+        y, en modo vista previa, 'pipeline' con la agregación equivalente.
+        Si hay fields, solo se piden esos campos (más los de ordenación).
+        """
+        query_filter = self.query_filter
+        if plan['range']:
+            query_filter = {'$and': [query_filter, plan['range']]} if query_filter else plan['range']
+        sort_fields = tuple(field for field, _ in plan['sort'])
+        projection = {field: 1 for field in self.fields + sort_fields} if self.fields else None
+        # Se pide un documento extra para saber si existe una página más allá de la actual
+        spec = {'filter': query_filter, 'projection': projection, 'sort': plan['sort'], 'skip': plan['skip'],
+                'limit': self.page_size + 1, 'pipeline': None}
+        if self.preview:
+            pipeline = [{'$match': query_filter}, {'$sort': SON(plan['sort'])}]
+            if plan['skip']:
+                pipeline.append({'$skip': plan['skip']})
+            pipeline.append({'$limit': spec['limit']})
+            if projection:
+                pipeline.append({'$project': projection})
+            # Las columnas de ordenación se devuelven completas porque forman la clave frontera
+            pipeline.append(build_preview_stage(sort_fields))
+            spec['pipeline'] = pipeline
+        return spec
+
+    def fetch(self, plan, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """
+        Consultar los documentos de un plan de página y su tamaño aproximado en bytes.
+        En modo vista previa se usa una agregación para que el servidor devuelva los valores grandes ya resumidos.
+        """
+        spec = self.query_spec(plan)
+        if spec['pipeline']:
+            options = {'maxTimeMS': max_time_ms}
+            if comment:
+                options['comment'] = comment
+            if self.repository.batch_size:
+                options['batchSize'] = self.repository.batch_size
+            cursor = self.collection.aggregate(spec['pipeline'], **options)
+        else:
+            cursor = self.collection.find(spec['filter'], spec['projection']).sort(spec['sort'])
+            cursor = cursor.skip(spec['skip']).limit(spec['limit']).max_time_ms(max_time_ms)
+            if comment:
+                cursor = cursor.comment(comment)
+            if self.repository.batch_size:
+                cursor = cursor.batch_size(self.repository.batch_size)
+        fetched = list(cursor)
+        return fetched, PageCache.estimate_bytes(fetched)
+
+    def explain(self, plan, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """
+        explain con verbosidad executionStats de exactamente la consulta que fetch() lanzaría para el plan.
+        Devuelve el resultado en bruto del servidor (ver summarize_explain).
+        """
+        spec = self.query_spec(plan)
+        if spec['pipeline']:
+            command = SON([('aggregate', self.collection.name), ('pipeline', spec['pipeline']), ('cursor', {})])
+        else:
+            command = SON([('find', self.collection.name), ('filter', spec['filter']), ('sort', SON(spec['sort'])),
+                           ('skip', spec['skip']), ('limit', spec['limit'])])
+            if spec['projection']:
+                command['projection'] = spec['projection']
+        command['maxTimeMS'] = max_time_ms
+        if comment:
+            command['comment'] = comment
+        return self.collection.database.command('explain', command, verbosity='executionStats')
+
+    def commit(self, plan, fetched):
+        return self.paginator.commit(plan, fetched, self.page_size)
+
+    def types_checked(self):
+        """Si ya se sabe, para el filtro y el orden actuales, si la ordenación mezcla tipos BSON (o no hace falta)."""
+        return self.paginator.use_keyset is False or self.paginator.types_known(self.query_filter)
+
+    def check_types(self, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """Comprobar si la ordenación mezcla tipos BSON; si es así, las páginas siguientes usan skip."""
+        if self.paginator.use_keyset is False:
+            return False
+        return self.paginator.check_types(self.collection, self.query_filter, max_time_ms, comment)
+
+    def row_fields(self):
+        """Campos que se piden para cada fila (None = todos): los visibles más los de ordenación."""
+        if not self.fields:
+            return None
+        return tuple(dict.fromkeys(tuple(self.fields) + tuple(field for field, _ in self.paginator.sort_spec())))
+
+    def neighbours(self, doc, after=True, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """
+        Hasta dos documentos que siguen (after) o preceden a doc en el orden de la sesión, pedidos
+        con el mismo filtro, proyección y vista previa que las páginas: el primero rellena la página
+        tras borrar una fila y el segundo indica si queda algo más allá. None si la clave de doc no
+        admite rangos (valores nulos o arrays, o un campo de ordenación con tipos mezclados).
+        """
+        key = self.paginator.boundary_key(doc)
+        if self.paginator.mixed_types or not self.paginator._is_rangeable(key):
+            return None
+        plan = {'range': self.paginator.range_filter(key, after), 'sort': self.paginator.sort_spec(reverse=not after),
+                'skip': 0, 'reverse': not after, 'anchor': None, 'page_index': None}
+        # Con page_size=1 la consulta pide un documento más, como en cualquier página
+        fetched, _ = self.with_options(page_size=1).fetch(plan, max_time_ms, comment)
+        return fetched
+
+    def page(self, move=KeysetPaginator.FIRST, **options):
+        """Plan, consulta y commit en una sola llamada. Devuelve None si no hay página en esa dirección."""
+        self.check_types(**options)
+        plan = self.plan(move)
+        fetched, _ = self.fetch(plan, **options)
+        if not fetched and move in (KeysetPaginator.NEXT, KeysetPaginator.PREV):
+            return None
+        return self.commit(plan, fetched)
+
+    def sort_has_index(self, column=None):
+        """Indica si existe un índice que empiece por la columna de ordenación (requisito para paginar por rango)."""
+        column = column if column is not None else self.paginator.sort_column
+        if not column or column == '_id':
+            return True
+        try:
+            for index in self.collection.index_information().values():
+                if index['key'] and index['key'][0][0] == column:
+                    return True
+        except Exception:
+            pass
+        return False
+
+    def count(self, max_time_ms=COUNT_MAX_TIME_MS):
+        return CountCache.count(self.collection, self.query_filter, max_time_ms)
+
+
+class AggregationSession:
+    """
+    Agregación sobre una colección cuyo resultado se lee página a página de un único cursor
+    (allowDiskUse, maxTimeMS y un lote por página). Las siguientes páginas solo se piden al
+    servidor al avanzar y se conservan las últimas page_window para volver atrás; una página más
+    antigua se vuelve a pedir repitiendo el pipeline con $skip (si el pipeline no ordena de forma
+    estable puede no coincidir con la vista antes). Con preview_limit se añade un $limit al final
+    para que una vista previa no recorra todo el resultado.
+    """
+
+    LAST = -1  # Índice de página que lee el cursor hasta el final
+
+    def __init__(self, repository, db_name, collection_name, pipeline, page_size=20, preview_limit=AGGREGATE_PREVIEW_LIMIT,
+                 page_window=AGGREGATE_PAGE_WINDOW):
+        self.repository = repository
+        self.namespace = (db_name, collection_name)
+        self.collection = repository.collection(db_name, collection_name)
+        self.pipeline = pipeline
+        self.page_size = page_size
+        self.preview_limit = preview_limit
+        self.page_window = page_window
+        self.pages = OrderedDict()  # Índice -> documentos de las páginas conservadas, de la menos a la más reciente
+        self.page_count = 0  # Páginas leídas del cursor
+        self.total = 0  # Documentos leídos del cursor
+        self.page_index = 0
+        self.columns = []  # Campos vistos en los resultados, por orden de aparición
+        self.cursor = None
+        self.exhausted = False
+        self.lock = threading.Lock()  # Las páginas se leen desde los hilos del ejecutor
+
+    @staticmethod
+    def writes_output(pipeline):
+        return bool(pipeline) and ('$out' in pipeline[-1] or '$merge' in pipeline[-1])
+
+    def run_pipeline(self):
+        """Pipeline que se envía al servidor para mostrar los resultados (con el $limit de vista previa)."""
+        pipeline = list(self.pipeline)
+        if self.preview_limit:
+            pipeline.append({'$limit': self.preview_limit})
+        return pipeline
+
+    def read_page(self, index, max_time_ms=QUERY_MAX_TIME_MS, comment=None):
+        """
+        Documentos de la página index (0 = primera, LAST = última), leyendo del cursor las que
+        falten. Devuelve (índice, documentos) o None si la página no existe.
+        """
+        with self.lock:
+            if self.cursor is None and not self.exhausted:
+                self.cursor = self.collection.aggregate(self.run_pipeline(), **self._options(max_time_ms, comment))
+            while (index == self.LAST or self.page_count <= index) and not self.exhausted:
+                page = list(itertools.islice(self.cursor, self.page_size))
+                if page:
+                    self._keep(self.page_count, page)
+                    self.page_count += 1
+                    self.total += len(page)
+                    self._observe(page)
+                if len(page) < self.page_size:
+                    self.exhausted = True
+                    self.cursor.close()
+            if index == self.LAST:
+                index = self.page_count - 1
+            if not 0 <= index < self.page_count:
+                return None
+            if index not in self.pages:
+                # Página ya leída que salió de la ventana: el cursor no retrocede, se repite el pipeline solo para ella
+                pipeline = self.run_pipeline() + [{'$skip': index * self.page_size}, {'$limit': self.page_size}]
+                self._keep(index, list(self.collection.aggregate(pipeline, **self._options(max_time_ms, comment))))
+            self.pages.move_to_end(index)
+            return index, self.pages[index]
+
+    def _options(self, max_time_ms, comment):
+        options = {'allowDiskUse': True, 'maxTimeMS': max_time_ms, 'batchSize': self.page_size}
+        if comment:
+            options['comment'] = comment
+        return options
+
+    def _keep(self, index, page):
+        self.pages[index] = page
+        self.pages.move_to_end(index)
+        while len(self.pages) > max(1, self.page_window):
+            self.pages.popitem(last=False)
+
+    def _observe(self, documents):
+        known = set(self.columns)
+        for doc in documents:
+            for key in doc:
+                if key not in known:
+                    known.add(key)
+                    self.columns.append(key)
+
+    def has_next(self):
+        return not self.exhausted or self.page_index + 1 < self.page_count
+
+    def page_label(self):
+        label = f"Página {self.page_index + 1}"
+        if self.exhausted:
+            return f"{label} de {max(1, self.page_count)} ({self.total} docs)"
+        return f"{label} de ≥ {self.page_count + 1}"
+
+    def write_output(self, target, merge=False, max_time_ms=AGGREGATE_OUTPUT_MAX_TIME_MS, comment=None):
+        """
+        Ejecutar el pipeline completo (sin límite de vista previa) escribiendo el resultado en la
+        colección target de la misma base de datos: $out la sustituye y $merge funde los documentos
+        por _id. Si el pipeline ya termina en $out/$merge se respeta esa etapa. Devuelve la colección destino.
+        """
+        pipeline = list(self.pipeline)
+        if not self.writes_output(pipeline):
+            pipeline.append({'$merge': {'into': target}} if merge else {'$out': target})
+        else:
+            stage = pipeline[-1]
+            output = stage.get('$out') or stage.get('$merge')
+            target = output if isinstance(output, str) else output.get('into', output.get('coll'))
+        options = {'allowDiskUse': True, 'maxTimeMS': max_time_ms}
+        if comment:
+            options['comment'] = comment
+        # La agregación no devuelve documentos: el cursor se agota en cuanto termina la escritura
+        for _ in self.collection.aggregate(pipeline, **options):
+            pass
+        return target
+
+    def close(self):
+        with self.lock:
+            if self.cursor is not None:
+                self.cursor.close()
+                self.cursor = None
+            self.exhausted = True
@@ -0,0 +1,233 @@
+"""Exportación en streaming de los resultados de una consulta a JSON Lines, CSV o BSON, sin dependencias de Tk."""
+import csv
+import gzip
+import io
+import os
+import sys
+import time
+
+from bson import json_util
+from bson.codec_options import CodecOptions
+from bson.json_util import JSONOptions, JSONMode
+from bson.raw_bson import RawBSONDocument
+
+from .core import KeysetPaginator
+
+EXPORT_FORMATS = ('jsonl', 'csv', 'bson')
+EXPORT_COMPRESSIONS = ('gzip', 'zstd')
+EXPORT_BATCH_SIZE = 1000  # Documentos por lote del cursor de exportación
+EXPORT_CHECKPOINT_EVERY = 1000  # Documentos escritos entre dos puntos de reanudación
+EXPORT_EXTENSIONS = {'jsonl': '.jsonl', 'csv': '.csv', 'bson': '.bson', 'gzip': '.gz', 'zstd': '.zst'}
+
+RELAXED_JSON = JSONOptions(json_mode=JSONMode.RELAXED)
+
+
+def compression_for(path):
+    """Compresión deducida de la extensión del fichero (.gz o .zst), o None."""
+    if path and path.endswith('.gz'):
+        return 'gzip'
+    if path and path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def format_for(path, default='jsonl'):
+    """Formato deducido de la extensión del fichero (sin contar la de compresión)."""
+    if path:
+        base = path[:-len(EXPORT_EXTENSIONS[compression_for(path)])] if compression_for(path) else path
+        for fmt in EXPORT_FORMATS:
+            if base.endswith(EXPORT_EXTENSIONS[fmt]):
+                return fmt
+    return default
+
+
+def open_binary(path, mode, compression):
+    """Abrir un fichero en modo binario, comprimido con gzip/zstd o sin comprimir."""
+    if compression == 'gzip':
+        return gzip.open(path, mode)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("La compresión zstd necesita el paquete 'zstandard' (pip install zstandard).")
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def csv_cell(value):
+    """Valor de una celda CSV: escalares como texto y objetos/arrays como JSON relajado."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json_util.dumps(value, json_options=RELAXED_JSON)
+    return str(value)
+
+
+class _CountingWriter:
+    """Destino de csv.writer que escribe en el texto y cuenta los bytes UTF-8 de lo escrito."""
+
+    def __init__(self, text):
+        self.text = text
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data.encode('utf-8'))
+        return self.text.write(data)
+
+
+class ExportJob:
+    """
+    Exporta los documentos de un filtro recorriendo un cursor por lotes (batch_size) y
+    escribiendo cada lote en cuanto llega, de modo que la memoria no depende del tamaño de
+    la colección. En BSON los documentos se copian tal cual llegan del servidor (RawBSONDocument).
+
+    Junto al fichero se guarda un punto de reanudación (<fichero>.resume) con la clave del
+    último documento escrito; una exportación interrumpida o cancelada puede continuar
+    desde ahí con resume=True añadiendo al final del fichero.
+    """
+
+    def __init__(self, collection, path, fmt='jsonl', query_filter=None, sort_column=None, sort_direction=1,
+                 columns=None, compression=None, batch_size=EXPORT_BATCH_SIZE, comment=None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de exportación no soportado: {fmt}")
+        if compression not in (None,) + EXPORT_COMPRESSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if fmt == 'csv' and not columns:
+            raise ValueError("La exportación CSV necesita la lista de columnas.")
+        self.collection = collection
+        self.path = path
+        self.fmt = fmt
+        self.query_filter = query_filter or {}
+        self.columns = list(columns) if columns else None
+        self.compression = compression
+        self.batch_size = batch_size
+        self.comment = comment
+        self.paginator = KeysetPaginator()
+        self.paginator.reset(sort_column, sort_direction)
+
+    @property
+    def checkpoint_path(self):
+        return f"{self.path}.resume" if self.path else None
+
+    def _signature(self):
+        # Lo que tiene que coincidir para poder continuar una exportación anterior
+        return {'filter': self.query_filter, 'sort': self.paginator.sort_spec(), 'format': self.fmt,
+                'compression': self.compression, 'columns': self.columns}
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            checkpoint = json_util.loads(f.read())
+        if checkpoint['signature'] != json_util.loads(json_util.dumps(self._signature())):
+            raise ValueError("El punto de reanudación corresponde a otra exportación (filtro, orden o formato distintos).")
+        return checkpoint
+
+    def _save_checkpoint(self, key, exported):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json_util.dumps({'signature': self._signature(), 'key': list(key), 'exported': exported}))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _cursor(self, checkpoint):
+        query_filter = self.query_filter
+        skip = 0
+        if checkpoint:
+            key = tuple(checkpoint['key'])
+            # Con tipos mezclados en la ordenación un rango saltaría documentos
+            mixed = self.paginator.check_types(self.collection, self.query_filter, comment=self.comment)
+            if KeysetPaginator._is_rangeable(key) and not mixed:
+                resume_range = self.paginator.range_filter(key, after=True)
+                query_filter = {'$and': [query_filter, resume_range]} if query_filter else resume_range
+            else:
+                # Sin clave comparable se continúa saltando los documentos ya exportados
+                skip = checkpoint['exported']
+        collection = self.collection
+        if self.fmt == 'bson':
+            collection = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+        cursor = collection.find(query_filter, sort=self.paginator.sort_spec(), skip=skip, batch_size=self.batch_size)
+        if self.comment:
+            cursor = cursor.comment(self.comment)
+        return cursor
+
+    def run(self, progress=None, cancel=None, resume=False):
+        """
+        Ejecutar la exportación. progress(exportados, bytes, docs/s) se llama tras cada lote;
+        cancel es un objeto con is_set() (p. ej. threading.Event) que se consulta entre documentos.
+        Devuelve un dict con 'exported', 'bytes', 'elapsed', 'rate' y 'cancelled'.
+        """
+        checkpoint = self.load_checkpoint() if resume else None
+        exported = checkpoint['exported'] if checkpoint else 0
+        mode = 'ab' if checkpoint else 'wb'
+
+        if self.path:
+            stream = open_binary(self.path, mode, self.compression)
+        else:
+            stream = sys.stdout.buffer
+        # JSON Lines se codifica aquí línea a línea; CSV pasa por el módulo csv, que escribe texto
+        text = io.TextIOWrapper(stream, encoding='utf-8', newline='') if self.fmt == 'csv' else None
+        counter = writer = None
+        if self.fmt == 'csv':
+            counter = _CountingWriter(text)
+            writer = csv.writer(counter)
+            if not checkpoint:
+                writer.writerow(self.columns)
+
+        started = time.monotonic()
+        resumed_at = exported
+        written_bytes = counter.bytes if counter else 0
+        last_key = None
+        cancelled = False
+        try:
+            for document in self._cursor(checkpoint):
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                if self.fmt == 'bson':
+                    stream.write(document.raw)
+                    written_bytes += len(document.raw)
+                elif self.fmt == 'jsonl':
+                    line = (json_util.dumps(document, json_options=RELAXED_JSON) + '\n').encode('utf-8')
+                    stream.write(line)
+                    written_bytes += len(line)
+                else:
+                    writer.writerow([csv_cell(document.get(column)) for column in self.columns])
+                    written_bytes = counter.bytes
+                exported += 1
+                last_key = self.paginator.boundary_key(document)
+
+                if exported % self.batch_size == 0 and progress:
+                    progress(exported, written_bytes, self._rate(exported - resumed_at, started))
+                if exported % EXPORT_CHECKPOINT_EVERY == 0 and self.checkpoint_path:
+                    # Se vacían los búferes antes de anotar la clave para que el fichero nunca quede por detrás
+                    if text:
+                        text.flush()
+                    stream.flush()
+                    self._save_checkpoint(last_key, exported)
+        finally:
+            if text:
+                text.flush()
+                if self.path:
+                    text.close()
+                else:
+                    text.detach()
+            elif self.path:
+                stream.close()
+            else:
+                stream.flush()
+            if self.checkpoint_path and last_key is not None:
+                self._save_checkpoint(last_key, exported)
+
+        elapsed = time.monotonic() - started
+        rate = self._rate(exported - resumed_at, started)
+        if not cancelled and self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        if progress:
+            progress(exported, written_bytes, rate)
+        return {'exported': exported, 'bytes': written_bytes, 'elapsed': elapsed, 'rate': rate, 'cancelled': cancelled}
+
+    @staticmethod
+    def _rate(documents, started):
+        # Documentos por segundo de esta ejecución (sin contar los ya exportados antes de reanudar)
+        elapsed = time.monotonic() - started
+        return documents / elapsed if elapsed else 0.0
@@ -0,0 +1,3057 @@
+"""Interfaz Tk de Mongo Explorer sobre el núcleo de acceso a datos (mongoexplorer.core)."""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from bson import json_util
+import math
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import queue
+import sys
+import threading
+import time
+
+from .core import (
+    MAX_COLUMN_WIDTH, QUERY_MAX_TIME_MS, SCHEMA_RARE_THRESHOLD, JSON_COLUMNS, DEFAULT_MONGO_URI, AGGREGATE_PREVIEW_LIMIT,
+    FIELD_STATS_SAMPLE_SIZE, FIELD_STATS_TOP,
+    KeysetPaginator, PageCache, CountCache, SchemaService, Repository, QueryHistory, summarize_explain,
+    AggregationSession, CellFormatter, FieldStatsCache, format_cell, get_clean_id, parse_filter, parse_index_keys, parse_pipeline,
+)
+from .metrics import METRICS_PERCENTILES, Metrics
+from .namespaces import NamespaceCache, fetch_namespaces
+from .profiles import READ_PREFERENCES, ProfileStore, available_compressors, client_options
+from .startup import EarlyConnection, startup_uri
+
+# --- CLASE DE CONFIGURACIÓN DE ESTILOS ---
+class StyleConfig:
+    """Define la paleta de colores y la configuración de estilos para la aplicación."""
+    
+    ROOT_BG_COLOR = '#e6f0f5'
+    BG_COLOR = '#ffffff'
+    PRIMARY_COLOR = '#60a5fa'  # Azul más claro y moderno (blue-400)
+    PRIMARY_HOVER = '#3b82f6'  # Azul hover (blue-500)
+    SECONDARY_COLOR = '#94a3b8'  # Gris slate moderno
+    SECONDARY_HOVER = '#64748b'  # Gris slate hover
+    FG_COLOR = '#1e293b'  # Texto oscuro moderno
+    TABLE_HEADER_BG = '#f1f5f9'
+    TABLE_ALT_ROW = '#f8fafc'
+    TABLE_HOVER = '#dbeafe'  # Azul muy claro para hover (blue-100)
+    TABLE_SEPARATOR = '#e2e8f0'
+
+    @staticmethod
+    def setup_modern_style(style_obj):
+        style_obj.theme_use('alt')
+        style_obj.configure('.', background=StyleConfig.BG_COLOR, foreground=StyleConfig.FG_COLOR, font=('Segoe UI', 10))
+        style_obj.map('.', background=[('disabled', StyleConfig.ROOT_BG_COLOR)]) 
+
+        style_obj.configure('TButton',
+                           font=('Segoe UI', 10, 'bold'),
+                           padding=[15, 10],
+                           relief='flat',
+                           background=StyleConfig.SECONDARY_COLOR,
+                           foreground='white',
+                           borderwidth=0,
+                           highlightthickness=0)
+        style_obj.map('TButton',
+                      background=[('active', StyleConfig.SECONDARY_HOVER), ('!disabled', StyleConfig.SECONDARY_COLOR)],
+                      foreground=[('active', 'white'), ('!disabled', 'white')])
+
+        style_obj.configure('Primary.TButton', 
+                           background=StyleConfig.PRIMARY_COLOR,
+                           foreground='white',
+                           borderwidth=0,
+                           highlightthickness=0)
+        style_obj.map('Primary.TButton',
+                      background=[('active', StyleConfig.PRIMARY_HOVER), ('!disabled', StyleConfig.PRIMARY_COLOR)],
+                      relief=[('active', 'flat'), ('!disabled', 'flat')])
+
+        style_obj.configure('TLabel', background=StyleConfig.BG_COLOR, foreground=StyleConfig.FG_COLOR, padding=2)
+        style_obj.configure('Title.TLabel', font=('Segoe UI', 11, 'bold'), background=StyleConfig.BG_COLOR)
+        style_obj.configure('TEntry',
+                           fieldbackground='white',
+                           foreground=StyleConfig.FG_COLOR,
+                           borderwidth=1,
+                           relief='solid', 
+                           padding=8)
+        style_obj.configure('TPanedwindow', background=StyleConfig.ROOT_BG_COLOR)
+        style_obj.configure('Treeview',
+                           background='white',
+                           foreground=StyleConfig.FG_COLOR,
+                           fieldbackground='white',
+                           rowheight=30,
+                           borderwidth=0,
+                           relief='flat')
+        style_obj.map('Treeview',
+                      background=[('selected', StyleConfig.PRIMARY_COLOR), ('!selected', 'white')],
+                      foreground=[('selected', 'white')])
+        style_obj.configure('Treeview.Heading',
+                           background=StyleConfig.TABLE_HEADER_BG,
+                           foreground=StyleConfig.FG_COLOR,
+                           font=('Segoe UI', 10, 'bold'),
+                           padding=[5, 10],
+                           relief='flat')
+        style_obj.configure('Nav.Treeview',
+                           background=StyleConfig.BG_COLOR,
+                           fieldbackground=StyleConfig.BG_COLOR,
+                           rowheight=25)
+        style_obj.map('Nav.Treeview',
+                      background=[('selected', StyleConfig.PRIMARY_COLOR)],
+                      foreground=[('selected', 'white')])
+        style_obj.configure('Separator.Treeview',
+                           background='white',
+                           fieldbackground='white')
+
+# --- CLASE DE EJECUCIÓN EN SEGUNDO PLANO ---
+class QueryTicket:
+    """Identifica una petición en curso: canal, generación y comentario con el que se etiqueta en el servidor."""
+
+    def __init__(self, request_id, channel, generation, client=None, silent=False):
+        self.request_id = request_id
+        self.channel = channel
+        self.generation = generation
+        self.client = client
+        self.silent = silent  # Las precargas no encienden el indicador de actividad
+        self.comment = f"mongoexplorer:{request_id}"
+        self.max_time_ms = QUERY_MAX_TIME_MS
+        self.cancelled = False
+
+    def options(self):
+        """Opciones de servidor (maxTimeMS y comentario) para las llamadas del núcleo."""
+        return {'max_time_ms': self.max_time_ms, 'comment': self.comment}
+
+
+class QueryExecutor:
+    """
+    Ejecuta las operaciones de MongoDB en un pool de hilos y devuelve los resultados al
+    bucle de Tk mediante after(), de forma que la ventana nunca se bloquea.
+    Cada canal ('documents', 'dbs', ...) lleva un contador de generación: al lanzar una
+    petición nueva en el mismo canal, los resultados de las anteriores se descartan.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, root, max_workers=4, on_busy_change=None):
+        self.root = root
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mongo-io')
+        self.results = queue.Queue()
+        self.generations = {}
+        self.in_flight = {}
+        self.counter = itertools.count(1)
+        self.on_busy_change = on_busy_change
+        self.root.after(self.POLL_MS, self._poll)
+
+    def submit(self, channel, func, on_success=None, on_error=None, client=None, silent=False):
+        """
+        Lanza func(ticket) en un hilo del pool. on_success(resultado) u on_error(excepción)
+        se llaman en el hilo de Tk solo si la petición sigue siendo la última de su canal.
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        ticket = QueryTicket(next(self.counter), channel, generation, client, silent)
+        self.in_flight[ticket.request_id] = ticket
+        self._notify_busy()
+        self.pool.submit(self._run, ticket, func, on_success, on_error)
+        return ticket
+
+    def _run(self, ticket, func, on_success, on_error):
+        try:
+            self.results.put((ticket, on_success, func(ticket)))
+        except Exception as e:
+            self.results.put((ticket, on_error or self._default_error, e))
+
+    @staticmethod
+    def _default_error(error):
+        messagebox.showerror("Error", f"Fallo en la operación con MongoDB: {error}")
+
+    def supersede(self, channel):
+        """Invalidar las peticiones pendientes de un canal cuyo resultado ya se ha obtenido por otra vía."""
+        self.generations[channel] = self.generations.get(channel, 0) + 1
+
+    def is_current(self, ticket):
+        return not ticket.cancelled and self.generations.get(ticket.channel) == ticket.generation
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    ticket, callback, payload = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.in_flight.pop(ticket.request_id, None)
+                if callback and self.is_current(ticket):
+                    callback(payload)
+        finally:
+            self._notify_busy()
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _notify_busy(self):
+        if self.on_busy_change:
+            self.on_busy_change(sum(1 for t in self.in_flight.values() if not t.cancelled and not t.silent))
+
+    def cancel_all(self):
+        """Descarta las peticiones en curso y mata en el servidor las operaciones que las atienden."""
+        tickets = [t for t in self.in_flight.values() if not t.cancelled]
+        for ticket in tickets:
+            ticket.cancelled = True
+        self._notify_busy()
+        # Hilo aparte: los hilos del pool pueden estar todos ocupados precisamente por esas operaciones
+        threading.Thread(target=self._kill_server_ops, args=(tickets,), daemon=True).start()
+
+    @staticmethod
+    def _kill_server_ops(tickets):
+        for ticket in tickets:
+            if ticket.client is None:
+                continue
+            try:
+                current = ticket.client.admin.command('currentOp', **{'$or': [
+                    {'command.comment': ticket.comment},
+                    {'cursor.originatingCommand.comment': ticket.comment},
+                ]})
+                for op in current.get('inprog', []):
+                    ticket.client.admin.command('killOp', op=op['opid'])
+            except Exception:
+                # Sin permisos de killOp la operación acabará igualmente por maxTimeMS
+                pass
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pool.shutdown(wait=False)
+
+# --- CLASE DEL PANEL DE NAVEGACIÓN (DBs y Collections) ---
+class NavigationPanel(ttk.Frame):
+    """
+    Árbol de bases de datos y colecciones con sus estadísticas. Se pinta al instante con la
+    caché de la última sesión (NamespaceCache) y se revalida en segundo plano; el filtro
+    oculta y recoloca los nodos existentes en lugar de volver a crearlos.
+    """
+
+    FILTER_DELAY_MS = 150  # Espera tras la última tecla antes de aplicar el filtro
+    REVALIDATE_POLL_MS = 100
+
+    def __init__(self, parent, app_instance):
+        super().__init__(parent, width=280, style='TFrame')
+        self.app = app_instance
+        self.repository = None
+        self.cache = NamespaceCache()
+        self.db_items = {}  # base de datos -> iid
+        self.collection_items = {}  # base de datos -> {colección -> iid}
+        self.visible = {}  # base de datos -> colecciones que pasan el filtro, en orden
+        self.filter_text = ""
+        self.filter_job = None
+        self.shown_uri = None  # URI cuyo árbol se está mostrando
+        self.pack(fill='y', expand=False)
+        self.create_widgets()
+
+    def create_widgets(self):
+        ttk.Label(self, text="Bases de Datos y Colecciones", style='Title.TLabel').pack(fill='x', padx=10, pady=(10, 5))
+
+        filter_frame = ttk.Frame(self, style='TFrame')
+        filter_frame.pack(fill='x', padx=10, pady=(0, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.schedule_filter())
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        filter_entry.pack(side='left', fill='x', expand=True)
+        filter_entry.bind('<Escape>', lambda e: self.filter_var.set(""))
+        ttk.Button(filter_frame, text="⟳", width=3, command=lambda: self.revalidate(force=True)).pack(side='right', padx=(5, 0))
+
+        self.nav_tree = ttk.Treeview(self, columns=('type', 'stats'), displaycolumns=('stats',), show='tree', style='Nav.Treeview')
+        self.nav_tree.heading('#0', text='Recurso')
+        self.nav_tree.column('stats', width=150, stretch=False, anchor='e')
+        self.nav_tree.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+
+        self.nav_tree.bind('<<TreeviewOpen>>', self.on_tree_expand)
+        self.nav_tree.bind('<<TreeviewSelect>>', self.on_nav_select)
+        self.nav_tree.bind('<F5>', lambda e: self.revalidate(force=True))
+
+        nav_v_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.nav_tree.yview)
+        nav_v_scrollbar.pack(side='right', fill='y')
+        self.nav_tree.configure(yscrollcommand=nav_v_scrollbar.set)
+
+    def set_repository(self, repository):
+        self.repository = repository
+        self.load_dbs()
+
+    def show_cached(self, uri):
+        """Pintar el árbol guardado de la URI sin esperar a la conexión."""
+        for item in self.nav_tree.get_children():
+            self.nav_tree.delete(item)
+        self.db_items = {}
+        self.collection_items = {}
+        self.visible = {}
+        self.shown_uri = uri
+
+        cached = self.cache.databases(uri)
+        for db_name in sorted(cached):
+            self._show_database(db_name, cached[db_name])
+        self._order_databases()
+
+    def load_dbs(self):
+        """Mostrar lo que hay en la caché para esta URI (si no está ya a la vista) y revalidarlo en segundo plano."""
+        if not self.repository: return
+        if self.shown_uri != self.repository.uri:
+            self.show_cached(self.repository.uri)
+        self.revalidate()
+
+    def revalidate(self, force=False, db_names=None):
+        """
+        Volver a pedir colecciones y estadísticas: de db_names o, si no se indican, de todas las
+        bases de datos menos las que la caché tiene como recientes (todas con force). Cada base de
+        datos se actualiza en el árbol en cuanto llega.
+        """
+        if not self.repository: return
+        repository = self.repository
+        uri = repository.uri
+        skip = () if force or db_names is not None else self.cache.fresh(uri)
+        arrived = queue.Queue()
+        channel = 'dbs' if db_names is None else f"collections:{','.join(db_names)}"
+
+        def apply_arrived():
+            changed = False
+            while True:
+                try:
+                    db_name, entry = arrived.get_nowait()
+                except queue.Empty:
+                    break
+                self.cache.put(uri, db_name, entry)
+                if repository is self.repository:
+                    self._show_database(db_name, entry)
+                    changed = True
+            if changed:
+                self._order_databases()
+
+        def poll():
+            if state['done'] or not self.app.executor.is_current(state['ticket']): return
+            apply_arrived()
+            self.after(self.REVALIDATE_POLL_MS, poll)
+
+        def on_done(listed):
+            state['done'] = True
+            apply_arrived()
+            if db_names is None:
+                self.cache.retain(uri, listed)
+                if repository is self.repository:
+                    for db_name in set(self.db_items) - set(listed):
+                        self._forget_database(db_name)
+                    self._order_databases()
+            try:
+                self.cache.save()
+            except OSError:
+                # Sin caché en disco el árbol funciona igual; solo tarda más en aparecer la próxima vez
+                pass
+
+        def on_error(e):
+            state['done'] = True
+            messagebox.showerror("Error al cargar DBs", f"Fallo al cargar bases de datos y colecciones: {e}")
+
+        state = {'done': False}
+        state['ticket'] = self.app.executor.submit(
+            channel,
+            lambda ticket: fetch_namespaces(repository, db_names, skip, on_database=lambda *item: arrived.put(item)),
+            on_success=on_done, on_error=on_error, client=repository.client,
+            silent=bool(self.db_items))
+        poll()
+
+    def _show_database(self, db_name, entry):
+        """Crear o actualizar en su sitio el nodo de la base de datos y los de sus colecciones."""
+        db_id = self.db_items.get(db_name)
+        if db_id is None:
+            db_id = self.nav_tree.insert('', 'end', text=db_name, values=('db', ''))
+            self.db_items[db_name] = db_id
+            self.collection_items[db_name] = {}
+        self.nav_tree.set(db_id, 'stats', database_label(entry['stats']))
+
+        items = self.collection_items[db_name]
+        for name in set(items) - set(entry['collections']):
+            self.nav_tree.delete(items.pop(name))
+        for name, stats in entry['collections'].items():
+            if name in items:
+                self.nav_tree.set(items[name], 'stats', collection_label(stats))
+            else:
+                collection_id = self.nav_tree.insert(db_id, 'end', text=name, values=('collection', collection_label(stats)))
+                self.nav_tree.insert(collection_id, 'end', text='Cargando Índices...', values=('placeholder', ''))
+                items[name] = collection_id
+        self.visible.pop(db_name, None)
+        self._filter_database(db_name, self._filter_terms())
+
+    def _forget_database(self, db_name):
+        self.nav_tree.delete(self.db_items.pop(db_name))
+        self.collection_items.pop(db_name, None)
+        self.visible.pop(db_name, None)
+
+    def _order_databases(self):
+        """Colocar las bases de datos visibles por orden alfabético (las que no pasan el filtro quedan separadas)."""
+        terms = self._filter_terms()
+        shown = [self.db_items[name] for name in sorted(self.db_items)
+                 if not terms or self._matches(name, terms) or self.visible.get(name)]
+        self.nav_tree.set_children('', *shown)
+
+    # --- Filtro incremental ---
+    def schedule_filter(self):
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(self.FILTER_DELAY_MS, self.apply_filter)
+
+    def _filter_terms(self):
+        return self.filter_text.split()
+
+    @staticmethod
+    def _matches(name, terms):
+        name = name.lower()
+        return all(term in name for term in terms)
+
+    def apply_filter(self):
+        """
+        Mostrar solo las colecciones cuyo nombre (o el de su base de datos) contiene todos los
+        términos escritos. Si el texto nuevo amplía el anterior solo se examinan las que ya eran
+        visibles; los nodos se reenganchan con set_children, sin borrarlos ni crearlos.
+        """
+        self.filter_job = None
+        previous = self.filter_text
+        self.filter_text = self.filter_var.get().strip().lower()
+        narrowing = bool(previous) and self.filter_text.startswith(previous)
+        terms = self._filter_terms()
+        for db_name in self.db_items:
+            self._filter_database(db_name, terms, narrowing)
+        self._order_databases()
+        if terms:
+            # Se despliegan las bases de datos con coincidencias para verlas sin más clics
+            for db_name, names in self.visible.items():
+                if names and not self._matches(db_name, terms):
+                    self.nav_tree.item(self.db_items[db_name], open=True)
+
+    def _filter_database(self, db_name, terms, narrowing=False):
+        items = self.collection_items.get(db_name)
+        if not items:
+            return
+        if not terms or self._matches(db_name, terms):
+            names = sorted(items)
+        else:
+            candidates = self.visible[db_name] if narrowing and db_name in self.visible else sorted(items)
+            names = [name for name in candidates if self._matches(name, terms)]
+        if self.visible.get(db_name) != names:
+            self.nav_tree.set_children(self.db_items[db_name], *(items[name] for name in names))
+            self.visible[db_name] = names
+
+    def on_tree_expand(self, event):
+        # <<TreeviewOpen>> se refiere al item con el foco, que no tiene por qué estar seleccionado
+        selected_item = self.nav_tree.focus()
+        if not selected_item: return
+        item_type = self.nav_tree.set(selected_item, 'type')
+
+        if item_type == 'db':
+            # Las colecciones ya están a la vista; solo se vuelven a pedir si la caché es antigua
+            db_name = self.nav_tree.item(selected_item, 'text')
+            if self.repository and db_name not in self.cache.fresh(self.repository.uri):
+                self.revalidate(db_names=[db_name])
+        elif item_type == 'collection':
+            children = self.nav_tree.get_children(selected_item)
+            if children and self.nav_tree.set(children[0], 'type') == 'placeholder':
+                self.load_indexes(selected_item)
+
+    def on_nav_select(self, event):
+        if not self.nav_tree.selection(): return
+
+        selected_item = self.nav_tree.selection()[0]
+        item_type = self.nav_tree.set(selected_item, 'type')
+
+        # Con el árbol de la caché a la vista la conexión puede no haber terminado aún
+        if item_type == 'collection' and self.repository:
+            parent_id = self.nav_tree.parent(selected_item)
+            db_name = self.nav_tree.item(parent_id, 'text')
+            collection_name = self.nav_tree.item(selected_item, 'text')
+            self.app.load_collection_data(db_name, collection_name)
+
+    def load_indexes(self, collection_id):
+        """Mostrar bajo la colección sus índices con claves, tamaño y número de accesos."""
+        if not self.repository: return
+
+        db_name = self.nav_tree.item(self.nav_tree.parent(collection_id), 'text')
+        collection_name = self.nav_tree.item(collection_id, 'text')
+        repository = self.repository
+
+        def show_indexes(indexes):
+            if not self.nav_tree.exists(collection_id): return
+            for child in self.nav_tree.get_children(collection_id):
+                self.nav_tree.delete(child)
+            for index in indexes:
+                self.nav_tree.insert(collection_id, 'end', text=index_label(index), values=('index',))
+
+        self.app.executor.submit(f'indexes:{db_name}.{collection_name}',
+                                 lambda ticket: repository.list_indexes(db_name, collection_name),
+                                 on_success=show_indexes,
+                                 on_error=lambda e: messagebox.showerror("Error al cargar Índices", f"Fallo al cargar los índices de {collection_name}: {e}"),
+                                 client=repository.client)
+
+    def refresh_indexes(self, db_name, collection_name):
+        """Recargar los índices de una colección si su nodo está desplegado en el árbol."""
+        collection_id = self.collection_items.get(db_name, {}).get(collection_name)
+        if collection_id is not None and self.nav_tree.item(collection_id, 'open'):
+            self.load_indexes(collection_id)
+
+def format_bytes(size):
+    if size is None:
+        return "?"
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_count(count):
+    if count is None:
+        return "?"
+    for unit in ('', 'k', 'M'):
+        if count < 1000 or unit == 'M':
+            return f"{count:.0f}" if not unit else f"{count:.1f}{unit}"
+        count /= 1000
+
+def collection_label(stats):
+    if not stats:
+        return ""
+    return f"{format_count(stats['count'])} docs · {format_bytes(stats['storage'])} · {stats['indexes']} idx"
+
+def database_label(stats):
+    if not stats:
+        return ""
+    return f"{stats['collections']} col · {format_bytes(stats['storage'])}"
+
+def index_label(index):
+    keys = ", ".join(f"{field}: {kind}" for field, kind in index['key'])
+    ops = "?" if index['ops'] is None else index['ops']
+    return f"⚿ {index['name']}  {{{keys}}}  {format_bytes(index['size'])}  {ops} accesos"
+
+# --- CLASE DE TABLA VIRTUALIZADA ---
+class VirtualTreeview(ttk.Treeview):
+    """
+    Treeview virtualizado: los documentos viven en un buffer de Python y solo existen
+    tantos items (slots) como filas caben en pantalla. Al desplazarse se reutilizan los
+    slots cambiando sus valores, y cada fila se formatea la primera vez que se ve, así que
+    el coste de pintar no depende del número de documentos cargados. El formatter
+    (CellFormatter) recuerda las celdas de cada documento entre páginas.
+    """
+
+    ROW_HEIGHT = 30
+    DEFAULT_HEADER_HEIGHT = 40
+
+    def __init__(self, master, row_key, formatter=None, metrics=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_key = row_key
+        self.formatter = formatter if formatter is not None else CellFormatter()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.docs = []
+        self.row_columns = ()
+        self.value_cache = {}
+        self.key_cache = {}
+        self.top = 0
+        self.slots = []
+        self.selected_rows = set()
+        self.extend_selection = False
+        self.hover_slot = None
+        self.header_height = None
+        self.yscroll_callback = None
+
+        self.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        self.bind('<ButtonPress-1>', self._on_press, add='+')
+        self.bind('<MouseWheel>', lambda e: self.scroll_rows(-3 if e.delta > 0 else 3), add='+')
+        self.bind('<Button-4>', lambda e: self.scroll_rows(-3), add='+')
+        self.bind('<Button-5>', lambda e: self.scroll_rows(3), add='+')
+        self.bind('<Up>', lambda e: self._move_focus(-1))
+        self.bind('<Down>', lambda e: self._move_focus(1))
+        self.bind('<Prior>', lambda e: self._move_focus(-max(1, len(self.slots) - 1)))
+        self.bind('<Next>', lambda e: self._move_focus(max(1, len(self.slots) - 1)))
+        self.bind('<Home>', lambda e: self._move_focus(-len(self.docs)))
+        self.bind('<End>', lambda e: self._move_focus(len(self.docs)))
+        self.bind('<Control-a>', self.select_all)
+
+    # --- Buffer de filas ---
+    def set_rows(self, docs, columns):
+        """Sustituir el contenido de la tabla por los documentos indicados."""
+        self.docs = docs
+        self.row_columns = tuple(columns)
+        self.value_cache = {}
+        self.key_cache = {}
+        self.top = 0
+        self.selected_rows = set()
+        self.sync_viewport()
+
+    def row_count(self):
+        return len(self.docs)
+
+    def row_id(self, index):
+        """Clave (iid lógico) de la fila del buffer."""
+        if index not in self.key_cache:
+            self.key_cache[index] = self.row_key(self.docs[index])
+        return self.key_cache[index]
+
+    def row_values(self, index):
+        values = self.value_cache.get(index)
+        if values is None:
+            values = self.formatter.row(self.docs[index], self.row_columns)
+            self.value_cache[index] = values
+        return values
+
+    def row_index_for_slot(self, slot):
+        return self.top + self.slots.index(slot) if slot in self.slots else None
+
+    def row_id_for_slot(self, slot):
+        index = self.row_index_for_slot(slot)
+        return self.row_id(index) if index is not None else None
+
+    def selected_row_ids(self):
+        return [self.row_id(index) for index in sorted(self.selected_rows)]
+
+    def row_index(self, key):
+        """Posición en el buffer de la fila con esa clave, o None si no está en la página."""
+        for index in range(len(self.docs)):
+            if self.row_id(index) == key:
+                return index
+        return None
+
+    def row_doc_id(self, index):
+        """_id nativo de la fila, tal y como llegó del servidor: las consultas por fila lo usan sin reinterpretarlo."""
+        return self.docs[index]['_id']
+
+    def doc_id_for_slot(self, slot):
+        index = self.row_index_for_slot(slot)
+        return self.row_doc_id(index) if index is not None else None
+
+    def selected_doc_ids(self):
+        return [self.row_doc_id(index) for index in sorted(self.selected_rows)]
+
+    # --- Viewport ---
+    def visible_capacity(self):
+        height = self.winfo_height()
+        if height <= 1:
+            return 20  # Aún no se ha dibujado
+        if self.header_height is None and self.slots:
+            bbox = self.bbox(self.slots[0])
+            if bbox:
+                self.header_height = bbox[1]
+        header = self.header_height or self.DEFAULT_HEADER_HEIGHT
+        return max(1, (height - header) // self.ROW_HEIGHT)
+
+    def sync_viewport(self):
+        """Crear o eliminar slots para que haya exactamente los que caben en pantalla."""
+        needed = min(self.visible_capacity(), len(self.docs))
+        if needed != len(self.slots):
+            with self.metrics.phase('slots'):
+                while len(self.slots) < needed:
+                    slot = f"slot{len(self.slots)}"
+                    self.insert('', 'end', iid=slot)
+                    self.slots.append(slot)
+                while len(self.slots) > needed:
+                    self.delete(self.slots.pop())
+        self.top = max(0, min(self.top, len(self.docs) - len(self.slots)))
+        self.refresh()
+
+    def refresh(self):
+        """Volcar en los slots las filas del buffer que están en el viewport."""
+        # Formato (Python) y volcado en el Treeview (Tcl) se miden por separado
+        with self.metrics.phase('formato'):
+            rows = [self.row_values(self.top + i) for i in range(len(self.slots))]
+        with self.metrics.phase('volcado'):
+            for i, slot in enumerate(self.slots):
+                index = self.top + i
+                tags = ['oddrow' if index % 2 != 0 else 'separator']
+                if slot == self.hover_slot:
+                    tags.append('hover')
+                self.item(slot, values=rows[i], tags=tags)
+
+        wanted = [self.slots[i - self.top] for i in self.selected_rows if self.top <= i < self.top + len(self.slots)]
+        if set(self.selection()) != set(wanted):
+            self.selection_set(wanted)
+
+        if self.yscroll_callback:
+            total = len(self.docs)
+            if total:
+                self.yscroll_callback(self.top / total, (self.top + len(self.slots)) / total)
+            else:
+                self.yscroll_callback(0.0, 1.0)
+
+    def scroll_rows(self, delta):
+        top = max(0, min(self.top + delta, len(self.docs) - len(self.slots)))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+        return 'break'
+
+    def yview(self, *args):
+        """Implementación de yview sobre el buffer para la barra de desplazamiento vertical."""
+        total = len(self.docs)
+        if not args:
+            return (self.top / total, (self.top + len(self.slots)) / total) if total else (0.0, 1.0)
+        if args[0] == 'moveto':
+            return self.scroll_rows(int(float(args[1]) * total) - self.top)
+        if args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, len(self.slots) - 1)
+            return self.scroll_rows(amount)
+
+    # --- Selección ---
+    def _on_press(self, event):
+        # Ctrl (0x4) o Mayús (0x1) amplían la selección; un clic normal la sustituye
+        self.extend_selection = bool(event.state & 0x0005)
+
+    def _on_select(self, event=None):
+        visible = range(self.top, self.top + len(self.slots))
+        chosen = {self.top + self.slots.index(slot) for slot in self.selection() if slot in self.slots}
+        if chosen == {i for i in self.selected_rows if i in visible}:
+            return  # Cambio provocado por refresh()
+        if self.extend_selection:
+            self.selected_rows = {i for i in self.selected_rows if i not in visible} | chosen
+        else:
+            self.selected_rows = chosen
+        self.extend_selection = False
+
+    def apply_changes(self, changes, capacity):
+        """
+        Aplicar en el sitio cambios de un change stream ({clave de fila: ('upsert'|'delete', doc)}):
+        se reemplazan o quitan las filas existentes y los documentos nuevos se añaden al final
+        mientras quepan en la página. Devuelve cuántos documentos nuevos no cabían.
+        """
+        positions = {self.row_id(i): i for i in range(len(self.docs))}
+        removed = set()
+        new_docs = []
+        for key, (kind, doc) in changes.items():
+            index = positions.get(key)
+            if kind == 'delete':
+                if index is not None:
+                    removed.add(index)
+            elif index is not None:
+                self.docs[index] = doc
+                self.value_cache.pop(index, None)
+            else:
+                new_docs.append((key, doc))
+
+        if removed:
+            kept = [i for i in range(len(self.docs)) if i not in removed]
+            renumber = {old: new for new, old in enumerate(kept)}
+            self.docs = [self.docs[i] for i in kept]
+            self.value_cache = {renumber[i]: v for i, v in self.value_cache.items() if i in renumber}
+            self.key_cache = {renumber[i]: k for i, k in self.key_cache.items() if i in renumber}
+            self.selected_rows = {renumber[i] for i in self.selected_rows if i in renumber}
+
+        room = max(0, capacity - len(self.docs))
+        for key, doc in new_docs[:room]:
+            self.key_cache[len(self.docs)] = key
+            self.docs.append(doc)
+
+        self.sync_viewport()
+        return len(new_docs) - min(room, len(new_docs))
+
+    def backfill(self, doc, at_start=False):
+        """
+        Añadir una fila al final (o al principio) del buffer, p. ej. para rellenar la página tras
+        un borrado. Al añadirla al principio se renumeran las cachés y la selección y se conserva
+        a la vista el mismo tramo de filas.
+        """
+        if not at_start:
+            self.docs.append(doc)
+        else:
+            self.docs.insert(0, doc)
+            self.value_cache = {i + 1: v for i, v in self.value_cache.items()}
+            self.key_cache = {i + 1: k for i, k in self.key_cache.items()}
+            self.selected_rows = {i + 1 for i in self.selected_rows}
+            if self.top:
+                self.top += 1
+        self.sync_viewport()
+
+    def select_all(self, event=None):
+        """Seleccionar todas las filas del buffer, no solo las visibles."""
+        self.selected_rows = set(range(len(self.docs)))
+        self.refresh()
+        return 'break'
+
+    def _move_focus(self, delta):
+        if not self.docs:
+            return 'break'
+        focused = self.focus()
+        current = self.row_index_for_slot(focused) if focused else None
+        target = max(0, min((self.top if current is None else current) + delta, len(self.docs) - 1))
+        if target < self.top:
+            self.top = target
+        elif target >= self.top + len(self.slots):
+            self.top = target - len(self.slots) + 1
+        self.selected_rows = {target}
+        self.refresh()
+        self.focus(self.slots[target - self.top])
+        self.event_generate('<<TreeviewSelect>>')
+        return 'break'
+
+# --- CLASE DEL PANEL DE DATOS (Filtro, Tabla, Paginación) ---
+class DataPanel(ttk.Frame):
+    def __init__(self, parent, app_instance):
+        super().__init__(parent, style='TFrame')
+        self.app = app_instance
+        self.pack(fill='both', expand=True)
+        self.create_widgets()
+        self.column_resize_start_x = None
+        self.resizing_column = None
+
+    def create_widgets(self):
+        filter_frame = ttk.Frame(self, padding="5", style='TFrame')
+        filter_frame.pack(fill='x', expand=False)
+
+        ttk.Label(filter_frame, text="Filtro JSON extendido (ej. {\"id.type\": \"Device\"}):").pack(side='left', padx=5)
+        self.filter_entry = ttk.Entry(filter_frame, textvariable=self.app.current_filter, width=50, style='TEntry')
+        self.filter_entry.pack(side='left', fill='x', expand=True, padx=5)
+        ttk.Button(filter_frame, text="⚡ Aplicar Filtro", command=self.app.apply_filter, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(filter_frame, text="🔍 Explain", command=self.app.open_explain_dialog, style='TButton').pack(side='left', padx=5)
+        ttk.Button(filter_frame, text="∑ Agregación", command=self.app.open_aggregation_dialog, style='TButton').pack(side='left', padx=5)
+        ttk.Checkbutton(filter_frame, text="Vista previa ligera", variable=self.app.preview_mode,
+                        command=self.app.apply_preview_mode).pack(side='left', padx=5)
+        ttk.Checkbutton(filter_frame, text="● En vivo", variable=self.app.live_mode,
+                        command=self.app.toggle_live).pack(side='left', padx=5)
+
+        self.data_label = ttk.Label(self, text="Selecciona una colección para ver los datos.", style='Title.TLabel')
+        self.data_label.pack(fill='x', padx=10, pady=5)
+
+        table_frame = ttk.Frame(self, style='TFrame')
+        table_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.canvas = tk.Canvas(table_frame, background='white', highlightthickness=0)
+        self.canvas.pack(side='top', fill='both', expand=True)
+
+        self.data_tree = VirtualTreeview(self.canvas, row_key=lambda doc: json_util.dumps(doc.get('_id')),
+                                         metrics=self.app.metrics, show='headings', style='Separator.Treeview')
+        self.data_tree_window = self.canvas.create_window((0, 0), window=self.data_tree, anchor='nw')
+        self.data_tree.bind('<Double-1>', self.app.on_cell_double_click)
+        self.data_tree.bind('<Motion>', self.on_motion)
+        self.data_tree.bind('<Leave>', self.on_leave)
+        self.data_tree.bind('<Configure>', self.update_canvas)
+        self.canvas.bind('<Configure>', self.update_canvas)
+
+        # Bindings for column resizing
+        self.data_tree.bind('<Button-1>', self.start_column_resize, add='+')
+        self.data_tree.bind('<B1-Motion>', self.resize_column)
+        self.data_tree.bind('<ButtonRelease-1>', self.stop_column_resize)
+        self.data_tree.bind('<Button-3>', self.show_heading_menu)
+
+        # La barra vertical recorre el buffer de filas, no los items del Treeview
+        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.data_tree.yview)
+        v_scrollbar.pack(side='right', fill='y')
+        self.data_tree.yscroll_callback = v_scrollbar.set
+
+        h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.data_tree.xview)
+        h_scrollbar.pack(side='bottom', fill='x')
+        self.data_tree.configure(xscrollcommand=h_scrollbar.set)
+
+        op_frame = ttk.Frame(self, padding="5", style='TFrame')
+        op_frame.pack(fill='x', expand=False)
+
+        ttk.Label(op_frame, text="Doc. por página:").pack(side='left', padx=(20, 5))
+        self.page_size_combo = ttk.Combobox(op_frame,
+                                            textvariable=self.app.page_size,
+                                            values=[20, 50, 100, 500, 1000, 5000, 10000, 50000],
+                                            width=6,
+                                            state="readonly",
+                                            style='TCombobox')
+        self.page_size_combo.pack(side='left', padx=5)
+        self.page_size_combo.bind('<<ComboboxSelected>>', lambda e: self.app.apply_page_size())
+
+        ttk.Button(op_frame, text="✎ Ver/Editar", command=self.app.open_document_op, style='Primary.TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="✖ Eliminar", command=self._delete_document_wrapper, style='TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="⚙ Masivo", command=self.app.open_bulk_dialog, style='TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="☰ Columnas", command=self.app.open_columns_dialog, style='TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="⚿ Índices", command=self.app.open_indexes_dialog, style='TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="⇩ Exportar", command=self.app.open_export_dialog, style='TButton').pack(side='left', padx=10)
+        ttk.Button(op_frame, text="⇧ Importar", command=self.app.open_import_dialog, style='TButton').pack(side='left', padx=10)
+
+        self.page_info_label = ttk.Label(op_frame, textvariable=self.app.page_info_text)
+        self.page_info_label.pack(side='right', padx=5)
+
+        ttk.Button(op_frame, text="⏭", command=lambda: self.app.change_page(KeysetPaginator.LAST)).pack(side='right', padx=5)
+        ttk.Button(op_frame, text="►", command=lambda: self.app.change_page(KeysetPaginator.NEXT)).pack(side='right', padx=5)
+        ttk.Button(op_frame, text="◄", command=lambda: self.app.change_page(KeysetPaginator.PREV)).pack(side='right', padx=5)
+        ttk.Button(op_frame, text="⏮", command=lambda: self.app.change_page(KeysetPaginator.FIRST)).pack(side='right', padx=5)
+
+        self.last_hovered = None
+        self.horizontal_lines = []
+        self.lines_geometry = None
+
+    def update_canvas(self, event=None):
+        """Actualizar el tamaño del Treeview para ocupar todo el canvas."""
+        self.canvas.itemconfig(self.data_tree_window, width=self.canvas.winfo_width(), height=self.canvas.winfo_height())
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.data_tree.sync_viewport()
+        self.draw_horizontal_lines()
+
+    def draw_horizontal_lines(self):
+        """
+        Dibujar líneas horizontales entre las filas visibles. Las líneas pertenecen al viewport,
+        no a las filas: se reutilizan y solo se recolocan cuando cambia el tamaño de la tabla.
+        """
+        row_height = VirtualTreeview.ROW_HEIGHT
+        num_rows = len(self.data_tree.slots)
+        needed = num_rows + 1 if num_rows else 0
+        canvas_width = self.canvas.winfo_width()
+
+        if (needed, canvas_width) == self.lines_geometry:
+            return
+        self.lines_geometry = (needed, canvas_width)
+
+        with self.app.metrics.phase('separadores'):
+            while len(self.horizontal_lines) > needed:
+                self.canvas.delete(self.horizontal_lines.pop())
+            for i in range(needed):
+                y = i * row_height
+                if i < len(self.horizontal_lines):
+                    self.canvas.coords(self.horizontal_lines[i], 0, y, canvas_width, y)
+                else:
+                    line = self.canvas.create_line(0, y, canvas_width, y, fill=StyleConfig.TABLE_SEPARATOR, width=1)
+                    self.horizontal_lines.append(line)
+
+    def start_column_resize(self, event):
+        """Iniciar el redimensionamiento de una columna al hacer clic en el borde del encabezado."""
+        region = self.data_tree.identify_region(event.x, event.y)
+        if region == 'separator':
+            self.resizing_column = self.data_tree.identify_column(event.x)
+            self.column_resize_start_x = event.x
+            self.data_tree.config(cursor="sb_h_double_arrow")
+
+    def resize_column(self, event):
+        """Ajustar el ancho de la columna mientras se arrastra el ratón."""
+        if self.resizing_column and self.column_resize_start_x is not None:
+            delta = event.x - self.column_resize_start_x
+            current_width = self.data_tree.column(self.resizing_column, 'width')
+            new_width = max(60, current_width + delta)  # Ancho mínimo de 60 píxeles
+            self.data_tree.column(self.resizing_column, width=new_width)
+            self.column_resize_start_x = event.x
+
+    def stop_column_resize(self, event):
+        """Finalizar el redimensionamiento de la columna."""
+        self.resizing_column = None
+        self.column_resize_start_x = None
+        self.data_tree.config(cursor="")
+
+    def on_motion(self, event):
+        """Handle mouse motion to highlight the row under the cursor."""
+        item = self.data_tree.identify_row(event.y)
+        if item and item != self.last_hovered:
+            if self.last_hovered:
+                tags = list(self.data_tree.item(self.last_hovered, 'tags'))
+                if 'hover' in tags:
+                    tags.remove('hover')
+                    self.data_tree.item(self.last_hovered, tags=tags)
+            self.data_tree.item(item, tags=list(self.data_tree.item(item, 'tags')) + ['hover'])
+            self.last_hovered = item
+            self.data_tree.hover_slot = item
+            self.data_tree.tag_configure('hover', background=StyleConfig.TABLE_HOVER)
+
+    def on_leave(self, event):
+        """Remove hover effect when mouse leaves the treeview."""
+        if self.last_hovered:
+            tags = list(self.data_tree.item(self.last_hovered, 'tags'))
+            if 'hover' in tags:
+                tags.remove('hover')
+                self.data_tree.item(self.last_hovered, tags=tags)
+            self.last_hovered = None
+            self.data_tree.hover_slot = None
+
+    def show_heading_menu(self, event):
+        """Menú contextual de un encabezado: ordenar por la columna o calcular sus estadísticas en el servidor."""
+        if self.data_tree.identify_region(event.x, event.y) != 'heading': return
+        columns = self.data_tree['columns']
+        index = int(self.data_tree.identify_column(event.x).replace('#', '')) - 1
+        if not 0 <= index < len(columns): return
+        column = columns[index]
+
+        menu = tk.Menu(self, tearoff=0)
+        menu.add_command(label=f"↕ Ordenar por {column}", command=lambda: self.app.toggle_sort(column),
+                         state='disabled' if self.app.aggregation else 'normal')
+        menu.add_command(label=f"📈 Estadísticas de {column}", command=lambda: self.app.open_field_stats_dialog(column))
+        menu.tk_popup(event.x_root, event.y_root)
+
+    def _delete_document_wrapper(self):
+        """Wrapper para llamar al método de eliminación de la aplicación principal."""
+        self.app.delete_document_op()
+
+# --- CLASE PRINCIPAL DE LA APLICACIÓN ---
+class MongoExplorerApp(tk.Tk):
+    def __init__(self, uri=None, early_connection=None):
+        super().__init__()
+        self.title("Mongo Explorer (K8s Ready) - Modern UI")
+        self.geometry("1200x800")
+        self.minsize(900, 600)
+
+        # Variables de estado
+        self.mongo_uri = tk.StringVar(value=uri or DEFAULT_MONGO_URI)
+        self.current_filter = tk.StringVar()
+        self.page_size = tk.IntVar(value=20)
+        self.preview_mode = tk.BooleanVar(value=True)  # Resumir en el servidor los valores grandes de la tabla
+        self.live_mode = tk.BooleanVar(value=False)  # Seguir los cambios de la colección con un change stream
+        self.page_info_text = tk.StringVar(value="Página 1")
+        
+        self.repository = None
+        self.client = None
+        self.current_db_name = None
+        self.current_collection_name = None
+        self.session = None  # QuerySession de la colección abierta
+        self.aggregation = None  # AggregationSession cuyos resultados ocupan la tabla (None = modo consulta)
+        self.pipeline_text = '[\n    {"$match": {}}\n]'  # Último pipeline escrito en el diálogo de agregación
+        self.live_tail = None  # ChangeTail activo en modo en vivo
+        self.live_outside = 0  # Documentos nuevos recibidos en vivo que no caben en la página
+        self.page_cache = PageCache()
+        self.schema_service = SchemaService()
+        self.count_cache = CountCache()
+        self.field_stats_cache = FieldStatsCache()  # Estadísticas por (colección, filtro, campo, muestra)
+        self.query_history = QueryHistory()
+        # Latencia de comandos (listeners de pymongo) y de las fases de pintado; si la conexión
+        # se lanzó al arrancar, sus listeners ya apuntan a las métricas creadas en ese hilo
+        self.metrics = (early_connection and early_connection.wait_metrics()) or Metrics()
+        self.profile_store = ProfileStore()  # Perfiles de conexión (compresión, pool, timeouts) por URI
+        self.pool_health_job = None
+        self.current_count_key = None
+        self.grid_layout = None  # (colección, columnas, orden) con la que está configurada la tabla
+        self.sort_index_known = {}  # (db, colección, columna) -> hay índice utilizable para ordenar
+        self.sort_column = None
+        self.sort_direction = 1  # 1 = ascendente, -1 = descendente
+        self.busy_text = tk.StringVar(value="")
+
+        # Configuración del estilo
+        self.style = ttk.Style()
+        StyleConfig.setup_modern_style(self.style)
+        self.config(background=StyleConfig.ROOT_BG_COLOR)
+
+        self.create_widgets()
+        self.executor = QueryExecutor(self, on_busy_change=self.update_busy_indicator)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        if early_connection is not None:
+            self.nav_panel.show_cached(early_connection.uri)
+            self.connect_mongo(early_connection)
+
+    @property
+    def paginator(self):
+        return self.session.paginator
+
+    def create_widgets(self):
+        connection_frame = ttk.Frame(self, padding="10 10 10 0", style='TFrame')
+        connection_frame.pack(fill='x', expand=False, padx=10, pady=(10, 0))
+
+        ttk.Label(connection_frame, text="URI de MongoDB:").pack(side='left', padx=5)
+        self.uri_entry = ttk.Entry(connection_frame, textvariable=self.mongo_uri, width=80, style='TEntry')
+        self.uri_entry.pack(side='left', fill='x', expand=True, padx=5)
+        ttk.Button(connection_frame, text="⚡ Conectar", command=self.connect_mongo, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(connection_frame, text="⚙ Perfil", command=self.open_profile_dialog, style='TButton').pack(side='left', padx=5)
+        ttk.Button(connection_frame, text="📊 Métricas", command=self.open_metrics_dialog, style='TButton').pack(side='left', padx=5)
+
+        # Indicador de consultas en curso y botón para cancelarlas
+        self.cancel_button = ttk.Button(connection_frame, text="✖ Cancelar", command=self.cancel_queries, style='TButton', state='disabled')
+        self.cancel_button.pack(side='right', padx=5)
+        self.busy_progress = ttk.Progressbar(connection_frame, mode='indeterminate', length=80)
+        self.busy_progress.pack(side='right', padx=5)
+        ttk.Label(connection_frame, textvariable=self.busy_text).pack(side='right', padx=5)
+        self.pool_text = tk.StringVar(value="")
+        ttk.Label(connection_frame, textvariable=self.pool_text).pack(side='right', padx=5)
+
+        main_paned_window = ttk.PanedWindow(self, orient=tk.HORIZONTAL, style='TPanedwindow')
+        main_paned_window.pack(fill='both', expand=True, padx=10, pady=10)
+
+        self.nav_panel = NavigationPanel(main_paned_window, self)
+        main_paned_window.add(self.nav_panel)
+
+        self.data_panel = DataPanel(main_paned_window, self)
+        main_paned_window.add(self.data_panel)
+
+    def update_busy_indicator(self, count):
+        """Mostrar u ocultar el indicador de consultas en curso."""
+        if count:
+            self.busy_text.set(f"⏳ {count} consulta(s) en curso")
+            self.busy_progress.start(15)
+            self.cancel_button.config(state='normal')
+        else:
+            self.busy_text.set("")
+            self.busy_progress.stop()
+            self.cancel_button.config(state='disabled')
+
+    def cancel_queries(self):
+        self.executor.cancel_all()
+
+    def on_close(self):
+        self.stop_live()
+        self.executor.shutdown()
+        self.destroy()
+
+    def connect_mongo(self, early_connection=None):
+        """Conectar a la URI del campo; early_connection es la conexión ya lanzada al arrancar (startup.py)."""
+        uri = self.mongo_uri.get()
+        if not uri:
+            messagebox.showerror("Error de Conexión", "La URI de MongoDB no puede estar vacía.")
+            return
+
+        profile = self.profile_store.get(uri)
+        previous = self.repository
+
+        def on_connected(repository):
+            if previous is not None and previous is not repository:
+                # El cliente anterior (otra URI u otro perfil) se cierra junto con lo que lo usaba
+                self.stop_live()
+                previous.close()
+            self.repository = repository
+            self.client = repository.client
+            if early_connection is None:
+                # Al arrancar no se interrumpe con un aviso: la lista de bases de datos ya lo indica
+                messagebox.showinfo("Conexión Exitosa", "Conectado a MongoDB.")
+            self.nav_panel.set_repository(self.repository)
+            self.update_pool_health()
+
+        def on_error(e):
+            error_msg = f"No se pudo conectar. Asegúrate de que el túnel 'kubectl port-forward' esté activo.\n\nDetalles: {e}"
+            messagebox.showerror("Error de Conexión", error_msg)
+            if previous is None or not previous.matches(uri, profile):
+                return
+            # Falló la comprobación del cliente reutilizado: se descarta para crear uno nuevo la próxima vez
+            self.stop_live()
+            previous.close()
+            self.repository = None
+            self.client = None
+
+        if early_connection is not None:
+            work = lambda ticket: early_connection.result()
+        elif previous is not None and previous.matches(uri, profile):
+            # Misma URI y mismo perfil: se reutiliza el cliente y su pool en lugar de abrir otro
+            work = lambda ticket: previous.ping()
+        else:
+            work = lambda ticket: Repository.connect(uri, profile, event_listeners=self.metrics.listeners())
+        self.executor.submit('connect', work, on_success=on_connected, on_error=on_error)
+
+    def update_pool_health(self):
+        """Estado del pool y del enlace en la barra de conexión, refrescado cada segundo."""
+        if self.pool_health_job is not None:
+            self.after_cancel(self.pool_health_job)
+            self.pool_health_job = None
+        if self.repository is None:
+            self.pool_text.set("")
+            return
+        summary = self.metrics.summary()
+        heartbeat = summary['heartbeat_ms']['p50']
+        compressors = client_options(self.repository.profile).get('compressors', 'sin compresión')
+        self.pool_text.set(f"Pool {summary['pool_open']}/{self.repository.profile['max_pool_size']} "
+                           f"({summary['pool_in_use']} en uso) · latido "
+                           f"{'-' if heartbeat is None else f'{heartbeat:.0f} ms'} · {compressors}")
+        self.pool_health_job = self.after(1000, self.update_pool_health)
+
+    def open_profile_dialog(self):
+        """Editar el perfil de conexión de la URI actual; se guarda en disco y se aplica al reconectar."""
+        uri = self.mongo_uri.get()
+        if not uri:
+            messagebox.showwarning("Perfil de conexión", "Escribe primero la URI de MongoDB.")
+            return
+        profile = self.profile_store.get(uri)
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Perfil de conexión")
+        dialog.config(background='#ffffff')
+        dialog.transient(self)
+
+        form = ttk.Frame(dialog, padding="10", style='TFrame')
+        form.pack(fill='both', expand=True)
+        compressors = tk.StringVar(value=",".join(profile['compressors']))
+        read_preference = tk.StringVar(value=profile['read_preference'])
+        numbers = {key: tk.IntVar(value=profile[key]) for key in (
+            'zlib_level', 'max_pool_size', 'min_pool_size', 'max_idle_time_ms', 'connect_timeout_ms',
+            'socket_timeout_ms', 'server_selection_timeout_ms', 'batch_size')}
+        labels = {
+            'zlib_level': "Nivel de zlib (-1 a 9):",
+            'max_pool_size': "Conexiones máximas del pool:",
+            'min_pool_size': "Conexiones mínimas (calientes):",
+            'max_idle_time_ms': "Inactividad máxima de una conexión (ms):",
+            'connect_timeout_ms': "Timeout de conexión (ms):",
+            'socket_timeout_ms': "Timeout de socket (ms, 0 = sin límite):",
+            'server_selection_timeout_ms': "Timeout de selección de servidor (ms):",
+            'batch_size': "Documentos por lote de cursor (0 = servidor):",
+        }
+
+        ttk.Label(form, text=f"Perfil de {uri}", style='Title.TLabel').grid(row=0, column=0, columnspan=2, sticky='w', pady=(0, 10))
+        ttk.Label(form, text="Compresores (por preferencia):").grid(row=1, column=0, sticky='w', pady=3)
+        ttk.Entry(form, textvariable=compressors, width=30).grid(row=1, column=1, sticky='w')
+        ttk.Label(form, text=f"Disponibles en este equipo: {', '.join(available_compressors())}").grid(row=2, column=1, sticky='w')
+        for row, (key, var) in enumerate(numbers.items(), start=3):
+            ttk.Label(form, text=labels[key]).grid(row=row, column=0, sticky='w', pady=3)
+            ttk.Entry(form, textvariable=var, width=12).grid(row=row, column=1, sticky='w')
+        ttk.Label(form, text="Preferencia de lectura:").grid(row=len(numbers) + 3, column=0, sticky='w', pady=3)
+        ttk.Combobox(form, textvariable=read_preference, values=READ_PREFERENCES, state='readonly',
+                     width=20).grid(row=len(numbers) + 3, column=1, sticky='w')
+
+        def save():
+            try:
+                updated = {key: var.get() for key, var in numbers.items()}
+            except tk.TclError:
+                messagebox.showerror("Perfil de conexión", "Los valores numéricos no son válidos.", parent=dialog)
+                return
+            updated['compressors'] = [name.strip() for name in compressors.get().split(',') if name.strip()]
+            updated['read_preference'] = read_preference.get()
+            try:
+                self.profile_store.put(uri, updated)
+            except OSError as e:
+                messagebox.showerror("Perfil de conexión", f"No se pudo guardar el perfil: {e}", parent=dialog)
+                return
+            dialog.destroy()
+            if self.repository is not None and self.repository.uri == uri and \
+                    messagebox.askyesno("Perfil de conexión", "Perfil guardado. ¿Reconectar ahora para aplicarlo?"):
+                self.connect_mongo()
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="✓ Guardar", command=save, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+
+    def load_collection_data(self, db_name, collection_name):
+        self.current_db_name = db_name
+        self.current_collection_name = collection_name
+        self.sort_column = None
+        self.sort_direction = 1
+        self.session = self.repository.session(db_name, collection_name)
+        self.load_documents()
+
+    def apply_filter(self):
+        if not self.current_collection_name:
+            messagebox.showwarning("Filtro", "Selecciona una colección primero.")
+            return
+        self.load_documents()
+
+    def apply_page_size(self):
+        if not self.current_collection_name: return
+        if self.aggregation:
+            aggregation = self.aggregation
+            self.run_aggregation(aggregation.namespace, aggregation.pipeline, aggregation.preview_limit)
+            return
+        self.load_documents()
+
+    def apply_preview_mode(self):
+        if not self.current_collection_name: return
+        self.load_documents(KeysetPaginator.RELOAD)
+
+    def change_page(self, move):
+        """Navegar a la página anterior/siguiente o saltar a la primera/última (constantes de KeysetPaginator)."""
+        if not self.current_collection_name: return
+        if self.aggregation:
+            self.change_aggregation_page(move)
+            return
+        if move == KeysetPaginator.PREV and not self.paginator.has_prev:
+            messagebox.showinfo("Paginación", "Ya estás en la primera página.")
+            return
+        if move == KeysetPaginator.NEXT and not self.paginator.has_next:
+            messagebox.showinfo("Paginación", "Ya estás en la última página.")
+            return
+        self.load_documents(move)
+
+    def toggle_sort(self, column):
+        """Alternar ordenación de una columna."""
+        if self.sort_column == column:
+            # Si es la misma columna, cambiar dirección
+            self.sort_direction = -1 if self.sort_direction == 1 else 1
+        else:
+            # Nueva columna, empezar con ascendente
+            self.sort_column = column
+            self.sort_direction = 1
+
+        # use_keyset=None: se comprueba en segundo plano si la columna tiene índice
+        known = self.sort_index_known.get((self.current_db_name, self.current_collection_name, self.sort_column))
+        self.session.set_sort(self.sort_column, self.sort_direction, use_keyset=known)
+        self.load_documents()
+
+    def load_documents(self, move=KeysetPaginator.FIRST):
+        if not self.current_db_name or not self.current_collection_name: return
+        # Cualquier consulta sobre la colección sustituye en la tabla a los resultados de una agregación
+        self.close_aggregation()
+
+        self.data_panel.data_tree.tag_configure('oddrow', background=StyleConfig.TABLE_ALT_ROW)
+        self.data_panel.data_tree.tag_configure('hover', background=StyleConfig.TABLE_HOVER)
+        self.data_panel.data_tree.tag_configure('separator', background='white')
+
+        self.data_panel.data_label.config(text=f"Colección: {self.current_db_name}.{self.current_collection_name}")
+
+        try:
+            query_filter = parse_filter(self.current_filter.get())
+        except ValueError as e:
+            messagebox.showerror("Error de Filtro", f"Formato JSON inválido: {e}")
+            query_filter = {}
+
+        namespace = (self.current_db_name, self.current_collection_name)
+        # Cada consulta trabaja sobre su propia copia de las opciones; el estado de paginación es compartido
+        session = self.session = self.session.with_options(
+            query_filter=query_filter,
+            page_size=self.page_size.get(),
+            preview=self.preview_mode.get(),
+            fields=self.schema_service.projection(namespace),
+        )
+        plan = session.plan(move)
+        sort_column = session.paginator.sort_column
+        check_index = session.paginator.use_keyset is None
+        check_types = not session.types_checked()
+        page_key = session.page_key(plan)
+        self.request_schema(namespace)
+        self.request_count(session)
+        self.sync_live(session)
+
+        def on_fetched(result):
+            has_index, fetched = result
+            if has_index is not None:
+                self.sort_index_known[namespace + (sort_column,)] = has_index
+                self.paginator.use_keyset = has_index
+
+            if not fetched and move in (KeysetPaginator.NEXT, KeysetPaginator.PREV):
+                edge = "última" if move == KeysetPaginator.NEXT else "primera"
+                messagebox.showinfo("Paginación", f"Ya estás en la {edge} página.")
+                return
+
+            documents = session.commit(plan, fetched)
+            self._render_documents(documents, self.paginator.page_label())
+            self._prefetch_neighbours(session)
+
+        cached = self.page_cache.get(page_key)
+        if cached is not None and not check_index and not check_types:
+            self.executor.supersede('documents')
+            self.query_history.record(namespace, query_filter, plan, 0.0, len(cached), source='caché')
+            on_fetched((None, cached))
+            return
+
+        version = self.page_cache.version(namespace)
+
+        def fetch(ticket):
+            has_index = session.sort_has_index(sort_column) if check_index else None
+            if check_types and has_index is not False:
+                # Con tipos mezclados en la ordenación las páginas siguientes se piden con skip
+                session.check_types(**ticket.options())
+            started = time.monotonic()
+            fetched, size = session.fetch(plan, **ticket.options())
+            return has_index, fetched, size, (time.monotonic() - started) * 1000
+
+        def on_page(result):
+            has_index, fetched, size, duration_ms = result
+            self.page_cache.put(page_key, fetched, size, version)
+            self.query_history.record(namespace, query_filter, plan, duration_ms, len(fetched))
+            on_fetched((has_index, fetched))
+
+        self.executor.submit('documents', fetch, on_success=on_page,
+                             on_error=lambda e: messagebox.showerror("Error de Carga", f"Fallo al cargar documentos: {e}"),
+                             client=self.client)
+
+    def _prefetch_neighbours(self, session):
+        """Precargar en segundo plano la página siguiente y la anterior mientras se lee la actual."""
+        version = self.page_cache.version(session.namespace)
+        for move, available in ((KeysetPaginator.NEXT, session.paginator.has_next), (KeysetPaginator.PREV, session.paginator.has_prev)):
+            if not available:
+                continue
+            plan = session.plan(move)
+            page_key = session.page_key(plan)
+            if self.page_cache.get(page_key, touch=False) is not None:
+                continue
+
+            def prefetch(ticket, plan=plan):
+                started = time.monotonic()
+                fetched, size = session.fetch(plan, **ticket.options())
+                return fetched, size, (time.monotonic() - started) * 1000
+
+            def store(result, page_key=page_key, plan=plan):
+                fetched, size, duration_ms = result
+                self.page_cache.put(page_key, fetched, size, version)
+                self.query_history.record(session.namespace, session.query_filter, plan, duration_ms, len(fetched), source='precarga')
+
+            self.executor.submit(f'prefetch:{move}', prefetch, on_success=store, on_error=lambda e: None,
+                                 client=self.client, silent=True)
+
+    def toggle_live(self):
+        if self.live_mode.get():
+            if not self.session:
+                messagebox.showwarning("En vivo", "Selecciona una colección primero.")
+                self.live_mode.set(False)
+                return
+            self.sync_live(self.session)
+        else:
+            self.stop_live()
+
+    def sync_live(self, session):
+        """Abrir (o reabrir si cambian colección o filtro) el change stream del modo en vivo."""
+        from .live import LIVE_FRAME_MS, ChangeTail
+        if not self.live_mode.get():
+            return
+        tail = self.live_tail
+        if tail and tail.running and tail.namespace == session.namespace and tail.query_filter == (session.query_filter or {}):
+            return
+        self.stop_live()
+        try:
+            tail = ChangeTail(session.collection, session.query_filter)
+        except ValueError as e:
+            messagebox.showerror("En vivo", f"El filtro actual no se puede seguir en vivo: {e}")
+            self.live_mode.set(False)
+            return
+        self.live_tail = tail.start()
+        self.live_outside = 0
+        self.after(LIVE_FRAME_MS, self._flush_live, tail)
+
+    def stop_live(self):
+        if self.live_tail:
+            self.live_tail.stop()
+            self.live_tail = None
+
+    def _flush_live(self, tail):
+        """Volcar en la tabla, como mucho una vez por fotograma, los cambios acumulados por el change stream."""
+        from .live import LIVE_FRAME_MS
+        if tail is not self.live_tail:
+            return
+        changes = tail.drain()
+        if changes:
+            self.invalidate_collection_cache(tail.namespace)
+            if tail.namespace == (self.current_db_name, self.current_collection_name):
+                self.live_outside += self.data_panel.data_tree.apply_changes(changes, self.session.page_size)
+                self.update_page_info()
+                self.data_panel.draw_horizontal_lines()
+                status = f"● en vivo: {tail.events} cambios"
+                if tail.reconnects:
+                    status += f", {tail.reconnects} reconexiones"
+                if self.live_outside:
+                    status += f", {self.live_outside} nuevos fuera de esta página"
+                self.data_panel.data_label.config(
+                    text=f"Colección: {tail.namespace[0]}.{tail.namespace[1]} ({self.paginator.page_label()} - {status})")
+
+        if tail.error or tail.ended:
+            self.live_tail = None
+            self.live_mode.set(False)
+            if tail.error:
+                messagebox.showerror("En vivo", f"El change stream se ha detenido (requiere un replica set): {tail.error}")
+            else:
+                messagebox.showinfo("En vivo", f"El change stream ha terminado: evento '{tail.ended}' en la colección.")
+            return
+        self.after(LIVE_FRAME_MS, self._flush_live, tail)
+
+    def request_schema(self, namespace, force=False):
+        """Muestrear el esquema de la colección en segundo plano si no está en caché o ha caducado."""
+        if not force and not self.schema_service.is_stale(namespace):
+            return
+
+        def on_schema(entry):
+            self.schema_service.store(namespace, entry)
+            if namespace == (self.current_db_name, self.current_collection_name):
+                self.relayout_current_page()
+
+        collection = self.repository.collection(*namespace)
+        self.executor.submit(f'schema:{namespace[0]}.{namespace[1]}',
+                             lambda ticket: self.schema_service.sample(collection, **ticket.options()),
+                             on_success=on_schema, on_error=lambda e: None, client=self.client, silent=True)
+
+    def request_count(self, session):
+        """Obtener en segundo plano el total de resultados del filtro actual si no está en caché."""
+        count_key = session.count_key()
+        self.current_count_key = count_key
+        if self.count_cache.get(count_key) is not None:
+            return
+
+        def on_count(result):
+            total, exact = result
+            self.count_cache.put(count_key, total, exact)
+            if count_key == self.current_count_key:
+                self.update_page_info()
+
+        self.executor.submit('count', lambda ticket: session.count(),
+                             on_success=on_count, on_error=lambda e: None, client=self.client, silent=True)
+
+    def update_page_info(self):
+        """Texto de paginación: 'Página X de Y' con el total exacto, o una cota inferior si el conteo no terminó."""
+        if self.aggregation:
+            self.page_info_text.set(self.aggregation.page_label())
+            return
+        label = self.paginator.page_label()
+        count = self.count_cache.get(self.current_count_key) if self.current_count_key else None
+        page_size = self.page_size.get()
+        if count is None:
+            self.page_info_text.set(label)
+            return
+
+        total, exact = count
+        if exact:
+            pages = max(1, math.ceil(total / page_size))
+            if self.paginator.anchor == 'start':
+                page_number = self.paginator.page_index + 1
+            else:
+                page_number = max(1, pages - self.paginator.page_index)
+            self.page_info_text.set(f"Página {page_number} de {pages} ({total} docs)")
+        else:
+            # Cota inferior con lo que se sabe de la página actual
+            shown = len(self.data_panel.data_tree.docs)
+            beyond = self.paginator.has_next if self.paginator.anchor == 'start' else self.paginator.has_prev
+            lower_bound = self.paginator.page_index * page_size + shown + (1 if beyond else 0)
+            self.page_info_text.set(f"{label} de ≥ {math.ceil(lower_bound / page_size)} (≥ {lower_bound} docs)")
+
+    def relayout_current_page(self):
+        """Volver a pintar la página actual si el juego de columnas vigente ha cambiado."""
+        documents = self.data_panel.data_tree.docs
+        if not documents or not self.grid_layout or self.aggregation:
+            return
+        namespace = (self.current_db_name, self.current_collection_name)
+        if tuple(self.schema_service.columns(namespace)) != self.grid_layout[1]:
+            self._render_documents(documents, self.paginator.page_label())
+
+    def open_columns_dialog(self):
+        """Diálogo para ocultar/mostrar campos según su frecuencia en la muestra del esquema."""
+        if not self.current_collection_name:
+            messagebox.showwarning("Columnas", "Selecciona una colección primero.")
+            return
+        namespace = (self.current_db_name, self.current_collection_name)
+        entry = self.schema_service.get(namespace)
+        if not entry:
+            messagebox.showinfo("Columnas", "El esquema de la colección aún se está muestreando. Inténtalo en unos segundos.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Columnas de {namespace[0]}.{namespace[1]}")
+        dialog.geometry("500x500")
+        dialog.config(background='#ffffff')
+
+        ttk.Label(dialog, text=f"Campos de una muestra de {entry['sampled']} documentos:", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+
+        list_frame = ttk.Frame(dialog, style='TFrame')
+        list_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        list_canvas = tk.Canvas(list_frame, background='white', highlightthickness=0)
+        list_canvas.pack(side='left', fill='both', expand=True)
+        v_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=list_canvas.yview)
+        v_scrollbar.pack(side='right', fill='y')
+        list_canvas.configure(yscrollcommand=v_scrollbar.set)
+        inner = ttk.Frame(list_canvas, style='TFrame')
+        list_canvas.create_window((0, 0), window=inner, anchor='nw')
+        inner.bind('<Configure>', lambda e: list_canvas.configure(scrollregion=list_canvas.bbox("all")))
+
+        hidden = self.schema_service.hidden.get(namespace, set())
+        visible_vars = {}
+        for field in sorted(f for f in entry['fields'] if f != '_id'):
+            frequency = self.schema_service.frequency(namespace, field) or 0
+            types = ", ".join(entry['fields'][field]['types'])
+            visible_vars[field] = tk.BooleanVar(value=field not in hidden)
+            ttk.Checkbutton(inner, text=f"{field}  —  {frequency:.0%}  ({types})",
+                            variable=visible_vars[field]).pack(anchor='w')
+
+        def hide_rare():
+            rare = self.schema_service.rare_fields(namespace)
+            for field, var in visible_vars.items():
+                var.set(field not in rare)
+
+        def show_all():
+            for var in visible_vars.values():
+                var.set(True)
+
+        def apply_columns():
+            self.schema_service.set_hidden(namespace, [f for f, var in visible_vars.items() if not var.get()])
+            dialog.destroy()
+            # Los campos ocultos dejan de pedirse al servidor, así que la página se vuelve a consultar
+            self.load_documents(KeysetPaginator.RELOAD)
+
+        def resample():
+            dialog.destroy()
+            self.request_schema(namespace, force=True)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text=f"Ocultar raros (<{SCHEMA_RARE_THRESHOLD:.0%})", command=hide_rare, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Mostrar todos", command=show_all, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="⟳ Remuestrear", command=resample, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✓ Aplicar", command=apply_columns, style='Primary.TButton').pack(side='right', padx=5)
+
+    def open_indexes_dialog(self):
+        """Gestión de índices de la colección actual: tamaños, uso, creación, borrado y progreso de construcción."""
+        if not self.current_collection_name:
+            messagebox.showwarning("Índices", "Selecciona una colección primero.")
+            return
+        namespace = (self.current_db_name, self.current_collection_name)
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Índices de {namespace[0]}.{namespace[1]}")
+        dialog.geometry("950x560")
+        dialog.config(background='#ffffff')
+
+        index_columns = ('nombre', 'claves', 'tamaño', 'accesos', 'desde', 'opciones')
+        index_tree = ttk.Treeview(dialog, columns=index_columns, show='headings', height=10)
+        for col, width in zip(index_columns, (170, 280, 80, 70, 140, 180)):
+            index_tree.heading(col, text=col, anchor='w')
+            index_tree.column(col, width=width, anchor='w', stretch=col in ('claves', 'opciones'))
+        index_tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        create_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        create_frame.pack(fill='x', expand=False)
+        keys_text = tk.StringVar(value='{"_id.servicePath": 1, "_id.type": 1}')
+        name_text = tk.StringVar()
+        unique = tk.BooleanVar(value=False)
+        sparse = tk.BooleanVar(value=False)
+        ttl_text = tk.StringVar()
+        build_text = tk.StringVar(value="")
+
+        ttk.Label(create_frame, text="Claves (JSON, en orden):").grid(row=0, column=0, sticky='w')
+        ttk.Entry(create_frame, textvariable=keys_text, width=60).grid(row=0, column=1, columnspan=3, sticky='we', padx=5)
+        ttk.Button(create_frame, text="servicePath + tipo", style='TButton',
+                   command=lambda: keys_text.set('{"_id.servicePath": 1, "_id.type": 1}')).grid(row=0, column=4, padx=5)
+        ttk.Button(create_frame, text="2dsphere location", style='TButton',
+                   command=lambda: keys_text.set('{"location.coords": "2dsphere"}')).grid(row=0, column=5, padx=5)
+        ttk.Label(create_frame, text="Nombre (opcional):").grid(row=1, column=0, sticky='w', pady=5)
+        ttk.Entry(create_frame, textvariable=name_text, width=25).grid(row=1, column=1, sticky='w', padx=5)
+        ttk.Checkbutton(create_frame, text="Único", variable=unique).grid(row=1, column=2, sticky='w')
+        ttk.Checkbutton(create_frame, text="Disperso (sparse)", variable=sparse).grid(row=1, column=3, sticky='w')
+        ttk.Label(create_frame, text="TTL (segundos):").grid(row=2, column=0, sticky='w')
+        ttk.Entry(create_frame, textvariable=ttl_text, width=10).grid(row=2, column=1, sticky='w', padx=5)
+        ttk.Label(create_frame, textvariable=build_text).grid(row=3, column=0, columnspan=6, sticky='w', pady=(5, 0))
+
+        building = {'ticket': None}
+
+        def show_indexes(indexes):
+            if not dialog.winfo_exists(): return
+            index_tree.delete(*index_tree.get_children())
+            for index in indexes:
+                index_tree.insert('', 'end', iid=index['name'], values=(
+                    index['name'],
+                    json_util.dumps(dict(index['key'])),
+                    format_bytes(index['size']),
+                    "?" if index['ops'] is None else index['ops'],
+                    index['since'].strftime('%Y-%m-%d %H:%M') if index['since'] else "",
+                    json_util.dumps(index['options']) if index['options'] else ""))
+
+        def load_indexes():
+            # Crear o borrar índices cambia qué ordenaciones pueden paginarse por rango
+            self.sort_index_known = {k: v for k, v in self.sort_index_known.items() if k[:2] != namespace}
+            # Canal propio: el del árbol de navegación se relanza justo después con refresh_indexes
+            self.executor.submit(f'index-dialog:{namespace[0]}.{namespace[1]}',
+                                 lambda ticket: self.repository.list_indexes(*namespace),
+                                 on_success=show_indexes,
+                                 on_error=lambda e: messagebox.showerror("Índices", f"Fallo al cargar los índices: {e}", parent=dialog),
+                                 client=self.client)
+            self.nav_panel.refresh_indexes(*namespace)
+
+        def poll_builds():
+            """Consultar currentOp mientras dure la construcción, sin bloquear la interfaz."""
+            if not dialog.winfo_exists() or building['ticket'] is None:
+                return
+
+            def show_builds(builds):
+                if not dialog.winfo_exists() or building['ticket'] is None: return
+                texts = []
+                for build in builds:
+                    if build['total']:
+                        texts.append(f"{build['msg']} ({100 * build['done'] / build['total']:.0f}%)")
+                    else:
+                        texts.append(build['msg'])
+                build_text.set("⏳ " + ("; ".join(texts) if texts else "Construyendo índice..."))
+
+            def show_poll_error(e):
+                # La construcción sigue aunque currentOp falle (p. ej. sin permisos): se indica por qué no hay progreso
+                if not dialog.winfo_exists() or building['ticket'] is None: return
+                build_text.set(f"⏳ Construyendo índice... (progreso no disponible: {e})")
+
+            self.executor.submit(f'index-builds:{namespace[0]}.{namespace[1]}',
+                                 lambda ticket: self.repository.index_builds(*namespace),
+                                 on_success=show_builds, on_error=show_poll_error, client=self.client, silent=True)
+            dialog.after(1000, poll_builds)
+
+        def create_index():
+            try:
+                keys = parse_index_keys(keys_text.get())
+                options = {}
+                if name_text.get().strip():
+                    options['name'] = name_text.get().strip()
+                if unique.get():
+                    options['unique'] = True
+                if sparse.get():
+                    options['sparse'] = True
+                if ttl_text.get().strip():
+                    options['expireAfterSeconds'] = int(ttl_text.get())
+                    if len(keys) != 1:
+                        raise ValueError("Un índice TTL debe tener un único campo (de tipo fecha).")
+            except ValueError as e:
+                messagebox.showerror("Crear índice", f"Definición no válida: {e}", parent=dialog)
+                return
+
+            def on_created(name):
+                building['ticket'] = None
+                if dialog.winfo_exists():
+                    build_text.set(f"✓ Índice '{name}' creado.")
+                load_indexes()
+
+            def on_failed(e):
+                building['ticket'] = None
+                if dialog.winfo_exists():
+                    build_text.set("")
+                messagebox.showerror("Crear índice", f"Fallo al crear el índice: {e}")
+
+            # Canal por índice: construir uno no descarta el resultado de otro
+            building['ticket'] = self.executor.submit(
+                f'create-index:{namespace[0]}.{namespace[1]}:{keys}',
+                lambda ticket: self.repository.create_index(*namespace, keys, **options),
+                on_success=on_created, on_error=on_failed, client=self.client)
+            build_text.set("⏳ Construyendo índice...")
+            poll_builds()
+
+        def drop_index():
+            selection = index_tree.selection()
+            if not selection: return
+            name = selection[0]
+            if name == '_id_':
+                messagebox.showwarning("Eliminar índice", "El índice de '_id' no se puede eliminar.", parent=dialog)
+                return
+            if not messagebox.askyesno("Eliminar índice", f"¿Eliminar el índice '{name}' de {namespace[0]}.{namespace[1]}?", parent=dialog):
+                return
+            self.executor.submit(f'drop-index:{namespace[0]}.{namespace[1]}:{name}',
+                                 lambda ticket: self.repository.drop_index(*namespace, name),
+                                 on_success=lambda result: load_indexes(),
+                                 on_error=lambda e: messagebox.showerror("Eliminar índice", f"Fallo al eliminar el índice: {e}"),
+                                 client=self.client)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="✚ Crear índice", command=create_index, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Eliminar índice", command=drop_index, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="⟳ Actualizar", command=load_indexes, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+        load_indexes()
+
+    def open_explain_dialog(self):
+        """Explain (executionStats) de la consulta exacta de la página actual e historial de tiempos de la sesión."""
+        if not self.current_collection_name or not self.session or not self.session.paginator.current_plan:
+            messagebox.showwarning("Explain", "Carga primero una página de una colección.")
+            return
+        session = self.session
+        plan = session.plan(KeysetPaginator.RELOAD)
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Explain de {session.namespace[0]}.{session.namespace[1]}")
+        dialog.geometry("900x650")
+        dialog.config(background='#ffffff')
+
+        ttk.Label(dialog, text="Plan de la consulta de la página actual:", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+        text_widget = tk.Text(dialog, wrap='word', height=16, borderwidth=1, relief='solid', padx=5, pady=5,
+                              font=('Consolas', 10), background='white')
+        text_widget.pack(fill='both', expand=True, padx=10, pady=5)
+        text_widget.tag_configure('warning', foreground='#b91c1c')
+        text_widget.insert('1.0', "Ejecutando explain...")
+
+        ttk.Label(dialog, text="Consultas recientes de la sesión (más recientes primero):", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+        history_columns = ('hora', 'colección', 'filtro', 'método', 'ms', 'docs', 'origen')
+        history_tree = ttk.Treeview(dialog, columns=history_columns, show='headings', height=8)
+        for col, width in zip(history_columns, (70, 150, 260, 90, 70, 50, 80)):
+            history_tree.heading(col, text=col, anchor='w')
+            history_tree.column(col, width=width, anchor='w', stretch=col == 'filtro')
+        history_tree.pack(fill='both', expand=True, padx=10, pady=5)
+        for entry in self.query_history.recent():
+            history_tree.insert('', 'end', values=(
+                time.strftime('%H:%M:%S', time.localtime(entry['at'])),
+                f"{entry['namespace'][0]}.{entry['namespace'][1]}",
+                json_util.dumps(entry['filter']), entry['method'], f"{entry['duration_ms']:.1f}",
+                entry['returned'], entry['source']))
+
+        raw = {'result': None}
+
+        def show_summary(result):
+            if not dialog.winfo_exists(): return
+            raw['result'] = result
+            summary = summarize_explain(result)
+            spec = session.query_spec(plan)
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert(tk.END, f"Consulta: {'aggregate' if spec['pipeline'] else 'find'} "
+                                       f"filtro={json_util.dumps(spec['filter'])} orden={json_util.dumps(spec['sort'])} "
+                                       f"skip={spec['skip']} limit={spec['limit']} ({QueryHistory.method(plan)})\n\n")
+            text_widget.insert(tk.END, f"Plan ganador: {summary['plan']}\n")
+            text_widget.insert(tk.END, f"Índices: {', '.join(summary['indexes']) or 'ninguno'}\n")
+            text_widget.insert(tk.END, f"Claves examinadas: {summary['keys_examined']}\n")
+            text_widget.insert(tk.END, f"Documentos examinados: {summary['docs_examined']}\n")
+            text_widget.insert(tk.END, f"Documentos devueltos: {summary['returned']}\n")
+            text_widget.insert(tk.END, f"Tiempo en servidor: {summary['time_ms']} ms\n\n")
+            for warning in summary['warnings']:
+                text_widget.insert(tk.END, f"⚠ {warning}\n", 'warning')
+
+        def show_raw():
+            if raw['result'] is None: return
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', json_util.dumps(raw['result'], indent=4))
+
+        def show_error(e):
+            if not dialog.winfo_exists(): return
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', f"Fallo al ejecutar explain: {e}")
+
+        self.executor.submit('explain', lambda ticket: session.explain(plan, **ticket.options()),
+                             on_success=show_summary, on_error=show_error, client=self.client)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="{ } JSON completo", command=show_raw, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Resumen", command=lambda: raw['result'] and show_summary(raw['result']), style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+
+    def open_aggregation_dialog(self):
+        """Escribir un pipeline de agregación y mostrar su resultado en la tabla o escribirlo en una colección."""
+        if not self.current_collection_name:
+            messagebox.showwarning("Agregación", "Selecciona una colección primero.")
+            return
+        namespace = (self.current_db_name, self.current_collection_name)
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Agregación sobre {namespace[0]}.{namespace[1]}")
+        dialog.geometry("700x560")
+        dialog.config(background='#ffffff')
+        dialog.transient(self)
+
+        ttk.Label(dialog, text="Pipeline (JSON extendido, p. ej. {\"$date\": ...} u {\"$oid\": ...}):",
+                  style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+        text_widget = tk.Text(dialog, wrap='none', height=16, borderwidth=1, relief='solid', padx=5, pady=5,
+                              font=('Consolas', 10), background='white')
+        text_widget.pack(fill='both', expand=True, padx=10, pady=5)
+        text_widget.insert('1.0', self.pipeline_text)
+
+        form = ttk.Frame(dialog, padding="10", style='TFrame')
+        form.pack(fill='x', expand=False)
+        limit_var = tk.IntVar(value=AGGREGATE_PREVIEW_LIMIT)
+        output_var = tk.StringVar(value='tabla')
+        target_var = tk.StringVar(value=f"{namespace[1]}_agg")
+        ttk.Label(form, text="Límite de la vista previa ($limit, 0 = sin límite):").grid(row=0, column=0, sticky='w', pady=3)
+        ttk.Entry(form, textvariable=limit_var, width=10).grid(row=0, column=1, sticky='w')
+        ttk.Label(form, text="Resultado:").grid(row=1, column=0, sticky='w', pady=3)
+        output_frame = ttk.Frame(form, style='TFrame')
+        output_frame.grid(row=1, column=1, sticky='w')
+        for value, text in (('tabla', "Mostrar en la tabla"), ('out', "$out (sustituir colección)"), ('merge', "$merge (fundir por _id)")):
+            ttk.Radiobutton(output_frame, text=text, value=value, variable=output_var).pack(side='left', padx=(0, 10))
+        ttk.Label(form, text=f"Colección destino (en {namespace[0]}):").grid(row=2, column=0, sticky='w', pady=3)
+        ttk.Entry(form, textvariable=target_var, width=30).grid(row=2, column=1, sticky='w')
+
+        def run():
+            self.pipeline_text = text_widget.get('1.0', tk.END).strip()
+            try:
+                pipeline = parse_pipeline(self.pipeline_text)
+                preview_limit = max(0, limit_var.get())
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("Agregación", f"Pipeline no válido: {e}", parent=dialog)
+                return
+            if output_var.get() == 'tabla' and not AggregationSession.writes_output(pipeline):
+                self.run_aggregation(namespace, pipeline, preview_limit)
+                dialog.destroy()
+                return
+            target = target_var.get().strip()
+            if not target and not AggregationSession.writes_output(pipeline):
+                messagebox.showwarning("Agregación", "Indica la colección destino.", parent=dialog)
+                return
+            self.write_aggregation_output(namespace, pipeline, target, merge=output_var.get() == 'merge')
+            dialog.destroy()
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="▶ Ejecutar", command=run, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+
+    def run_aggregation(self, namespace, pipeline, preview_limit):
+        """Mostrar en la tabla el resultado de un pipeline, leyendo del cursor solo la primera página."""
+        self.close_aggregation()
+        if self.live_mode.get():
+            self.live_mode.set(False)
+            self.stop_live()
+        self.aggregation = AggregationSession(self.repository, *namespace, pipeline,
+                                              page_size=self.page_size.get(), preview_limit=preview_limit)
+        self.load_aggregation_page(0)
+
+    def change_aggregation_page(self, move):
+        aggregation = self.aggregation
+        if move == KeysetPaginator.PREV and aggregation.page_index == 0:
+            messagebox.showinfo("Paginación", "Ya estás en la primera página.")
+            return
+        if move == KeysetPaginator.NEXT and not aggregation.has_next():
+            messagebox.showinfo("Paginación", "Ya estás en la última página.")
+            return
+        index = {KeysetPaginator.FIRST: 0, KeysetPaginator.PREV: aggregation.page_index - 1,
+                 KeysetPaginator.NEXT: aggregation.page_index + 1, KeysetPaginator.LAST: AggregationSession.LAST}[move]
+        self.load_aggregation_page(index)
+
+    def load_aggregation_page(self, index):
+        aggregation = self.aggregation
+        namespace = aggregation.namespace
+        self.data_panel.data_label.config(
+            text=f"Agregación: {namespace[0]}.{namespace[1]} ({len(aggregation.pipeline)} etapas"
+                 f"{f', $limit {aggregation.preview_limit}' if aggregation.preview_limit else ''})")
+
+        def on_page(page):
+            if aggregation is not self.aggregation: return
+            if page is None:
+                messagebox.showinfo("Paginación", "Ya estás en la última página.")
+                self.update_page_info()
+                return
+            aggregation.page_index, documents = page
+            self._render_documents(documents, aggregation.page_label())
+
+        self.executor.submit('documents', lambda ticket: aggregation.read_page(index, **ticket.options()), on_success=on_page,
+                             on_error=lambda e: messagebox.showerror("Error de Agregación", f"Fallo al ejecutar la agregación: {e}"),
+                             client=self.client)
+
+    def close_aggregation(self):
+        """Salir del modo agregación cerrando su cursor en el servidor (en segundo plano)."""
+        aggregation, self.aggregation = self.aggregation, None
+        if aggregation is not None:
+            self.executor.submit('aggregation-close', lambda ticket: aggregation.close(),
+                                 on_error=lambda e: None, client=self.client, silent=True)
+
+    def aggregation_read_only(self):
+        """Avisar (y devolver True) si la tabla muestra resultados de una agregación, que no se pueden editar."""
+        if self.aggregation:
+            messagebox.showinfo("Agregación", "Los resultados de una agregación son de solo lectura. "
+                                              "Aplica el filtro o vuelve a abrir la colección para editar sus documentos.")
+            return True
+        return False
+
+    def write_aggregation_output(self, namespace, pipeline, target, merge=False):
+        """Ejecutar el pipeline completo en el servidor escribiendo el resultado con $out o $merge."""
+        aggregation = AggregationSession(self.repository, *namespace, pipeline, preview_limit=0)
+
+        def run(ticket):
+            started = time.monotonic()
+            written = aggregation.write_output(target, merge=merge, comment=ticket.comment)
+            count = None
+            if isinstance(written, str):
+                count = self.repository.collection(namespace[0], written).estimated_document_count()
+            return written, count, time.monotonic() - started
+
+        def on_done(result):
+            written, count, seconds = result
+            if isinstance(written, str):
+                self.invalidate_collection_cache((namespace[0], written))
+                self.nav_panel.revalidate(db_names=[namespace[0]])
+            total = "" if count is None else f" ({count} documentos)"
+            messagebox.showinfo("Agregación", f"Resultado escrito en {written}{total} en {seconds:.1f} s.")
+
+        self.executor.submit(f'aggregation-output:{namespace[0]}.{target}', run, on_success=on_done,
+                             on_error=lambda e: messagebox.showerror("Error de Agregación", f"Fallo al escribir el resultado: {e}"),
+                             client=self.client)
+
+    def open_field_stats_dialog(self, field):
+        """Estadísticas de un campo calculadas en el servidor sobre el filtro actual, con muestreo opcional."""
+        if not self.current_collection_name or not self.session:
+            messagebox.showwarning("Estadísticas", "Selecciona una colección primero.")
+            return
+        if self.aggregation:
+            messagebox.showinfo("Estadísticas", "Las estadísticas se calculan sobre la colección: aplica el filtro "
+                                                "o vuelve a abrirla para salir de la agregación.")
+            return
+        session = self.session
+        namespace = session.namespace
+        query_filter = session.query_filter
+        collection = self.repository.collection(*namespace)
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Estadísticas de {field}")
+        dialog.geometry("760x620")
+        dialog.config(background='#ffffff')
+
+        filter_text = json_util.dumps(query_filter) if query_filter else "sin filtro"
+        ttk.Label(dialog, text=f"{field} en {namespace[0]}.{namespace[1]} ({filter_text})",
+                  style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+
+        options_frame = ttk.Frame(dialog, padding="5", style='TFrame')
+        options_frame.pack(fill='x', expand=False, padx=5)
+        sample_var = tk.BooleanVar(value=False)
+        size_var = tk.IntVar(value=FIELD_STATS_SAMPLE_SIZE)
+        ttk.Checkbutton(options_frame, text="Muestra aleatoria ($sample) de", variable=sample_var).pack(side='left', padx=5)
+        ttk.Entry(options_frame, textvariable=size_var, width=10).pack(side='left')
+        ttk.Label(options_frame, text="documentos").pack(side='left', padx=5)
+
+        text_widget = tk.Text(dialog, wrap='none', borderwidth=1, relief='solid', padx=5, pady=5,
+                              font=('Consolas', 10), background='white')
+        text_widget.pack(fill='both', expand=True, padx=10, pady=5)
+        text_widget.tag_configure('title', font=('Consolas', 10, 'bold'))
+
+        def percent(count, total):
+            return f"{count / total:.1%}" if total else "-"
+
+        def bars(rows, total_width=40):
+            # rows: (etiqueta, número); la barra más larga ocupa total_width caracteres
+            peak = max((count for _, count in rows), default=0) or 1
+            label_width = max(len(label) for label, _ in rows)
+            for label, count in rows:
+                text_widget.insert(tk.END, f"  {label.ljust(label_width)}  {count:>9}  {'█' * max(1, round(total_width * count / peak))}\n")
+
+        def show(stats, cached=False):
+            if not dialog.winfo_exists(): return
+            total = stats['scanned']
+            text_widget.delete('1.0', tk.END)
+            origin = f"muestra aleatoria de {stats['sample_size']}" if stats['sample_size'] else "todos los que cumplen el filtro"
+            if cached:
+                origin += f"; en caché, calculado hace {time.monotonic() - stats['fetched_at']:.0f} s"
+            text_widget.insert(tk.END, f"Documentos analizados: {total} ({origin})\n")
+            text_widget.insert(tk.END, f"Valores distintos: {stats['distinct']}\n")
+            text_widget.insert(tk.END, f"Ausente: {stats['missing']} ({percent(stats['missing'], total)})   "
+                                       f"Nulo: {stats['null']} ({percent(stats['null'], total)})\n")
+            text_widget.insert(tk.END, f"Mínimo: {format_cell(stats['min'], 80)}\nMáximo: {format_cell(stats['max'], 80)}\n\n")
+
+            text_widget.insert(tk.END, "Tipos\n", 'title')
+            bars([(f"{kind} ({percent(count, total)})", count) for kind, count in stats['types']] or [("-", 0)])
+
+            text_widget.insert(tk.END, f"\nValores más frecuentes (hasta {FIELD_STATS_TOP})\n", 'title')
+            bars([(f"{format_cell(value, 60) if value is not None else '(nulo o ausente)'} ({percent(count, total)})", count)
+                  for value, count in stats['top']] or [("-", 0)])
+
+            for kind, title in (('number', "Histograma numérico"), ('date', "Histograma de fechas")):
+                buckets = stats['histograms'].get(kind)
+                if buckets:
+                    text_widget.insert(tk.END, f"\n{title}\n", 'title')
+                    bars([(f"[{format_cell(low, 30)} – {format_cell(high, 30)}]", count) for low, high, count in buckets])
+
+        def show_error(e):
+            if not dialog.winfo_exists(): return
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', f"Fallo al calcular las estadísticas: {e}")
+
+        def calculate(force=False):
+            try:
+                sample_size = max(1, size_var.get()) if sample_var.get() else None
+            except tk.TclError:
+                messagebox.showerror("Estadísticas", "El tamaño de la muestra debe ser un número.", parent=dialog)
+                return
+            key = FieldStatsCache.key(namespace, query_filter, field, sample_size)
+            cached = None if force else self.field_stats_cache.get(key)
+            if cached is not None:
+                show(cached, cached=True)
+                return
+
+            def store(stats):
+                self.field_stats_cache.put(key, stats)
+                show(stats)
+
+            text_widget.delete('1.0', tk.END)
+            text_widget.insert('1.0', "Calculando en el servidor...")
+            self.executor.submit(f'field-stats:{namespace[0]}.{namespace[1]}.{field}',
+                                 lambda ticket: FieldStatsCache.compute(collection, query_filter, field, sample_size,
+                                                                        comment=ticket.comment),
+                                 on_success=store, on_error=show_error, client=self.client)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="⟳ Calcular", command=lambda: calculate(force=True), style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+        calculate()
+
+    def open_metrics_dialog(self):
+        """Panel de métricas de la sesión: percentiles por comando y por fase de pintado, pool y latido del servidor."""
+        dialog = tk.Toplevel(self)
+        dialog.title("Métricas de la sesión")
+        dialog.geometry("820x600")
+        dialog.config(background='#ffffff')
+
+        text_widget = tk.Text(dialog, wrap='none', borderwidth=1, relief='solid', padx=5, pady=5,
+                              font=('Consolas', 10), background='white')
+        text_widget.pack(fill='both', expand=True, padx=10, pady=10)
+        text_widget.tag_configure('title', font=('Consolas', 10, 'bold'))
+
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        def show():
+            if not dialog.winfo_exists(): return
+            summary = self.metrics.summary()
+            percentiles = "".join(f"{'p' + str(p):>9}" for p in METRICS_PERCENTILES)
+            text_widget.delete('1.0', tk.END)
+
+            text_widget.insert(tk.END, f"{'Comando':<22}{'n':>7}{percentiles}{'máx':>9}{'errores':>9}{'bytes':>12}\n", 'title')
+            for name, stats in sorted(summary['commands'].items(), key=lambda item: -item[1]['count']):
+                text_widget.insert(tk.END, f"{name:<22}{stats['count']:>7}"
+                                           + "".join(f"{ms(stats[f'p{p}']):>9}" for p in METRICS_PERCENTILES)
+                                           + f"{ms(stats['max']):>9}{stats['failures']:>9}{format_bytes(stats['bytes_total']):>12}\n")
+            text_widget.insert(tk.END, f"\ngetMore (viajes extra de cursor): {summary['getmore_count']}\n\n")
+
+            text_widget.insert(tk.END, f"{'Fase de pintado':<22}{'n':>7}{percentiles}{'máx':>9}\n", 'title')
+            for name, stats in summary['render_phases'].items():
+                text_widget.insert(tk.END, f"{name:<22}{stats['count']:>7}"
+                                           + "".join(f"{ms(stats[f'p{p}']):>9}" for p in METRICS_PERCENTILES)
+                                           + f"{ms(stats['max']):>9}\n")
+
+            heartbeat = summary['heartbeat_ms']
+            text_widget.insert(tk.END, "\nLatido del servidor (ida y vuelta, ms)\n", 'title')
+            text_widget.insert(tk.END, f"n={heartbeat['count']} "
+                                       + " ".join(f"p{p}={ms(heartbeat[f'p{p}'])}" for p in METRICS_PERCENTILES)
+                                       + f" máx={ms(heartbeat['max'])}\n")
+            text_widget.insert(tk.END, "\nPool de conexiones\n", 'title')
+            for kind, count in sorted(summary['pool'].items()):
+                text_widget.insert(tk.END, f"{kind:<22}{count:>7}\n")
+            dialog.after(1000, show)
+
+        def export_json():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension='.json', initialfile="metricas.json")
+            if not path:
+                return
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(self.metrics.to_json())
+            except OSError as e:
+                messagebox.showerror("Métricas", f"No se pudo guardar el fichero: {e}", parent=dialog)
+
+        def reset():
+            self.metrics.reset()
+            text_widget.delete('1.0', tk.END)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="⇩ Exportar JSON", command=export_json, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="↺ Reiniciar", command=reset, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+        show()
+
+    def open_export_dialog(self):
+        """Diálogo para exportar en streaming el filtro actual o la colección completa, con progreso y cancelación."""
+        from .exporter import EXPORT_BATCH_SIZE, EXPORT_COMPRESSIONS, EXPORT_EXTENSIONS, EXPORT_FORMATS, ExportJob
+        if not self.current_collection_name:
+            messagebox.showwarning("Exportar", "Selecciona una colección primero.")
+            return
+        namespace = (self.current_db_name, self.current_collection_name)
+        session = self.session
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Exportar {namespace[0]}.{namespace[1]}")
+        dialog.geometry("520x330")
+        dialog.config(background='#ffffff')
+
+        scope = tk.StringVar(value='filter')
+        fmt = tk.StringVar(value=EXPORT_FORMATS[0])
+        compression = tk.StringVar(value='ninguna')
+        batch_size = tk.IntVar(value=self.repository.batch_size or EXPORT_BATCH_SIZE)
+        status_text = tk.StringVar(value="")
+
+        form = ttk.Frame(dialog, padding="10", style='TFrame')
+        form.pack(fill='both', expand=True)
+        ttk.Radiobutton(form, text="Filtro y orden actuales", variable=scope, value='filter').grid(row=0, column=0, columnspan=2, sticky='w')
+        ttk.Radiobutton(form, text="Colección completa", variable=scope, value='all').grid(row=1, column=0, columnspan=2, sticky='w')
+        ttk.Label(form, text="Formato:").grid(row=2, column=0, sticky='w', pady=5)
+        ttk.Combobox(form, textvariable=fmt, values=EXPORT_FORMATS, state='readonly', width=10).grid(row=2, column=1, sticky='w')
+        ttk.Label(form, text="Compresión:").grid(row=3, column=0, sticky='w', pady=5)
+        ttk.Combobox(form, textvariable=compression, values=('ninguna',) + EXPORT_COMPRESSIONS, state='readonly', width=10).grid(row=3, column=1, sticky='w')
+        ttk.Label(form, text="Documentos por lote:").grid(row=4, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=batch_size, width=10).grid(row=4, column=1, sticky='w')
+        progress_bar = ttk.Progressbar(form, mode='determinate', length=450)
+        progress_bar.grid(row=5, column=0, columnspan=2, sticky='we', pady=(15, 5))
+        ttk.Label(form, textvariable=status_text).grid(row=6, column=0, columnspan=2, sticky='w')
+
+        # El hilo de exportación solo escribe aquí; el diálogo lo lee periódicamente desde el bucle de Tk
+        state = {'progress': None, 'cancel': threading.Event(), 'ticket': None, 'total': None}
+
+        def poll():
+            if not dialog.winfo_exists() or state['ticket'] is None:
+                return
+            if state['progress']:
+                exported, written_bytes, rate = state['progress']
+                status_text.set(f"{exported} documentos, {written_bytes / 1e6:.1f} MB, {rate:.0f} docs/s")
+                if state['total']:
+                    progress_bar['value'] = min(100, 100 * exported / state['total'])
+            if state['ticket'].cancelled:
+                status_text.set(status_text.get() + " — cancelada")
+                return
+            dialog.after(200, poll)
+
+        def on_done(result):
+            state['ticket'] = None
+            if not dialog.winfo_exists(): return
+            progress_bar['value'] = 100 if not result['cancelled'] else progress_bar['value']
+            verb = "Cancelada tras exportar" if result['cancelled'] else "Exportados"
+            status_text.set(f"{verb} {result['exported']} documentos en {result['elapsed']:.1f} s ({result['rate']:.0f} docs/s)")
+            export_button.config(state='normal')
+
+        def on_error(e):
+            state['ticket'] = None
+            if dialog.winfo_exists():
+                export_button.config(state='normal')
+            messagebox.showerror("Error de Exportación", f"Fallo al exportar (se puede reanudar con el mismo fichero): {e}")
+
+        def start_export():
+            try:
+                size = batch_size.get()
+            except tk.TclError:
+                size = 0
+            if size <= 0:
+                messagebox.showerror("Exportar", "El tamaño de lote debe ser un entero positivo.")
+                return
+            chosen_compression = None if compression.get() == 'ninguna' else compression.get()
+            extension = EXPORT_EXTENSIONS[fmt.get()] + (EXPORT_EXTENSIONS[chosen_compression] if chosen_compression else '')
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension=extension,
+                                                initialfile=f"{namespace[1]}{extension}")
+            if not path:
+                return
+
+            whole = scope.get() == 'all'
+            # Las columnas del CSV son las de la tabla: esquema muestreado sin los campos ocultos
+            job = ExportJob(session.collection, path, fmt.get(),
+                            query_filter=None if whole else session.query_filter,
+                            sort_column=None if whole else self.sort_column,
+                            sort_direction=1 if whole else self.sort_direction,
+                            columns=self.schema_service.columns(namespace, self.data_panel.data_tree.row_columns) if fmt.get() == 'csv' else None,
+                            compression=chosen_compression, batch_size=size)
+            try:
+                resume = job.load_checkpoint() is not None and messagebox.askyesno(
+                    "Exportar", "Hay una exportación interrumpida a este fichero. ¿Continuar desde el último documento escrito?",
+                    parent=dialog)
+            except ValueError as e:
+                messagebox.showwarning("Exportar", f"{e} Se empezará de nuevo.", parent=dialog)
+                resume = False
+
+            count = None if whole else self.count_cache.get(session.count_key())
+            state['total'] = count[0] if count and count[1] else None
+            state['cancel'].clear()
+            state['progress'] = None
+            progress_bar['value'] = 0
+            export_button.config(state='disabled')
+
+            def export(ticket):
+                job.comment = ticket.comment
+                return job.run(progress=lambda *p: state.__setitem__('progress', p), cancel=state['cancel'], resume=resume)
+
+            state['ticket'] = self.executor.submit(f'export:{namespace[0]}.{namespace[1]}', export,
+                                                   on_success=on_done, on_error=on_error, client=self.client)
+            poll()
+
+        def close():
+            state['cancel'].set()
+            dialog.destroy()
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        export_button = ttk.Button(button_frame, text="⇩ Exportar...", command=start_export, style='Primary.TButton')
+        export_button.pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cancelar", command=lambda: state['cancel'].set(), style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Cerrar", command=close, style='TButton').pack(side='right', padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", close)
+
+    def open_import_dialog(self):
+        """Diálogo para cargar por lotes un fichero JSONL, array JSON o volcado BSON en una colección."""
+        from .importer import IMPORT_BATCH_SIZE, IMPORT_MODES, IMPORT_WORKERS, ImportJob
+        if not self.repository:
+            messagebox.showwarning("Importar", "Conéctate a MongoDB primero.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Importar documentos")
+        dialog.geometry("560x400")
+        dialog.config(background='#ffffff')
+
+        path = tk.StringVar()
+        db_name = tk.StringVar(value=self.current_db_name or "")
+        collection_name = tk.StringVar(value=self.current_collection_name or "")
+        mode = tk.StringVar(value=IMPORT_MODES[0])
+        batch_size = tk.IntVar(value=IMPORT_BATCH_SIZE)
+        workers = tk.IntVar(value=IMPORT_WORKERS)
+        status_text = tk.StringVar(value="")
+
+        def choose_file():
+            chosen = filedialog.askopenfilename(parent=dialog, filetypes=[
+                ("JSON Lines, JSON y BSON", "*.jsonl *.json *.bson *.gz *.zst"), ("Todos", "*")])
+            if chosen:
+                path.set(chosen)
+
+        form = ttk.Frame(dialog, padding="10", style='TFrame')
+        form.pack(fill='both', expand=True)
+        ttk.Label(form, text="Fichero:").grid(row=0, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=path, width=40).grid(row=0, column=1, sticky='we')
+        ttk.Button(form, text="…", command=choose_file, style='TButton').grid(row=0, column=2, padx=5)
+        ttk.Label(form, text="Base de datos:").grid(row=1, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=db_name, width=30).grid(row=1, column=1, sticky='w')
+        ttk.Label(form, text="Colección:").grid(row=2, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=collection_name, width=30).grid(row=2, column=1, sticky='w')
+        ttk.Label(form, text="Modo:").grid(row=3, column=0, sticky='w', pady=5)
+        ttk.Combobox(form, textvariable=mode, values=IMPORT_MODES, state='readonly', width=10).grid(row=3, column=1, sticky='w')
+        ttk.Label(form, text="Documentos por lote:").grid(row=4, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=batch_size, width=10).grid(row=4, column=1, sticky='w')
+        ttk.Label(form, text="Escrituras en paralelo:").grid(row=5, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=workers, width=10).grid(row=5, column=1, sticky='w')
+        ttk.Label(form, textvariable=status_text, wraplength=520).grid(row=6, column=0, columnspan=3, sticky='w', pady=(15, 0))
+
+        # Igual que en la exportación: el hilo de importación deja aquí su progreso y el diálogo lo lee
+        state = {'progress': None, 'cancel': threading.Event(), 'ticket': None}
+
+        def poll():
+            if not dialog.winfo_exists() or state['ticket'] is None:
+                return
+            if state['progress']:
+                read, written, failed, rate = state['progress']
+                status_text.set(f"{read} leídos, {written} escritos, {failed} con error, {rate:.0f} docs/s")
+            dialog.after(200, poll)
+
+        def on_done(report, namespace):
+            state['ticket'] = None
+            self.invalidate_collection_cache(namespace)
+            if namespace == (self.current_db_name, self.current_collection_name):
+                self.load_documents(KeysetPaginator.RELOAD)
+            if not dialog.winfo_exists(): return
+            import_button.config(state='normal')
+            summary = (f"{'Cancelada tras leer' if report['cancelled'] else 'Leídos'} {report['read']} documentos "
+                       f"en {report['elapsed']:.1f} s ({report['rate']:.0f} docs/s): {report['inserted']} insertados, "
+                       f"{report['upserted']} upsert, {report['modified']} reemplazados, "
+                       f"{report['matched'] - report['modified']} sin cambios, {report['failed']} con error.")
+            if report['errors']:
+                batch_number, index, message = report['errors'][0]
+                summary += f"\nPrimer error (lote {batch_number}{'' if index is None else f', posición {index}'}): {message}"
+            status_text.set(summary)
+
+        def on_error(e):
+            state['ticket'] = None
+            if dialog.winfo_exists():
+                import_button.config(state='normal')
+            messagebox.showerror("Error de Importación", f"Fallo al importar: {e}")
+
+        def start_import():
+            namespace = (db_name.get().strip(), collection_name.get().strip())
+            if not path.get() or not all(namespace):
+                messagebox.showwarning("Importar", "Indica el fichero, la base de datos y la colección.", parent=dialog)
+                return
+            try:
+                job = ImportJob(self.repository.collection(*namespace), path.get(), mode=mode.get(),
+                                batch_size=batch_size.get(), workers=workers.get())
+            except (tk.TclError, ValueError) as e:
+                messagebox.showerror("Importar", f"Opciones no válidas: {e}", parent=dialog)
+                return
+            if job.batch_size <= 0 or job.workers <= 0:
+                messagebox.showerror("Importar", "El tamaño de lote y las escrituras en paralelo deben ser positivos.", parent=dialog)
+                return
+
+            state['cancel'].clear()
+            state['progress'] = None
+            import_button.config(state='disabled')
+            state['ticket'] = self.executor.submit(
+                f'import:{namespace[0]}.{namespace[1]}',
+                lambda ticket: job.run(progress=lambda *p: state.__setitem__('progress', p), cancel=state['cancel']),
+                on_success=lambda report: on_done(report, namespace), on_error=on_error, client=self.client)
+            poll()
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        import_button = ttk.Button(button_frame, text="⇧ Importar", command=start_import, style='Primary.TButton')
+        import_button.pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cancelar", command=lambda: state['cancel'].set(), style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+
+    def open_bulk_dialog(self):
+        """Diálogo de operaciones masivas: borrar o asignar un campo en la selección o en todo el filtro."""
+        if not self.current_collection_name:
+            messagebox.showwarning("Operación masiva", "Selecciona una colección primero.")
+            return
+        if self.aggregation_read_only(): return
+        selected = len(self.data_panel.data_tree.selected_rows)
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Operación masiva en {self.current_db_name}.{self.current_collection_name}")
+        dialog.geometry("520x300")
+        dialog.config(background='#ffffff')
+
+        scope = tk.StringVar(value='selection' if selected else 'filter')
+        action = tk.StringVar(value='set')
+        field = tk.StringVar()
+        value = tk.StringVar()
+
+        form = ttk.Frame(dialog, padding="10", style='TFrame')
+        form.pack(fill='both', expand=True)
+        ttk.Radiobutton(form, text=f"Filas seleccionadas ({selected})", variable=scope, value='selection',
+                        state='normal' if selected else 'disabled').grid(row=0, column=0, columnspan=2, sticky='w')
+        ttk.Radiobutton(form, text="Todos los documentos que cumplen el filtro actual", variable=scope,
+                        value='filter').grid(row=1, column=0, columnspan=2, sticky='w')
+        ttk.Radiobutton(form, text="Asignar campo", variable=action, value='set').grid(row=2, column=0, sticky='w', pady=(10, 0))
+        ttk.Radiobutton(form, text="Eliminar documentos", variable=action, value='delete').grid(row=2, column=1, sticky='w', pady=(10, 0))
+        ttk.Label(form, text="Campo:").grid(row=3, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=field, width=40).grid(row=3, column=1, sticky='w')
+        ttk.Label(form, text="Valor (JSON extendido o texto):").grid(row=4, column=0, sticky='w', pady=5)
+        ttk.Entry(form, textvariable=value, width=40).grid(row=4, column=1, sticky='w')
+
+        def request():
+            """(update, doc_ids) de la operación configurada, o None si falta algún dato."""
+            update = None
+            if action.get() == 'set':
+                name = field.get().strip()
+                if not name or name == '_id':
+                    messagebox.showwarning("Operación masiva", "Indica el campo a asignar (no puede ser '_id').", parent=dialog)
+                    return None
+                try:
+                    new_value = json_util.loads(value.get())
+                except ValueError:
+                    new_value = value.get()
+                update = {'$set': {name: new_value}}
+            doc_ids = self.data_panel.data_tree.selected_doc_ids() if scope.get() == 'selection' else None
+            return update, doc_ids
+
+        def dry_run():
+            configured = request()
+            if configured is None: return
+            self.preview_bulk_count(configured[1], lambda count: messagebox.showinfo(
+                "Simulación", f"La operación afectaría a {count} documento(s).", parent=dialog))
+
+        def execute():
+            configured = request()
+            if configured is None: return
+            dialog.destroy()
+            self.run_bulk_operation(*configured)
+
+        button_frame = ttk.Frame(dialog, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="Σ Contar (simulación)", command=dry_run, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✓ Ejecutar", command=execute, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=dialog.destroy, style='TButton').pack(side='right', padx=5)
+
+    def preview_bulk_count(self, doc_ids, on_count):
+        """Contar en segundo plano los documentos afectados por una operación masiva (simulación)."""
+        namespace = (self.current_db_name, self.current_collection_name)
+        query_filter = self.session.query_filter
+        self.executor.submit('bulk-count',
+                             lambda ticket: self.repository.count_matching(*namespace, query_filter, doc_ids),
+                             on_success=on_count,
+                             on_error=lambda e: messagebox.showerror("Operación masiva", f"Fallo al contar los documentos afectados: {e}"),
+                             client=self.client)
+
+    def run_bulk_operation(self, update, doc_ids):
+        """
+        Borrar (update=None) o aplicar update a las filas con _id en doc_ids (o, si es None, a todo el filtro actual):
+        primero se cuenta, se pide confirmación con ese total y se ejecuta en una sola pasada.
+        """
+        namespace = (self.current_db_name, self.current_collection_name)
+        query_filter = self.session.query_filter
+        what = "eliminar" if update is None else f"actualizar ({json_util.dumps(update)})"
+
+        def confirm(count):
+            if not count:
+                messagebox.showinfo("Operación masiva", "Ningún documento cumple las condiciones.")
+                return
+            scope = "de la selección" if doc_ids is not None else ("de TODA la colección" if not query_filter else "que cumplen el filtro")
+            if not messagebox.askyesno("Confirmar operación masiva",
+                                       f"Se van a {what} {count} documento(s) {scope} en {namespace[0]}.{namespace[1]}.\n\n¿Continuar?"):
+                return
+            progress = {'done': None}
+
+            def show_progress():
+                if progress['done'] is not None and namespace == (self.current_db_name, self.current_collection_name):
+                    done, total = progress['done']
+                    self.data_panel.data_label.config(
+                        text=f"Colección: {namespace[0]}.{namespace[1]} (operación masiva: {done}/{total} filas)")
+                if ticket.request_id in self.executor.in_flight:
+                    self.after(200, show_progress)
+
+            def on_done(summary):
+                self.invalidate_collection_cache(namespace)
+                self.load_documents(KeysetPaginator.RELOAD)
+                if update is None:
+                    text = f"{summary['deleted']} documento(s) eliminados"
+                else:
+                    text = f"{summary['modified']} documento(s) modificados de {summary['matched']} encontrados"
+                text += f" en {summary['elapsed']:.1f} s."
+                if summary['errors']:
+                    text += f"\n\n{len(summary['errors'])} error(es); primero: {summary['errors'][0]}"
+                messagebox.showinfo("Operación masiva", text)
+
+            ticket = self.executor.submit(
+                f'bulk:{namespace[0]}.{namespace[1]}',
+                lambda ticket: self.repository.bulk_apply(*namespace, update, query_filter, doc_ids,
+                                                          progress=lambda *p: progress.__setitem__('done', p)),
+                on_success=on_done,
+                on_error=lambda e: messagebox.showerror("Operación masiva", f"Fallo en la operación masiva: {e}"),
+                client=self.client)
+            show_progress()
+
+        self.preview_bulk_count(doc_ids, confirm)
+
+    def invalidate_collection_cache(self, namespace):
+        """Descartar las páginas en caché de una colección tras escribir en ella."""
+        self.page_cache.invalidate(namespace)
+        self.count_cache.invalidate(namespace)
+        self.field_stats_cache.invalidate(namespace)
+
+    def _render_documents(self, documents, page_label):
+        """Volcar en la tabla los documentos de la página ya obtenidos."""
+        # Tiempo total de pintado de la página; formato, volcado y separadores se miden dentro
+        with self.metrics.phase('pintado'):
+            try:
+                if not documents:
+                    self.data_panel.data_label.config(text=f"Colección: {self.current_db_name}.{self.current_collection_name} ({page_label} - Sin resultados)")
+                    self.data_panel.data_tree.set_rows([], ())
+                    self.data_panel.data_tree.config(columns=())
+                    self.grid_layout = None
+                    self.update_page_info()
+                    self.data_panel.draw_horizontal_lines()
+                    return
+
+                namespace = (self.current_db_name, self.current_collection_name)
+                if self.aggregation:
+                    # Los resultados de una agregación no siguen el esquema de la colección ni se ordenan desde la tabla
+                    sorted_keys = list(self.aggregation.columns)
+                    layout = (('aggregate',) + namespace, tuple(sorted_keys), None, 1)
+                else:
+                    all_keys = set()
+                    for doc in documents:
+                        all_keys.update(doc.keys())
+                    self.schema_service.observe(namespace, all_keys)
+
+                    # Columnas estables: las del esquema muestreado (o las de la página si aún no se conoce)
+                    sorted_keys = self.schema_service.columns(namespace, all_keys)
+                    layout = (namespace, tuple(sorted_keys), self.sort_column, self.sort_direction)
+
+                # Solo se reconfiguran columnas y encabezados cuando cambia la disposición,
+                # lo que además conserva los anchos ajustados por el usuario entre páginas
+                if layout != self.grid_layout:
+                    with self.metrics.phase('columnas'):
+                        self.data_panel.data_tree.config(columns=sorted_keys)
+
+                        for col in sorted_keys:
+                            # Determinar el texto del encabezado con indicador de ordenación
+                            header_text = col
+                            if self.sort_column == col:
+                                header_text = f"{col} {'↑' if self.sort_direction == 1 else '↓'}"
+
+                            self.data_panel.data_tree.heading(col, text=header_text, anchor='w',
+                                                             command=(lambda: None) if self.aggregation else (lambda c=col: self.toggle_sort(c)))
+                            self.data_panel.data_tree.column(col, width=MAX_COLUMN_WIDTH, anchor='w', stretch=True, minwidth=60)
+                        self.grid_layout = layout
+
+                # Solo se formatean y se crean items para las filas visibles
+                self.data_panel.data_tree.set_rows(documents, sorted_keys)
+
+                self.update_page_info()
+                self.data_panel.draw_horizontal_lines()
+
+            except Exception as e:
+                messagebox.showerror("Error de Carga", f"Fallo al mostrar documentos: {e}")
+
+    def patch_row(self, namespace, document):
+        """
+        Sustituir en la tabla la fila del documento por la versión que devolvió la escritura, sin
+        volver a consultar la página: se conservan anchos, desplazamiento y selección. Si cambió
+        el valor de la columna de ordenación la fila puede haber cambiado de sitio o de página y
+        entonces sí se recarga.
+        """
+        if namespace != (self.current_db_name, self.current_collection_name) or self.aggregation: return
+        tree = self.data_panel.data_tree
+        key = tree.row_key(document)
+        index = tree.row_index(key)
+        if index is None: return
+        sort_column = self.paginator.sort_column
+        if sort_column and tree.docs[index].get(sort_column) != document.get(sort_column):
+            self.load_documents(KeysetPaginator.RELOAD)
+            return
+        tree.apply_changes({key: ('upsert', document)}, len(tree.docs))
+
+    def remove_row(self, namespace, row_key):
+        """
+        Quitar de la tabla la fila borrada y rellenar la página con el documento siguiente (o con
+        el anterior si la página se cuenta desde el final), pedido con la misma consulta que las páginas.
+        """
+        if namespace != (self.current_db_name, self.current_collection_name) or self.aggregation: return
+        tree = self.data_panel.data_tree
+        session = self.session
+        paginator = session.paginator
+        tree.apply_changes({row_key: ('delete', None)}, len(tree.docs))
+        if not tree.docs:
+            self.load_documents(KeysetPaginator.RELOAD)
+            return
+
+        from_end = paginator.anchor == 'end'
+
+        def update_edges():
+            paginator.first_key = paginator.boundary_key(tree.docs[0])
+            paginator.last_key = paginator.boundary_key(tree.docs[-1])
+            self.update_page_info()
+            self.data_panel.draw_horizontal_lines()
+
+        update_edges()
+        if not (paginator.has_prev if from_end else paginator.has_next):
+            return
+
+        def on_neighbours(found):
+            if session is not self.session: return
+            if found is None:
+                # Clave sin rango posible (nulos o arrays): se recurre a repetir la consulta de la página
+                self.load_documents(KeysetPaginator.RELOAD)
+                return
+            if found:
+                tree.backfill(found[0], at_start=from_end)
+            if from_end:
+                paginator.has_prev = len(found) > 1
+            else:
+                paginator.has_next = len(found) > 1
+            update_edges()
+
+        edge = tree.docs[0] if from_end else tree.docs[-1]
+        self.executor.submit('backfill', lambda ticket: session.neighbours(edge, after=not from_end, **ticket.options()),
+                             on_success=on_neighbours, on_error=lambda e: self.load_documents(KeysetPaginator.RELOAD),
+                             client=self.client)
+
+    def on_cell_double_click(self, event):
+        if not self.data_panel.data_tree.selection(): return
+        if self.aggregation_read_only(): return
+
+        slot = self.data_panel.data_tree.selection()[0]
+        row_key = self.data_panel.data_tree.row_id_for_slot(slot)
+        doc_id = self.data_panel.data_tree.doc_id_for_slot(slot)
+        region = self.data_panel.data_tree.identify("region", event.x, event.y)
+        
+        if region == "cell":
+            col_id = self.data_panel.data_tree.identify_column(event.x)
+            col_index = int(col_id.replace('#', '')) - 1
+            col_name = self.data_panel.data_tree.heading(col_id)['text']
+            
+            if col_name == '_id':
+                messagebox.showwarning("Edición", "El campo '_id' no se puede editar directamente en la celda. Usa 'Ver/Editar Documento' para reemplazar el documento completo.")
+                return
+
+            # Objetos y arrays se abren en el inspector, desplegado hasta el campo, en lugar de volcarlos enteros
+            index = self.data_panel.data_tree.row_index_for_slot(slot)
+            if index is not None and isinstance(self.data_panel.data_tree.docs[index].get(col_name), (dict, list)):
+                self.open_document_inspector((self.current_db_name, self.current_collection_name), doc_id, (col_name,))
+                return
+
+            item_values = self.data_panel.data_tree.item(slot, 'values')
+            current_value = item_values[col_index] if col_index < len(item_values) else ""
+            self.open_cell_editor(row_key, doc_id, col_name, current_value)
+
+    def open_cell_editor(self, row_key, doc_id, col_name, current_value):
+        if not self.repository or not self.current_collection_name: return
+
+        namespace = (self.current_db_name, self.current_collection_name)
+
+        try:
+            viewer = tk.Toplevel(self)
+            viewer.title(f"Editar '{col_name}' de ID: {get_clean_id(doc_id)}")
+            viewer.geometry("600x400")
+            viewer.config(background='#ffffff')
+
+            is_json_field = col_name in JSON_COLUMNS or (isinstance(current_value, str) and (current_value.startswith('{') or current_value.startswith('[')))
+
+            ttk.Label(viewer, text=f"Campo: {col_name} (Tipo: {'JSON/Array' if is_json_field else 'Texto/Valor'})", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+
+            text_frame = ttk.Frame(viewer, padding=5, style='TFrame')
+            text_frame.pack(fill='both', expand=True, padx=10, pady=5)
+
+            text_widget = tk.Text(text_frame, wrap='word', borderwidth=1, relief='solid', padx=5, pady=5, font=('Consolas', 10), background='white')
+            text_widget.pack(side='left', fill='both', expand=True)
+
+            v_scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=text_widget.yview)
+            v_scrollbar.pack(side='right', fill='y')
+            text_widget.config(yscrollcommand=v_scrollbar.set)
+
+            # La tabla solo tiene una vista previa truncada: el valor completo se pide al abrir el editor,
+            # proyectando únicamente el campo editado
+            text_widget.insert('1.0', "Cargando valor completo...")
+
+            def fetch_value(ticket):
+                document = self.repository.get(*namespace, doc_id, fields=[col_name], **ticket.options())
+                if document and col_name in document:
+                    if is_json_field:
+                        return json_util.dumps(document[col_name], indent=4)
+                    return str(document[col_name])
+                return None
+
+            def show_value(formatted_value):
+                if not viewer.winfo_exists(): return
+                text_widget.delete('1.0', tk.END)
+                if formatted_value is not None:
+                    text_widget.insert('1.0', formatted_value)
+                else:
+                    text_widget.insert('1.0', current_value)
+                    messagebox.showwarning("Advertencia", "No se pudo recuperar el valor completo del campo. Se muestra el valor truncado de la tabla.")
+
+            def show_raw_value(e):
+                if not viewer.winfo_exists(): return
+                text_widget.delete('1.0', tk.END)
+                text_widget.insert('1.0', current_value)
+                messagebox.showwarning("Advertencia", f"Error al formatear JSON: {e}. Mostrando valor sin formato.")
+
+            self.executor.submit(f'cell:{row_key}:{col_name}', fetch_value,
+                                 on_success=show_value, on_error=show_raw_value, client=self.client)
+
+            button_frame = ttk.Frame(viewer, padding="10", style='TFrame')
+            button_frame.pack(fill='x', expand=False)
+
+            def copy_content():
+                content = text_widget.get('1.0', tk.END)
+                self.clipboard_clear()
+                self.clipboard_append(content)
+                viewer.title(f"✓ COPIADO - Editar '{col_name}'")
+                self.after(2000, lambda: viewer.title(f"Editar '{col_name}' de ID: {get_clean_id(doc_id)}"))
+
+            def save_cell_edition():
+                try:
+                    new_value_str = text_widget.get('1.0', tk.END).strip()
+                    
+                    if is_json_field or (isinstance(new_value_str, str) and (new_value_str.startswith('{') or new_value_str.startswith('['))):
+                        new_value = json_util.loads(new_value_str) 
+                    else:
+                        new_value = new_value_str 
+                except Exception as e:
+                    messagebox.showerror("Error de Guardado", f"El contenido no es JSON válido para este campo: {e}")
+                    return
+
+                def on_saved(document):
+                    if document is not None:
+                        self.invalidate_collection_cache(namespace)
+                        messagebox.showinfo("Éxito", f"Campo '{col_name}' actualizado correctamente.")
+                        if viewer.winfo_exists():
+                            viewer.destroy()
+                        self.patch_row(namespace, document)
+                    else:
+                        messagebox.showwarning("Error", f"No se pudo actualizar el campo '{col_name}'. Documento no encontrado.")
+
+                fields = self.session.row_fields()
+                self.executor.submit(f'write:{row_key}',
+                                     lambda ticket: self.repository.update_field(*namespace, doc_id, col_name, new_value, fields),
+                                     on_success=on_saved,
+                                     on_error=lambda e: messagebox.showerror("Error de Guardado", f"Fallo al guardar en la base de datos: {e}"),
+                                     client=self.client)
+
+            ttk.Button(button_frame, text="⎘ Copiar", command=copy_content, style='TButton').pack(side='left', padx=5)
+            ttk.Button(button_frame, text="✓ Guardar", command=save_cell_edition, style='Primary.TButton').pack(side='left', padx=15)
+            ttk.Button(button_frame, text="✖ Cerrar", command=viewer.destroy, style='TButton').pack(side='right', padx=5)
+
+        except Exception as e:
+            messagebox.showerror("Error de Visualización", f"Fallo en la visualización/edición de la celda: {e}")
+
+    def open_document_op(self):
+        if not self.data_panel.data_tree.selected_rows:
+            messagebox.showinfo("Operación", "Por favor, selecciona un documento de la tabla.")
+            return
+        if self.aggregation_read_only(): return
+
+        # El documento se abre en el inspector, que solo descarga los nodos que se despliegan
+        doc_id = self.data_panel.data_tree.selected_doc_ids()[0]
+        self.open_document_inspector((self.current_db_name, self.current_collection_name), doc_id)
+
+    def _open_document_editor(self, namespace, document, document_query, id_value_to_show):
+        try:
+            if not document:
+                messagebox.showerror("Error", f"Documento no encontrado. La consulta falló con: {document_query}.")
+                return
+
+            document_id_to_save = document['_id']
+
+            editor = tk.Toplevel(self)
+            editor.title(f"Documento ID: {id_value_to_show[:50]}...")
+            editor.geometry("700x500")
+            editor.config(background='#ffffff')
+
+            ttk.Label(editor, text="JSON del Documento:", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+
+            json_text_widget = tk.Text(editor, wrap='word', borderwidth=1, relief='flat', padx=5, pady=5, font=('Consolas', 10), background='white')
+            json_text_widget.pack(fill='both', expand=True, padx=10, pady=5)
+
+            formatted_json = json_util.dumps(document, indent=4)
+            json_text_widget.insert('1.0', formatted_json)
+
+            def save_document():
+                try:
+                    new_json_str = json_text_widget.get('1.0', tk.END)
+                    new_doc = json_util.loads(new_json_str)
+                except Exception as e:
+                    messagebox.showerror("Error de Guardado", f"Error al guardar o parsear JSON: {e}")
+                    return
+
+                update_id = document_id_to_save
+
+                def on_saved(saved):
+                    if saved is None:
+                        messagebox.showwarning("Error", "No se pudo guardar: el documento ya no existe.")
+                        return
+                    self.invalidate_collection_cache(namespace)
+                    messagebox.showinfo("Éxito", "Documento actualizado correctamente.")
+                    if editor.winfo_exists():
+                        editor.destroy()
+                    self.patch_row(namespace, saved)
+
+                fields = self.session.row_fields()
+                self.executor.submit(f'write:{id_value_to_show}',
+                                     lambda ticket: self.repository.replace(*namespace, update_id, new_doc, fields),
+                                     on_success=on_saved,
+                                     on_error=lambda e: messagebox.showerror("Error de Guardado", f"Error al guardar o parsear JSON: {e}"),
+                                     client=self.client)
+
+            button_frame = ttk.Frame(editor, padding="10", style='TFrame')
+            button_frame.pack(fill='x', expand=False)
+
+            ttk.Button(button_frame, text="✓ Guardar Documento", command=save_document, style='Primary.TButton').pack(side='left', padx=5)
+            ttk.Button(button_frame, text="✖ Cerrar", command=editor.destroy, style='TButton').pack(side='right', padx=5)
+
+        except Exception as e:
+            messagebox.showerror("Error de Documento (General)", f"Fallo al obtener/procesar el documento: {e}")
+
+    def open_document_inspector(self, namespace, doc_id, focus_path=()):
+        """
+        Documento como árbol que se despliega bajo demanda: cada nodo muestra tipo, tamaño BSON y número
+        de hijos, y al abrirlo se piden al servidor solo sus hijos. La edición en texto se limita al
+        subárbol seleccionado; focus_path despliega el árbol hasta esa ruta al abrir.
+        """
+        from .inspector import INSPECTOR_PREVIEW_CHARS, MISSING, addressable, children, describe, path_text, subtree
+
+        collection = self.repository.collection(*namespace)
+        id_value_to_show = get_clean_id(doc_id)
+
+        inspector = tk.Toplevel(self)
+        inspector.title(f"Inspector de ID: {id_value_to_show[:50]}")
+        inspector.geometry("900x600")
+        inspector.config(background='#ffffff')
+
+        ttk.Label(inspector, text=f"Documento {id_value_to_show} de {namespace[0]}.{namespace[1]}",
+                  style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+
+        tree_frame = ttk.Frame(inspector, padding=5, style='TFrame')
+        tree_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(tree_frame, columns=('type', 'size', 'count', 'value'), show='tree headings')
+        for column, text, width, stretch in (('#0', "Clave", 220, False), ('type', "Tipo", 80, False),
+                                             ('size', "Tamaño", 80, False), ('count', "Hijos", 70, False),
+                                             ('value', "Valor", 400, True)):
+            tree.heading(column, text=text, anchor='w')
+            tree.column(column, width=width, stretch=stretch, anchor='w')
+        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
+        tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        v_scrollbar.pack(side='right', fill='y')
+        h_scrollbar.pack(side='bottom', fill='x')
+        tree.pack(side='left', fill='both', expand=True)
+        tree.tag_configure('pending', foreground='gray')
+
+        status_var = tk.StringVar(value="Cargando...")
+        ttk.Label(inspector, textvariable=status_var).pack(padx=10, anchor='w')
+
+        paths = {}  # iid -> ruta del nodo (tupla de claves y posiciones)
+        more_items = {}  # iid de un nodo "… N más" -> (nodo padre, offset de la siguiente página)
+        channel = f'inspector:{id(inspector)}'
+
+        def node_values(summary):
+            value = summary['value']
+            if summary['count'] is not None:
+                preview = "{…}" if summary['type'] == 'object' else "[…]"
+            elif summary['type'] in ('binData', 'missing'):
+                preview = ""
+            elif summary['type'] == 'null':
+                preview = "null"
+            else:
+                preview = format_cell(value, INSPECTOR_PREVIEW_CHARS)
+                if summary['length'] is not None and summary['length'] > len(value):
+                    preview += f" … ({summary['length']} caracteres)"
+            count = "" if summary['count'] is None else summary['count']
+            return (summary['type'], format_bytes(summary['size']), count, preview)
+
+        def set_placeholder(iid, count):
+            for child in tree.get_children(iid):
+                tree.delete(child)
+            if count:
+                tree.insert(iid, 'end', text="Cargando...", tags=('pending',))
+
+        def is_pending(iid):
+            children_ids = tree.get_children(iid)
+            return len(children_ids) == 1 and 'pending' in tree.item(children_ids[0], 'tags')
+
+        def load(iid, offset=0):
+            path = paths[iid]
+            status_var.set(f"Cargando {path_text(path) or 'documento'}...")
+            self.executor.submit(f'{channel}:{path_text(path)}:{offset}',
+                                 lambda ticket: children(collection, doc_id, path, offset, **ticket.options()),
+                                 on_success=lambda result: show_children(iid, offset, result),
+                                 on_error=show_error, client=self.client)
+
+        def show_children(iid, offset, result):
+            if not inspector.winfo_exists() or not tree.exists(iid): return
+            if result is None:
+                status_var.set("Documento no encontrado: puede que se haya borrado.")
+                return
+            if offset == 0:
+                for child in tree.get_children(iid):
+                    tree.delete(child)
+                tree.set(iid, 'count', result['total'])
+            parent_path = paths[iid]
+            for summary in result['children']:
+                child = tree.insert(iid, 'end', text=str(summary['key']), values=node_values(summary))
+                paths[child] = parent_path + (summary['key'],)
+                set_placeholder(child, summary['count'])
+            shown = offset + len(result['children'])
+            if shown < result['total']:
+                more = tree.insert(iid, 'end', text=f"… {result['total'] - shown} más (doble clic)", tags=('pending',))
+                more_items[more] = (iid, shown)
+            status_var.set(f"{path_text(parent_path) or 'Documento'}: {result['type']}, {shown} de {result['total']} hijos")
+            follow_focus(iid)
+
+        def follow_focus(iid):
+            # Desplegar el camino hacia focus_path a medida que llegan los hijos de cada nivel
+            path = paths[iid]
+            if len(path) >= len(focus_path) or tuple(focus_path[:len(path)]) != path:
+                return
+            for child in tree.get_children(iid):
+                if paths.get(child) == path + (focus_path[len(path)],):
+                    tree.selection_set(child)
+                    tree.see(child)
+                    if len(path) + 1 < len(focus_path) or is_pending(child):
+                        tree.item(child, open=True)
+                        if is_pending(child):
+                            load(child)
+                    return
+
+        def show_error(e):
+            if not inspector.winfo_exists(): return
+            status_var.set(f"Fallo al cargar el nodo: {e}")
+
+        def on_open(event):
+            iid = tree.focus()
+            if iid in paths and is_pending(iid):
+                load(iid)
+
+        def on_double_click(event):
+            iid = tree.identify_row(event.y)
+            if iid in more_items:
+                parent, offset = more_items.pop(iid)
+                tree.delete(iid)
+                load(parent, offset)
+
+        tree.bind('<<TreeviewOpen>>', on_open)
+        tree.bind('<Double-1>', on_double_click)
+
+        root = tree.insert('', 'end', text=id_value_to_show, values=('object', "", "", ""), open=True)
+        paths[root] = ()
+        load(root)
+
+        def selected_path():
+            selection = tree.selection()
+            if not selection or selection[0] not in paths:
+                messagebox.showinfo("Inspector", "Selecciona un nodo del árbol.", parent=inspector)
+                return None
+            return selection[0], paths[selection[0]]
+
+        def copy_path():
+            selected = selected_path()
+            if selected:
+                self.clipboard_clear()
+                self.clipboard_append(path_text(selected[1]))
+                status_var.set(f"✓ Ruta copiada: {path_text(selected[1])}")
+
+        def open_full_document():
+            document_query = json_util.dumps({'_id': doc_id})
+            self.executor.submit(f'{channel}:document',
+                                 lambda ticket: self.repository.get(*namespace, doc_id, **ticket.options()),
+                                 on_success=lambda document: self._open_document_editor(namespace, document, document_query, id_value_to_show),
+                                 on_error=lambda e: messagebox.showerror("Error de Documento (General)", f"Fallo al obtener/procesar el documento: {e}"),
+                                 client=self.client)
+
+        def edit_subtree():
+            selected = selected_path()
+            if not selected: return
+            iid, path = selected
+            if not path:
+                open_full_document()
+                return
+            if path[0] == '_id':
+                messagebox.showwarning("Edición", "El campo '_id' no se puede editar: usa 'Documento completo' para reemplazar el documento.", parent=inspector)
+                return
+            if not addressable(path):
+                messagebox.showwarning("Edición", f"'{path_text(path)}' tiene claves con '.' o '$' que no se pueden escribir como ruta: "
+                                                  "edítalo desde 'Documento completo'.", parent=inspector)
+                return
+            self.executor.submit(f'{channel}:subtree',
+                                 lambda ticket: subtree(collection, doc_id, path, **ticket.options()),
+                                 on_success=lambda value: open_subtree_editor(iid, path, value),
+                                 on_error=lambda e: messagebox.showerror("Inspector", f"Fallo al obtener el subárbol: {e}", parent=inspector),
+                                 client=self.client)
+
+        def open_subtree_editor(iid, path, value):
+            if not inspector.winfo_exists(): return
+            if value is MISSING:
+                messagebox.showwarning("Inspector", f"'{path_text(path)}' ya no existe en el documento.", parent=inspector)
+                return
+            field = path_text(path)
+
+            editor = tk.Toplevel(inspector)
+            editor.title(f"Editar '{field}' de ID: {id_value_to_show[:50]}")
+            editor.geometry("700x500")
+            editor.config(background='#ffffff')
+
+            ttk.Label(editor, text=f"Subárbol {field} (JSON extendido):", style='Title.TLabel').pack(padx=10, pady=5, anchor='w')
+            text_widget = tk.Text(editor, wrap='word', borderwidth=1, relief='flat', padx=5, pady=5, font=('Consolas', 10), background='white')
+            text_widget.pack(fill='both', expand=True, padx=10, pady=5)
+            text_widget.insert('1.0', json_util.dumps(value, indent=4))
+
+            def save_subtree():
+                try:
+                    new_value = json_util.loads(text_widget.get('1.0', tk.END))
+                except Exception as e:
+                    messagebox.showerror("Error de Guardado", f"El contenido no es JSON válido: {e}", parent=editor)
+                    return
+
+                def on_saved(document):
+                    if document is None:
+                        messagebox.showwarning("Error", "No se pudo guardar: el documento ya no existe.", parent=editor)
+                        return
+                    self.invalidate_collection_cache(namespace)
+                    if editor.winfo_exists():
+                        editor.destroy()
+                    self.patch_row(namespace, document)
+                    # El nodo se resume con el valor guardado y sus hijos se vuelven a pedir si estaba abierto
+                    if inspector.winfo_exists() and tree.exists(iid):
+                        summary = describe(path[-1], new_value)
+                        tree.item(iid, values=node_values(summary))
+                        set_placeholder(iid, summary['count'])
+                        if summary['count'] and tree.item(iid, 'open'):
+                            load(iid)
+                        status_var.set(f"✓ '{field}' actualizado")
+
+                session = self.session
+                fields = session.row_fields() if session and session.namespace == namespace else None
+                self.executor.submit(f'write:{id_value_to_show}',
+                                     lambda ticket: self.repository.update_field(*namespace, doc_id, field, new_value, fields),
+                                     on_success=on_saved,
+                                     on_error=lambda e: messagebox.showerror("Error de Guardado", f"Fallo al guardar en la base de datos: {e}", parent=editor),
+                                     client=self.client)
+
+            button_frame = ttk.Frame(editor, padding="10", style='TFrame')
+            button_frame.pack(fill='x', expand=False)
+            ttk.Button(button_frame, text="✓ Guardar Subárbol", command=save_subtree, style='Primary.TButton').pack(side='left', padx=5)
+            ttk.Button(button_frame, text="✖ Cerrar", command=editor.destroy, style='TButton').pack(side='right', padx=5)
+
+        button_frame = ttk.Frame(inspector, padding="10", style='TFrame')
+        button_frame.pack(fill='x', expand=False)
+        ttk.Button(button_frame, text="✎ Editar subárbol", command=edit_subtree, style='Primary.TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="⎘ Copiar ruta", command=copy_path, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="{ } Documento completo", command=open_full_document, style='TButton').pack(side='left', padx=5)
+        ttk.Button(button_frame, text="✖ Cerrar", command=inspector.destroy, style='TButton').pack(side='right', padx=5)
+
+    def delete_document_op(self):
+        """
+        Elimina el documento seleccionado de la colección actual, previa confirmación.
+        """
+        if not self.data_panel.data_tree.selected_rows:
+            messagebox.showinfo("Operación", "Por favor, selecciona un documento de la tabla para eliminar.")
+            return
+        if self.aggregation_read_only(): return
+
+        if not self.current_db_name or not self.current_collection_name:
+            messagebox.showwarning("Error", "No hay una colección seleccionada.")
+            return
+
+        if len(self.data_panel.data_tree.selected_rows) > 1:
+            # Varias filas: un único bulk_write en lugar de un borrado y un diálogo por documento
+            self.run_bulk_operation(None, self.data_panel.data_tree.selected_doc_ids())
+            return
+
+        row_key = self.data_panel.data_tree.selected_row_ids()[0]
+        doc_id = self.data_panel.data_tree.selected_doc_ids()[0]
+        id_value_to_show = get_clean_id(doc_id)
+
+        confirm = messagebox.askyesno(
+            "Confirmar Eliminación",
+            f"¿Está seguro que desea eliminar el documento con ID: {id_value_to_show} de la colección {self.current_collection_name}?\n\nEsta acción es irreversible."
+        )
+
+        if not confirm:
+            return
+
+        namespace = (self.current_db_name, self.current_collection_name)
+
+        def on_deleted(result):
+            if result.deleted_count == 1:
+                # El total conocido se descuenta en lugar de volver a contar
+                count = self.count_cache.get(self.current_count_key) if self.current_count_key else None
+                self.invalidate_collection_cache(namespace)
+                if count and count[1]:
+                    self.count_cache.put(self.current_count_key, count[0] - 1, True)
+                messagebox.showinfo("Éxito", f"Documento con ID {id_value_to_show} eliminado correctamente.")
+                self.remove_row(namespace, row_key)
+            else:
+                messagebox.showerror("Error", f"No se pudo eliminar el documento. Documento no encontrado o error en la consulta.")
+
+        self.executor.submit(f'write:{row_key}', lambda ticket: self.repository.delete(*namespace, doc_id),
+                             on_success=on_deleted,
+                             on_error=lambda e: messagebox.showerror("Error de Eliminación", f"Fallo al eliminar el documento: {e}"),
+                             client=self.client)
+
+def main(argv=None, early_connection=None):
+    """Abrir la interfaz; con una URI en argv (o en $MONGO_URI) se conecta ya durante el arranque."""
+    argv = sys.argv[1:] if argv is None else argv
+    uri = startup_uri(argv)
+    if uri and early_connection is None:
+        early_connection = EarlyConnection(uri)
+    app = MongoExplorerApp(uri, early_connection)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""Importación masiva por lotes desde JSON Lines, arrays de JSON extendido o volcados BSON, sin dependencias de Tk."""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import io
+import json
+import time
+
+import bson
+from bson import json_util
+from bson.raw_bson import RawBSONDocument
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from .exporter import EXPORT_EXTENSIONS, open_binary, compression_for
+
+IMPORT_FORMATS = ('jsonl', 'json', 'bson')
+IMPORT_MODES = ('insert', 'upsert')
+IMPORT_BATCH_SIZE = 1000  # Documentos por insert_many/bulk_write
+IMPORT_WORKERS = 4  # Lotes escritos en paralelo (cada uno con su conexión del pool)
+IMPORT_MAX_ERRORS = 100  # Mensajes de error que se conservan en el informe
+IMPORT_READ_CHUNK = 64 * 1024  # Caracteres leídos de cada vez al recorrer un array JSON
+
+
+def import_format_for(path):
+    """Formato deducido de la extensión del fichero (sin contar la de compresión): jsonl, json o bson."""
+    base = path[:-len(EXPORT_EXTENSIONS[compression_for(path)])] if compression_for(path) else path
+    if base.endswith('.bson'):
+        return 'bson'
+    if base.endswith('.json'):
+        return 'json'
+    return 'jsonl'
+
+
+def iter_jsonl(stream):
+    """Documentos de un fichero JSON Lines (JSON extendido, uno por línea)."""
+    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+        line = line.strip()
+        if line:
+            yield json_util.loads(line)
+
+
+def iter_json(stream):
+    """
+    Documentos de un array de JSON extendido ([{...}, {...}]) o de documentos concatenados,
+    decodificados uno a uno sin cargar el fichero entero en memoria.
+    """
+    decoder = json.JSONDecoder(object_pairs_hook=json_util.object_pairs_hook)
+    text = io.TextIOWrapper(stream, encoding='utf-8')
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        # Separadores entre documentos: espacios, comas y los corchetes del array
+        while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+            position += 1
+        if position == len(buffer):
+            if eof:
+                return
+            buffer, position = text.read(IMPORT_READ_CHUNK), 0
+            eof = not buffer
+            continue
+        try:
+            document, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Documento incompleto: se añade el siguiente fragmento y se vuelve a intentar
+            chunk = text.read(IMPORT_READ_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield document
+        position = end
+
+
+def iter_bson(stream):
+    """
+    Documentos de un volcado BSON (mongodump/exportación BSON), sin decodificarlos. Los que no
+    tienen _id se decodifican: pymongo solo puede añadírselo a un dict, no a un RawBSONDocument.
+    """
+    while True:
+        header = stream.read(4)
+        if not header:
+            return
+        if len(header) < 4:
+            raise ValueError("Volcado BSON truncado.")
+        size = int.from_bytes(header, 'little')
+        body = stream.read(size - 4)
+        if len(body) < size - 4:
+            raise ValueError("Volcado BSON truncado.")
+        document = RawBSONDocument(header + body)
+        # Lo habitual es que _id sea el primer campo (tipo, '_id', NUL): se comprueba sin decodificar nada
+        if body[1:5] != b'_id\x00' and '_id' not in document:
+            document = bson.decode(header + body)
+        yield document
+
+
+READERS = {'jsonl': iter_jsonl, 'json': iter_json, 'bson': iter_bson}
+
+
+class ImportJob:
+    """
+    Carga un fichero en una colección leyéndolo en streaming y escribiendo lotes de
+    batch_size documentos con insert_many(ordered=False) o, en modo upsert, con un
+    bulk_write(ordered=False) de ReplaceOne por _id (los que ya existen sin cambios cuentan como
+    encontrados, no como reemplazados). Varios lotes se escriben a la vez,
+    pero nunca hay más de 2 × workers lotes en memoria. Los errores de un lote se anotan
+    en el informe y la carga continúa con el siguiente.
+    """
+
+    def __init__(self, collection, path, fmt=None, mode='insert', batch_size=IMPORT_BATCH_SIZE, workers=IMPORT_WORKERS):
+        fmt = fmt or import_format_for(path)
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Formato de importación no soportado: {fmt}")
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Modo de importación no soportado: {mode}")
+        self.collection = collection
+        self.path = path
+        self.fmt = fmt
+        self.mode = mode
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def _batches(self, stream):
+        batch = []
+        for document in READERS[self.fmt](stream):
+            batch.append(document)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _write(self, batch_number, batch):
+        """Escribir un lote (en un hilo del pool) y devolver sus contadores y errores."""
+        result = {'batch': batch_number, 'inserted': 0, 'upserted': 0, 'matched': 0, 'modified': 0, 'failed': 0, 'errors': []}
+        try:
+            if self.mode == 'insert':
+                result['inserted'] = len(self.collection.insert_many(batch, ordered=False).inserted_ids)
+            else:
+                requests = [ReplaceOne({'_id': doc['_id']}, doc, upsert=True) if '_id' in doc else InsertOne(doc)
+                            for doc in batch]
+                written = self.collection.bulk_write(requests, ordered=False)
+                result.update(inserted=written.inserted_count, upserted=written.upserted_count,
+                              matched=written.matched_count, modified=written.modified_count)
+        except BulkWriteError as e:
+            details = e.details
+            result.update(inserted=details.get('nInserted', 0), upserted=details.get('nUpserted', 0),
+                          matched=details.get('nMatched', 0), modified=details.get('nModified', 0))
+            result['errors'] = [(error['index'], error.get('errmsg', '')) for error in details.get('writeErrors', [])]
+            result['failed'] = len(result['errors'])
+        except Exception as e:
+            # Fallo del lote completo (red, permisos...): se anota y se sigue con el resto
+            result['errors'] = [(None, str(e))]
+            result['failed'] = len(batch)
+        return result
+
+    def run(self, progress=None, cancel=None):
+        """
+        Ejecutar la importación. progress(leídos, escritos, errores, docs/s) se llama al terminar
+        cada lote; cancel es un objeto con is_set() que se consulta entre lotes.
+        Devuelve un dict con los contadores, 'errors' (lote, índice, mensaje), 'elapsed', 'rate' y 'cancelled'.
+        """
+        report = {'read': 0, 'inserted': 0, 'upserted': 0, 'matched': 0, 'modified': 0, 'failed': 0, 'errors': [], 'cancelled': False}
+        started = time.monotonic()
+
+        def collect(future):
+            result = future.result()
+            for key in ('inserted', 'upserted', 'matched', 'modified'):
+                report[key] += result[key]
+            report['failed'] += result['failed']
+            for index, message in result['errors']:
+                if len(report['errors']) < IMPORT_MAX_ERRORS:
+                    report['errors'].append((result['batch'], index, message))
+            if progress:
+                # Un reemplazo que encuentra el documento cuenta aunque lo deje igual (matched incluye modified)
+                written = report['inserted'] + report['upserted'] + report['matched']
+                progress(report['read'], written, report['failed'], self._rate(report['read'], started))
+
+        with open_binary(self.path, 'rb', compression_for(self.path)) as stream, \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mongo-import') as pool:
+            pending = set()
+            for batch_number, batch in enumerate(self._batches(stream)):
+                if cancel is not None and cancel.is_set():
+                    report['cancelled'] = True
+                    break
+                # Memoria acotada: no se lee otro lote hasta que haya hueco en la cola de escritura
+                while len(pending) >= 2 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+                report['read'] += len(batch)
+                pending.add(pool.submit(self._write, batch_number, batch))
+            for future in wait(pending).done:
+                collect(future)
+
+        report['elapsed'] = time.monotonic() - started
+        report['rate'] = self._rate(report['read'], started)
+        return report
+
+    @staticmethod
+    def _rate(documents, started):
+        elapsed = time.monotonic() - started
+        return documents / elapsed if elapsed else 0.0
@@ -0,0 +1,186 @@
+"""
+Inspección de documentos grandes por partes, sin dependencias de Tk: de cada nodo (la raíz del
+documento o un valor en una ruta de claves y posiciones de array) se piden al servidor solo sus
+hijos inmediatos ya resumidos (tipo, tamaño BSON, número de hijos y un anticipo de los escalares)
+mediante un $project sobre la ruta, y el valor completo solo del subárbol que se va a editar.
+"""
+import datetime
+import re
+
+import bson
+from bson.binary import Binary
+from bson.decimal128 import Decimal128
+from bson.objectid import ObjectId
+from bson.regex import Regex
+from bson.timestamp import Timestamp
+from pymongo.errors import OperationFailure
+
+INSPECTOR_PAGE_SIZE = 200  # Hijos de un nodo que se piden de una vez
+INSPECTOR_PREVIEW_CHARS = 120  # Caracteres del anticipo de un string
+
+MISSING = object()  # Valor de una ruta que no existe en el documento
+
+
+def path_text(path):
+    """Ruta en la notación con puntos de MongoDB ('attrs.temperature.value', 'attrNames.3')."""
+    return '.'.join(str(segment) for segment in path)
+
+
+def addressable(path):
+    """
+    Si la ruta se puede escribir con puntos: una clave con '.' o que empieza por '$' no cabe
+    en una ruta de campo, ni para proyectarla en una agregación ni para un $set.
+    """
+    return all(isinstance(segment, int) or ('.' not in segment and not segment.startswith('$')) for segment in path)
+
+
+def path_expr(path):
+    """Expresión de agregación con el valor en path (tupla de claves y posiciones de array)."""
+    expr = None
+    for segment in path:
+        if isinstance(segment, int):
+            expr = {'$arrayElemAt': ['$$ROOT' if expr is None else expr, segment]}
+        elif expr is None:
+            expr = f"${segment}"
+        elif isinstance(expr, str):
+            expr = f"{expr}.{segment}"
+        else:
+            expr = {'$let': {'vars': {'node': expr}, 'in': f"$$node.{segment}"}}
+    return '$$ROOT' if expr is None else expr
+
+
+def _describe_expr(value):
+    """Resumen de un valor calculado en el servidor: tipo, tamaño, hijos, anticipo y longitud de los strings."""
+    kind = {'$type': value}
+    return {
+        'type': kind,
+        # $bsonSize solo admite documentos: se mide el valor envuelto en uno (unos bytes de más)
+        'size': {'$bsonSize': {'v': value}},
+        'count': {'$switch': {'branches': [
+            {'case': {'$eq': [kind, 'object']}, 'then': {'$size': {'$objectToArray': value}}},
+            {'case': {'$eq': [kind, 'array']}, 'then': {'$size': value}},
+        ], 'default': None}},
+        'value': {'$switch': {'branches': [
+            {'case': {'$in': [kind, ['object', 'array', 'binData']]}, 'then': None},
+            {'case': {'$eq': [kind, 'string']}, 'then': {'$substrCP': [value, 0, INSPECTOR_PREVIEW_CHARS]}},
+        ], 'default': value}},
+        'length': {'$cond': [{'$eq': [kind, 'string']}, {'$strLenCP': value}, None]},
+    }
+
+
+def children_pipeline(doc_id, path, offset=0, limit=INSPECTOR_PAGE_SIZE):
+    """Agregación que devuelve el tipo del nodo en path, su número de hijos y el resumen de los hijos pedidos."""
+    node_count = {'$switch': {'branches': [
+        {'case': {'$eq': [{'$type': '$node'}, 'object']}, 'then': {'$size': {'$objectToArray': '$node'}}},
+        {'case': {'$isArray': '$node'}, 'then': {'$size': '$node'}},
+    ], 'default': 0}}
+    return [
+        {'$match': {'_id': doc_id}},
+        {'$project': {'_id': 0, 'node': path_expr(path)}},
+        {'$project': {
+            'type': {'$type': '$node'},
+            'total': node_count,
+            'children': {'$switch': {'branches': [
+                {'case': {'$eq': [{'$type': '$node'}, 'object']}, 'then': {'$map': {
+                    'input': {'$slice': [{'$objectToArray': '$node'}, offset, limit]}, 'as': 'field',
+                    'in': dict(key='$$field.k', **_describe_expr('$$field.v'))}}},
+                {'case': {'$isArray': '$node'}, 'then': {'$map': {
+                    'input': {'$range': [offset, {'$min': [{'$size': '$node'}, offset + limit]}]}, 'as': 'i',
+                    'in': {'$let': {'vars': {'item': {'$arrayElemAt': ['$node', '$$i']}},
+                                    'in': dict(key='$$i', **_describe_expr('$$item'))}}}}},
+            ], 'default': []}},
+        }},
+    ]
+
+
+def type_name(value):
+    """Nombre del tipo BSON de un valor de Python, como lo da $type."""
+    if value is MISSING:
+        return 'missing'
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int' if -2 ** 31 <= value < 2 ** 31 else 'long'
+    for types, name in (((dict,), 'object'), ((list, tuple), 'array'), ((str,), 'string'), ((float,), 'double'),
+                        ((datetime.datetime,), 'date'), ((ObjectId,), 'objectId'), ((Binary, bytes), 'binData'),
+                        ((Decimal128,), 'decimal'), ((Timestamp,), 'timestamp'), ((re.Pattern, Regex), 'regex')):
+        if isinstance(value, types):
+            return name
+    return type(value).__name__
+
+
+def describe(key, value):
+    """Resumen de un valor ya descargado, con la misma forma que el que calcula el servidor."""
+    kind = type_name(value)
+    try:
+        size = len(bson.encode({'v': value}))
+    except Exception:
+        size = None
+    summary = {'key': key, 'type': kind, 'size': size, 'count': None, 'value': None, 'length': None}
+    if kind == 'object':
+        summary['count'] = len(value)
+    elif kind == 'array':
+        summary['count'] = len(value)
+    elif kind == 'string':
+        summary['value'] = value[:INSPECTOR_PREVIEW_CHARS]
+        summary['length'] = len(value)
+    elif kind not in ('binData', 'missing'):
+        summary['value'] = value
+    return summary
+
+
+def _walk(document, path):
+    value = document
+    for segment in path:
+        if isinstance(segment, int):
+            if not isinstance(value, list) or not -len(value) <= segment < len(value):
+                return MISSING
+        elif not isinstance(value, dict) or segment not in value:
+            return MISSING
+        value = value[segment]
+    return value
+
+
+def subtree(collection, doc_id, path, max_time_ms=None, comment=None):
+    """Valor completo en path, proyectado en el servidor; MISSING si no existe la ruta o el documento."""
+    if not path or not addressable(path):
+        # La raíz, o una ruta que no se puede expresar: se trae el campo de primer nivel y se recorre aquí
+        options = {'max_time_ms': max_time_ms, 'comment': comment}
+        projection = {path[0]: 1} if path and addressable(path[:1]) else None
+        document = collection.find_one({'_id': doc_id}, projection, **{k: v for k, v in options.items() if v})
+        return MISSING if document is None else _walk(document, path)
+    options = {'maxTimeMS': max_time_ms, 'comment': comment}
+    pipeline = [{'$match': {'_id': doc_id}}, {'$project': {'_id': 0, 'node': path_expr(path)}}]
+    result = next(collection.aggregate(pipeline, **{k: v for k, v in options.items() if v}), None)
+    return MISSING if result is None else result.get('node', MISSING)
+
+
+def children(collection, doc_id, path, offset=0, limit=INSPECTOR_PAGE_SIZE, max_time_ms=None, comment=None):
+    """
+    Hijos inmediatos del nodo en path, del offset-ésimo en adelante (como mucho limit), resumidos
+    con describe(). Devuelve {'type', 'total', 'children'} o None si el documento no existe.
+    Si el servidor no tiene $bsonSize (anterior a 4.4) o la ruta no se puede expresar en una
+    agregación, se descarga el subárbol y se resume aquí.
+    """
+    if addressable(path):
+        options = {'maxTimeMS': max_time_ms, 'comment': comment}
+        try:
+            return next(collection.aggregate(children_pipeline(doc_id, path, offset, limit),
+                                             **{k: v for k, v in options.items() if v}), None)
+        except OperationFailure as e:
+            if 'bsonSize' not in str(e):
+                raise
+    value = subtree(collection, doc_id, path, max_time_ms, comment)
+    if value is MISSING and not path:
+        return None
+    if isinstance(value, dict):
+        items = list(value.items())[offset:offset + limit]
+        total = len(value)
+    elif isinstance(value, list):
+        items = list(enumerate(value))[offset:offset + limit]
+        total = len(value)
+    else:
+        items, total = [], 0
+    return {'type': type_name(value), 'total': total, 'children': [describe(key, item) for key, item in items]}
@@ -0,0 +1,126 @@
+"""Seguimiento en vivo de una colección con change streams, sin dependencias de Tk."""
+from collections import OrderedDict
+import threading
+
+from bson import json_util
+from pymongo.errors import OperationFailure, PyMongoError
+
+LIVE_FRAME_MS = 100  # Intervalo mínimo entre dos refrescos de la tabla en modo en vivo
+LIVE_MAX_AWAIT_MS = 500  # Espera máxima de cada getMore del change stream (y del aviso de parada)
+LIVE_RECONNECT_MAX_SECONDS = 10  # Tope de la espera entre reintentos tras perder la conexión
+
+# Eventos que terminan el stream: la colección ya no existe o ha cambiado de nombre
+TERMINAL_EVENTS = ('drop', 'dropDatabase', 'rename', 'invalidate')
+
+
+def _prefix_filter(query_filter):
+    """Reescribir un filtro de find para aplicarlo a fullDocument dentro de un evento de cambio."""
+    prefixed = {}
+    for key, value in query_filter.items():
+        if key in ('$and', '$or', '$nor'):
+            prefixed[key] = [_prefix_filter(clause) for clause in value]
+        elif key.startswith('$'):
+            raise ValueError(f"El operador {key} no se puede aplicar a un change stream.")
+        else:
+            prefixed[f"fullDocument.{key}"] = value
+    return prefixed
+
+
+def change_stream_pipeline(query_filter):
+    """
+    Pipeline del change stream equivalente al filtro de la tabla: las inserciones y
+    modificaciones deben cumplir el filtro sobre el documento completo; los borrados y los
+    eventos terminales pasan siempre (un borrado no trae documento con el que comparar).
+    Una modificación que saca al documento del filtro no llega y su fila queda como estaba.
+    """
+    if not query_filter:
+        return []
+    return [{'$match': {'$or': [
+        {'operationType': {'$in': ['delete', *TERMINAL_EVENTS]}},
+        {'$and': [{'operationType': {'$in': ['insert', 'update', 'replace']}}, _prefix_filter(query_filter)]},
+    ]}}]
+
+
+class ChangeTail:
+    """
+    Escucha un change stream en un hilo propio y acumula los cambios por documento: si un
+    mismo documento cambia mil veces entre dos refrescos, solo se conserva el último estado.
+    drain() entrega lo acumulado (pensado para llamarse una vez por fotograma de la interfaz).
+    Tras una caída de la conexión (p. ej. el port-forward) se reabre el stream desde el
+    último resume token recibido, sin perder eventos.
+    """
+
+    def __init__(self, collection, query_filter=None, resume_token=None):
+        self.collection = collection
+        self.namespace = (collection.database.name, collection.name)
+        self.query_filter = query_filter or {}
+        self.pipeline = change_stream_pipeline(self.query_filter)
+        self.resume_token = resume_token
+        self.pending = OrderedDict()  # clave de fila -> ('upsert', documento) o ('delete', None)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.error = None
+        self.ended = None  # Tipo del evento terminal, si lo hubo
+        self.events = 0
+        self.reconnects = 0
+        self.thread = None
+
+    @staticmethod
+    def row_key(document_id):
+        # La misma clave que usa la tabla para identificar sus filas
+        return json_util.dumps(document_id)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='mongo-live', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _record(self, change):
+        operation = change['operationType']
+        if operation in TERMINAL_EVENTS:
+            self.ended = operation
+            self.stop_event.set()
+            return
+        key = self.row_key(change['documentKey']['_id'])
+        document = change.get('fullDocument')
+        # Un update cuyo documento ya no existe al buscarlo (updateLookup) equivale a un borrado
+        entry = ('upsert', document) if operation != 'delete' and document is not None else ('delete', None)
+        with self.lock:
+            self.pending.pop(key, None)
+            self.pending[key] = entry
+            self.events += 1
+
+    def _run(self):
+        delay = 1
+        while not self.stop_event.is_set():
+            try:
+                with self.collection.watch(self.pipeline, full_document='updateLookup',
+                                           resume_after=self.resume_token, max_await_time_ms=LIVE_MAX_AWAIT_MS) as stream:
+                    delay = 1
+                    while not self.stop_event.is_set():
+                        change = stream.try_next()
+                        if change is not None:
+                            self._record(change)
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                # Errores del servidor no recuperables (p. ej. no es un replica set o el token ha caducado)
+                self.error = e
+                return
+            except PyMongoError:
+                # Conexión perdida: se reintenta con espera creciente desde el último token
+                self.reconnects += 1
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, LIVE_RECONNECT_MAX_SECONDS)
+
+    def drain(self):
+        """Cambios acumulados desde la última llamada, en orden de llegada y ya agrupados por documento."""
+        with self.lock:
+            pending, self.pending = self.pending, OrderedDict()
+        return pending
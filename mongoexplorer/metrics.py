@@ -0,0 +1,183 @@
+"""Instrumentación de latencia y volumen: monitorización de comandos de pymongo y tiempos de pintado, sin dependencias de Tk."""
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import json
+import math
+import threading
+import time
+
+import bson
+from pymongo import monitoring
+
+METRICS_SAMPLES = 1000  # Muestras que se conservan por comando o fase (las más recientes)
+METRICS_PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, p):
+    """Percentil p (0-100) por el método del rango más cercano; None si no hay valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _describe(values):
+    summary = {'count': len(values), 'max': max(values) if values else None}
+    for p in METRICS_PERCENTILES:
+        summary[f'p{p}'] = percentile(values, p)
+    return summary
+
+
+class Metrics:
+    """
+    Almacén de medidas compartido por los listeners de pymongo (que llegan desde los hilos
+    del driver) y por la interfaz: latencia y bytes devueltos por comando, getMore de los
+    cursores, latido de los servidores (el tiempo de ida y vuelta del túnel), eventos del pool
+    de conexiones y duración de las fases de pintado de la tabla.
+    """
+
+    def __init__(self, samples=METRICS_SAMPLES):
+        self.samples = samples
+        self.lock = threading.Lock()
+        # Los contadores del pool no se reinician: de ellos sale el número de conexiones abiertas y en uso
+        self.pool = defaultdict(int)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.commands = defaultdict(lambda: deque(maxlen=self.samples))  # nombre -> (ms, bytes)
+            self.failures = defaultdict(int)
+            self.heartbeats = deque(maxlen=self.samples)
+            self.phases = defaultdict(lambda: deque(maxlen=self.samples))
+
+    def listeners(self):
+        """Listeners para MongoClient(event_listeners=...)."""
+        return [_CommandListener(self), _PoolListener(self), _HeartbeatListener(self)]
+
+    def record_command(self, name, duration_ms, reply_bytes):
+        with self.lock:
+            self.commands[name].append((duration_ms, reply_bytes))
+
+    def record_failure(self, name, duration_ms):
+        with self.lock:
+            self.failures[name] += 1
+            self.commands[name].append((duration_ms, 0))
+
+    def record_heartbeat(self, duration_ms):
+        with self.lock:
+            self.heartbeats.append(duration_ms)
+
+    def count_pool_event(self, kind):
+        with self.lock:
+            self.pool[kind] += 1
+
+    def record_phase(self, name, duration_ms):
+        with self.lock:
+            self.phases[name].append(duration_ms)
+
+    @contextmanager
+    def phase(self, name):
+        """Cronometrar un bloque como una fase de pintado: with metrics.phase('formato'): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, (time.perf_counter() - started) * 1000)
+
+    def summary(self):
+        """Resumen serializable: percentiles de latencia por comando y fase, bytes, getMore, pool y latidos."""
+        with self.lock:
+            commands = {name: list(samples) for name, samples in self.commands.items()}
+            phases = {name: list(samples) for name, samples in self.phases.items()}
+            heartbeats = list(self.heartbeats)
+            failures = dict(self.failures)
+            pool = dict(self.pool)
+        result = {'since': self.started_at, 'commands': {}, 'render_phases': {}, 'pool': pool,
+                  'heartbeat_ms': _describe(heartbeats)}
+        # Estado actual del pool a partir de los contadores de eventos
+        result['pool_open'] = pool.get('connections_created', 0) - pool.get('connections_closed', 0)
+        result['pool_in_use'] = pool.get('checked_out', 0) - pool.get('checked_in', 0)
+        for name, samples in commands.items():
+            durations = [duration for duration, _ in samples]
+            reply_bytes = [size for _, size in samples]
+            result['commands'][name] = dict(_describe(durations), failures=failures.get(name, 0),
+                                            bytes_total=sum(reply_bytes), bytes_max=max(reply_bytes))
+        # Cada getMore es un viaje más por el túnel para el mismo cursor
+        result['getmore_count'] = len(commands.get('getMore', []))
+        for name, durations in phases.items():
+            result['render_phases'][name] = _describe(durations)
+        return result
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2, default=str)
+
+
+class _CommandListener(monitoring.CommandListener):
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        # Tamaño aproximado de la respuesta reconstruido a partir del documento ya decodificado
+        try:
+            reply_bytes = len(bson.encode(event.reply))
+        except Exception:
+            reply_bytes = 0
+        self.metrics.record_command(event.command_name, event.duration_micros / 1000, reply_bytes)
+
+    def failed(self, event):
+        self.metrics.record_failure(event.command_name, event.duration_micros / 1000)
+
+
+class _PoolListener(monitoring.ConnectionPoolListener):
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def pool_created(self, event):
+        self.metrics.count_pool_event('pool_created')
+
+    def pool_cleared(self, event):
+        self.metrics.count_pool_event('pool_cleared')
+
+    def pool_closed(self, event):
+        self.metrics.count_pool_event('pool_closed')
+
+    def connection_created(self, event):
+        self.metrics.count_pool_event('connections_created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.metrics.count_pool_event('connections_closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.metrics.count_pool_event('check_out_failed')
+
+    def connection_checked_out(self, event):
+        self.metrics.count_pool_event('checked_out')
+
+    def connection_checked_in(self, event):
+        self.metrics.count_pool_event('checked_in')
+
+
+class _HeartbeatListener(monitoring.ServerHeartbeatListener):
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        # El latido es un hello de ida y vuelta: con port-forward mide sobre todo el túnel
+        self.metrics.record_heartbeat(event.duration * 1000)
+
+    def failed(self, event):
+        self.metrics.count_pool_event('heartbeat_failed')
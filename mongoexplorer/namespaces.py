@@ -0,0 +1,113 @@
+"""Metadatos de bases de datos y colecciones (documentos, tamaño, índices) con caché en disco, sin dependencias de Tk."""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import json
+import os
+import time
+
+from pymongo.errors import PyMongoError
+
+from .profiles import CONFIG_DIR, profile_key
+
+NAMESPACES_PATH = os.path.join(CONFIG_DIR, 'namespaces.json')
+NAMESPACE_WORKERS = 4  # Comandos de estadísticas simultáneos; pocos para no acaparar el pool de conexiones
+NAMESPACE_MAX_AGE = 60  # Segundos durante los que una base de datos de la caché no se vuelve a consultar
+
+
+def _stats_or_none(function, *args):
+    # Las vistas no admiten collStats y un usuario sin permisos no puede pedir dbStats: se muestran sin datos
+    try:
+        return function(*args)
+    except PyMongoError:
+        return None
+
+
+def fetch_namespaces(repository, db_names=None, skip=(), on_database=None, workers=NAMESPACE_WORKERS):
+    """
+    Colecciones y estadísticas (dbStats y collStats de cada colección) de las bases de datos
+    indicadas, o de todas menos las de skip. Los comandos se reparten entre workers hilos y,
+    en cuanto una base de datos está completa, se entrega a on_database(nombre, entrada) en el
+    hilo que llama. Devuelve la lista de bases de datos existentes.
+    """
+    listed = repository.list_databases() if db_names is None else list(db_names)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mongo-ns') as pool:
+        pending = {}  # future -> (tipo, base de datos, colección)
+        entries = {}
+        remaining = {}
+        for db_name in listed:
+            if db_name in skip:
+                continue
+            pending[pool.submit(repository.list_collections, db_name)] = ('collections', db_name, None)
+            pending[pool.submit(_stats_or_none, repository.database_stats, db_name)] = ('database', db_name, None)
+            entries[db_name] = {'at': time.time(), 'stats': None, 'collections': {}}
+            remaining[db_name] = 2
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, db_name, collection_name = pending.pop(future)
+                entry = entries[db_name]
+                remaining[db_name] -= 1
+                if kind == 'collections':
+                    try:
+                        collection_names = future.result()
+                    except PyMongoError as e:
+                        entry['error'] = str(e)
+                        collection_names = []
+                    for name in collection_names:
+                        entry['collections'][name] = None
+                        remaining[db_name] += 1
+                        task = pool.submit(_stats_or_none, repository.collection_stats, db_name, name)
+                        pending[task] = ('collection', db_name, name)
+                elif kind == 'database':
+                    entry['stats'] = future.result()
+                else:
+                    entry['collections'][collection_name] = future.result()
+                if remaining[db_name] == 0 and on_database:
+                    on_database(db_name, entry)
+    return listed
+
+
+class NamespaceCache:
+    """
+    Última lista de bases de datos y colecciones vista en cada URI, con sus estadísticas, en un
+    fichero JSON: el árbol de navegación se pinta con ella al arrancar y se revalida después.
+    """
+
+    def __init__(self, path=NAMESPACES_PATH):
+        self.path = path
+        self.servers = None
+
+    def _load(self):
+        if self.servers is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.servers = json.load(f)
+            except (OSError, ValueError):
+                self.servers = {}
+        return self.servers
+
+    def databases(self, uri):
+        """Entradas guardadas de la URI: nombre -> {'at', 'stats', 'collections': {nombre: stats}}."""
+        return self._load().get(profile_key(uri), {})
+
+    def put(self, uri, db_name, entry):
+        self._load().setdefault(profile_key(uri), {})[db_name] = entry
+
+    def retain(self, uri, db_names):
+        """Olvidar las bases de datos de la URI que ya no existen."""
+        databases = self.databases(uri)
+        for db_name in set(databases) - set(db_names):
+            del databases[db_name]
+
+    def fresh(self, uri, max_age=NAMESPACE_MAX_AGE):
+        """Bases de datos cuya entrada es lo bastante reciente como para no volver a consultarla."""
+        now = time.time()
+        return {name for name, entry in self.databases(uri).items()
+                if now - entry.get('at', 0) < max_age and 'error' not in entry}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._load(), f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,97 @@
+"""Perfiles de conexión por URI (compresión, pool, timeouts, lotes) guardados en disco, sin dependencias de Tk."""
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+CONFIG_DIR = os.environ.get('MONGOEXPLORER_HOME', os.path.join(os.path.expanduser('~'), '.mongoexplorer'))
+PROFILES_PATH = os.path.join(CONFIG_DIR, 'profiles.json')
+READ_PREFERENCES = ('primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest')
+
+# Pensados para un port-forward: poco ancho de banda y mucha latencia, pocas conexiones reutilizadas
+DEFAULT_PROFILE = {
+    'compressors': ['zstd', 'snappy', 'zlib'],  # Por orden de preferencia; se negocia con el servidor
+    'zlib_level': 6,
+    'max_pool_size': 10,
+    'min_pool_size': 1,  # Una conexión caliente evita pagar el handshake a través del túnel
+    'max_idle_time_ms': 300000,
+    'connect_timeout_ms': 10000,
+    'socket_timeout_ms': 0,  # 0 = sin límite; las consultas ya llevan maxTimeMS
+    'server_selection_timeout_ms': 5000,
+    'batch_size': 0,  # 0 = el del servidor; si no, documentos por lote de los cursores
+    'read_preference': 'primary',
+}
+
+
+def available_compressors():
+    """Compresores que este intérprete puede usar: zlib siempre; snappy y zstd si están instalados."""
+    available = []
+    try:
+        import zstandard  # noqa: F401
+        available.append('zstd')
+    except ImportError:
+        pass
+    try:
+        import snappy  # noqa: F401
+        available.append('snappy')
+    except ImportError:
+        pass
+    available.append('zlib')
+    return available
+
+
+def profile_key(uri):
+    """URI sin usuario ni contraseña: así se identifica el perfil sin guardar credenciales en disco."""
+    parts = urlsplit(uri)
+    host = parts.netloc.rsplit('@', 1)[-1]
+    return urlunsplit((parts.scheme, host, parts.path or '/', parts.query, ''))
+
+
+def client_options(profile):
+    """Argumentos de MongoClient para un perfil (los compresores no instalados se descartan)."""
+    profile = dict(DEFAULT_PROFILE, **profile)
+    usable = [name for name in profile['compressors'] if name in available_compressors()]
+    options = {
+        'maxPoolSize': profile['max_pool_size'],
+        'minPoolSize': profile['min_pool_size'],
+        'maxIdleTimeMS': profile['max_idle_time_ms'],
+        'connectTimeoutMS': profile['connect_timeout_ms'],
+        'socketTimeoutMS': profile['socket_timeout_ms'] or None,
+        'serverSelectionTimeoutMS': profile['server_selection_timeout_ms'],
+        'readPreference': profile['read_preference'],
+    }
+    if usable:
+        options['compressors'] = ','.join(usable)
+        if 'zlib' in usable:
+            options['zlibCompressionLevel'] = profile['zlib_level']
+    return options
+
+
+class ProfileStore:
+    """Perfiles de conexión por URI en un fichero JSON; los campos no guardados toman DEFAULT_PROFILE."""
+
+    def __init__(self, path=PROFILES_PATH):
+        self.path = path
+        self.profiles = None
+
+    def _load(self):
+        if self.profiles is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.profiles = json.load(f)
+            except (OSError, ValueError):
+                self.profiles = {}
+        return self.profiles
+
+    def get(self, uri):
+        return dict(DEFAULT_PROFILE, **self._load().get(profile_key(uri), {}))
+
+    def put(self, uri, profile):
+        """Guardar un perfil (solo lo que difiere de los valores por defecto)."""
+        changed = {key: value for key, value in profile.items() if DEFAULT_PROFILE.get(key) != value}
+        profiles = self._load()
+        profiles[profile_key(uri)] = changed
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profiles, f, indent=2)
+        os.replace(tmp_path, self.path)
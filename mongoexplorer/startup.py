@@ -0,0 +1,66 @@
+"""
+Arranque rápido de la interfaz: la conexión empieza en un hilo propio (importando pymongo y
+haciendo el handshake a través del túnel) mientras el hilo principal carga Tk y construye
+los widgets. Este módulo no importa nada pesado para no retrasar ese arranque.
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+
+VALUE_OPTIONS = ('--uri', '--metrics')  # Opciones globales de la CLI que llevan valor y se admiten sin subcomando
+
+
+def startup_uri(argv):
+    """
+    URI con la que conectar al arrancar: la de --uri, el primer argumento que no es una opción
+    (lo que pasa run.sh) o $MONGO_URI. El resto de opciones y sus valores se ignoran.
+    """
+    uri = None
+    args = iter(argv)
+    for arg in args:
+        name, equals, value = arg.partition('=')
+        if name in VALUE_OPTIONS:
+            value = value if equals else next(args, None)
+            if name == '--uri' and value:
+                return value
+        elif not arg.startswith('-') and uri is None:
+            uri = arg
+    return uri or os.environ.get('MONGO_URI')
+
+
+class EarlyConnection:
+    """
+    Repository.connect lanzado antes de que exista la interfaz. metrics se crea en el propio
+    hilo (sus listeners tienen que registrarse al crear el cliente) y wait_metrics() permite
+    a la aplicación adoptarlo sin esperar a la red; result() espera a la conexión.
+    """
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.future = Future()
+        self.metrics = None
+        self.metrics_ready = threading.Event()
+        threading.Thread(target=self._run, name='mongo-connect', daemon=True).start()
+
+    def _run(self):
+        try:
+            from .core import Repository
+            from .metrics import Metrics
+            from .profiles import ProfileStore
+            self.metrics = Metrics()
+            self.metrics_ready.set()
+            repository = Repository.connect(self.uri, ProfileStore().get(self.uri), event_listeners=self.metrics.listeners())
+        except BaseException as e:
+            self.metrics_ready.set()
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(repository)
+
+    def wait_metrics(self):
+        """Métricas asociadas al cliente que se está creando (None si falló antes de crearlas)."""
+        self.metrics_ready.wait()
+        return self.metrics
+
+    def result(self):
+        return self.future.result()
@@ -37,8 +37,10 @@ if [ -z "$KUBECONFIG_PATH" ]; then
 fi
 
 
-PYTHON_SCRIPT="mongoexplorer.py"
-MONGO_URI="mongodb://127.0.0.1:27018/" # URI que utiliza el port-forward local
+PYTHON_MODULE="mongoexplorer"
+LOCAL_PORT=27018 # Puerto local del port-forward
+MONGO_URI="mongodb://127.0.0.1:$LOCAL_PORT/" # URI que utiliza el port-forward local
+PORT_FORWARD_TIMEOUT=30 # Segundos máximos de espera a que el túnel acepte conexiones
 VENV_DIR="venv" # Usamos una ruta relativa por defecto
 
 echo "--- 1. Verificando Kubeconfig y permisos ---"
@@ -61,11 +63,16 @@ fi
 # 2. INSTALACIÓN DE DEPENDENCIAS (si es necesario)
 # ------------------------------------------------------------------------------
 
-echo "--- 2. Instalando o actualizando dependencias del sistema (se requiere sudo) ---"
-# Se asume que el usuario está en una distribución basada en Debian/Ubuntu
-sudo apt update
-# Aseguramos la instalación de python3-dev para compilaciones nativas si fueran necesarias.
-sudo apt install -y python3-pip python3-tk python3.12-venv python3-dev || { echo "ERROR: Falló la instalación de paquetes. Deteniendo." ; exit 1; }
+# Solo se instala si falta algo: en los arranques siguientes este paso no cuesta nada
+if python3 -c "import tkinter, venv, ensurepip" 2>/dev/null; then
+    echo "--- 2. Dependencias del sistema ya instaladas ---"
+else
+    echo "--- 2. Instalando o actualizando dependencias del sistema (se requiere sudo) ---"
+    # Se asume que el usuario está en una distribución basada en Debian/Ubuntu
+    sudo apt update
+    # Aseguramos la instalación de python3-dev para compilaciones nativas si fueran necesarias.
+    sudo apt install -y python3-pip python3-tk python3.12-venv python3-dev || { echo "ERROR: Falló la instalación de paquetes. Deteniendo." ; exit 1; }
+fi
 
 # ------------------------------------------------------------------------------
 # 3. CONFIGURACIÓN DEL ENTORNO VIRTUAL
@@ -80,13 +87,15 @@ echo "--- 4. Activando entorno virtual e instalando pymongo ---"
 # Activación del entorno virtual
 source "$VENV_DIR/bin/activate" || { echo "ERROR: No se pudo activar el entorno virtual." ; exit 1; }
 
-# Instalar la dependencia de pymongo.
-pip install --upgrade pip
-pip install pymongo==3.12.1 || { 
-    echo "ERROR: Falló la instalación de pymongo. Deteniendo." 
-    deactivate
-    exit 1 
-}
+# Instalar la dependencia de pymongo (solo si no está ya la versión esperada).
+if ! python -c "import pymongo, sys; sys.exit(pymongo.version != '3.12.1')" 2>/dev/null; then
+    pip install --upgrade pip
+    pip install pymongo==3.12.1 || { 
+        echo "ERROR: Falló la instalación de pymongo. Deteniendo." 
+        deactivate
+        exit 1 
+    }
+fi
 
 # ------------------------------------------------------------------------------
 # 4. CONFIGURACIÓN KUBECTL Y PORT-FORWARD
@@ -98,10 +107,27 @@ echo "--- 5. Configurando KUBECONFIG y ejecutando Port-Forward ---"
 export KUBECONFIG="$KUBECONFIG_PATH"
 
 # Comando kubectl port-forward
-kubectl port-forward svc/mongo-svc 27018:27017 -n ccoc &
+kubectl port-forward svc/mongo-svc "$LOCAL_PORT":27017 -n ccoc &
 PORT_FORWARD_PID=$!
-echo "Port-Forward (PID: $PORT_FORWARD_PID) iniciado. Esperando 5 segundos..."
-sleep 5
+echo "Port-Forward (PID: $PORT_FORWARD_PID) iniciado. Esperando a que el puerto $LOCAL_PORT acepte conexiones..."
+
+# En lugar de una espera fija se sondea el puerto local: se continúa en cuanto el túnel está listo
+READY=0
+for _ in $(seq 1 "$((PORT_FORWARD_TIMEOUT * 10))"); do
+    if ! kill -0 "$PORT_FORWARD_PID" 2>/dev/null; then
+        echo "ERROR: kubectl port-forward terminó antes de estar listo."
+        deactivate
+        exit 1
+    fi
+    if (exec 3<>"/dev/tcp/127.0.0.1/$LOCAL_PORT") 2>/dev/null; then
+        READY=1
+        break
+    fi
+    sleep 0.1
+done
+if [ "$READY" -ne 1 ]; then
+    echo "AVISO: el puerto $LOCAL_PORT no respondió en $PORT_FORWARD_TIMEOUT s; la aplicación seguirá reintentando al conectar."
+fi
 
 # ------------------------------------------------------------------------------
 # 5. EJECUCIÓN DE LA APLICACIÓN PYTHON
@@ -109,8 +135,8 @@ sleep 5
 
 echo "--- 6. Ejecutando Mongo Explorer ---"
 
-# Ejecutar el script Python con la URI pasada como argumento
-python3 "$PYTHON_SCRIPT" "$MONGO_URI"
+# Ejecutar la aplicación Python con la URI pasada como argumento
+python3 -m "$PYTHON_MODULE" "$MONGO_URI"
 
 # ------------------------------------------------------------------------------
 # 6. LIMPIEZA
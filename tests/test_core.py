@@ -0,0 +1,263 @@
+"""Pruebas del núcleo sin servidor: paginación, formato de celdas y análisis de consultas."""
+import datetime
+
+from bson.objectid import ObjectId
+import pytest
+
+from mongoexplorer.core import (
+    PREVIEW_MARKER, AggregationSession, KeysetPaginator, format_cell, parse_filter, parse_pipeline, summarize_explain,
+)
+
+
+def _commit_first(paginator, documents, page_size=2):
+    plan = paginator.plan(KeysetPaginator.FIRST, page_size)
+    return paginator.commit(plan, list(documents), page_size)
+
+
+class _EdgeCollection:
+    """Colección falsa que solo responde al find_one de check_types con el primer y el último valor."""
+
+    def __init__(self, field, values):
+        self.field = field
+        self.values = values
+        self.calls = 0
+
+    def find_one(self, query_filter, projection, sort, **options):
+        self.calls += 1
+        (_, direction), = sort
+        return {self.field: self.values[0] if direction == 1 else self.values[-1]}
+
+
+def test_range_filter_on_id():
+    paginator = KeysetPaginator()
+    assert paginator.range_filter((5,), after=True) == {'_id': {'$gt': 5}}
+    assert paginator.range_filter((5,), after=False) == {'_id': {'$lt': 5}}
+    paginator.reset(sort_direction=-1)
+    assert paginator.range_filter((5,), after=True) == {'_id': {'$lt': 5}}
+
+
+def test_range_filter_breaks_ties_on_id():
+    paginator = KeysetPaginator()
+    paginator.reset('modDate', -1)
+    assert paginator.sort_spec() == [('modDate', -1), ('_id', -1)]
+    assert paginator.range_filter((10, 'b'), after=True) == {'$or': [
+        {'modDate': {'$lt': 10}},
+        {'modDate': 10, '_id': {'$lt': 'b'}},
+    ]}
+
+
+def test_next_page_uses_range_from_last_key():
+    paginator = KeysetPaginator()
+    page = _commit_first(paginator, [{'_id': 1}, {'_id': 2}, {'_id': 3}])
+    assert page == [{'_id': 1}, {'_id': 2}]
+    assert paginator.has_next and not paginator.has_prev
+    plan = paginator.plan(KeysetPaginator.NEXT, 2)
+    assert plan['range'] == {'_id': {'$gt': 2}}
+    assert plan['skip'] == 0 and not plan['reverse']
+    assert plan['page_index'] == 1
+
+
+def test_previous_page_is_read_backwards_and_reversed():
+    paginator = KeysetPaginator()
+    _commit_first(paginator, [{'_id': 1}, {'_id': 2}, {'_id': 3}])
+    paginator.commit(paginator.plan(KeysetPaginator.NEXT, 2), [{'_id': 3}, {'_id': 4}], 2)
+    plan = paginator.plan(KeysetPaginator.PREV, 2)
+    assert plan['range'] == {'_id': {'$lt': 3}}
+    assert plan['sort'] == [('_id', -1)] and plan['reverse']
+    # El servidor devuelve la página en orden inverso; commit la vuelve a poner en orden de lectura
+    page = paginator.commit(plan, [{'_id': 2}, {'_id': 1}], 2)
+    assert page == [{'_id': 1}, {'_id': 2}]
+    assert paginator.page_index == 0 and paginator.has_next
+
+
+def test_last_page_counts_from_the_end():
+    paginator = KeysetPaginator()
+    plan = paginator.plan(KeysetPaginator.LAST, 2)
+    assert plan['reverse'] and plan['anchor'] == 'end'
+    page = paginator.commit(plan, [{'_id': 9}, {'_id': 8}, {'_id': 7}], 2)
+    assert page == [{'_id': 8}, {'_id': 9}]
+    assert paginator.has_prev and not paginator.has_next
+    assert paginator.page_label() == "Última página"
+    assert paginator.plan(KeysetPaginator.PREV, 2)['range'] == {'_id': {'$lt': 8}}
+
+
+def test_null_or_array_keys_fall_back_to_skip():
+    for value in (None, [1, 2]):
+        paginator = KeysetPaginator()
+        paginator.reset('attr', 1)
+        _commit_first(paginator, [{'_id': 1, 'attr': 0}, {'_id': 2, 'attr': value}, {'_id': 3, 'attr': 5}])
+        plan = paginator.plan(KeysetPaginator.NEXT, 2)
+        assert plan['range'] is None
+        assert plan['skip'] == 2
+
+
+def test_without_index_pages_with_skip():
+    paginator = KeysetPaginator()
+    paginator.reset('attr', 1, use_keyset=False)
+    _commit_first(paginator, [{'_id': 1, 'attr': 1}, {'_id': 2, 'attr': 2}, {'_id': 3, 'attr': 3}])
+    assert paginator.plan(KeysetPaginator.NEXT, 2)['skip'] == 2
+
+
+def test_mixed_key_types_fall_back_to_skip():
+    paginator = KeysetPaginator()
+    collection = _EdgeCollection('_id', [ObjectId(), 'texto'])
+    assert paginator.check_types(collection, {})
+    # El resultado se recuerda para el mismo filtro y orden
+    assert paginator.check_types(collection, {}) and collection.calls == 2
+    assert not paginator.types_known({'type': 'Device'})
+    _commit_first(paginator, [{'_id': ObjectId()}, {'_id': ObjectId()}, {'_id': 'a'}])
+    plan = paginator.plan(KeysetPaginator.NEXT, 2)
+    assert plan['range'] is None and plan['skip'] == 2
+
+
+def test_numbers_of_different_types_share_a_bracket():
+    paginator = KeysetPaginator()
+    paginator.reset('value', 1)
+    assert not paginator.check_types(_EdgeCollection('value', [1, 2.5]), {})
+    assert KeysetPaginator.type_bracket(True) == 'bool'
+    assert KeysetPaginator.type_bracket(3) == KeysetPaginator.type_bracket(3.5) == 'number'
+    assert KeysetPaginator.type_bracket(None) == 'null'
+
+
+class _AggregateCollection:
+    """Colección falsa cuyo aggregate solo aplica las etapas $skip y $limit sobre una lista de documentos."""
+
+    class Cursor:
+        def __init__(self, documents):
+            self.documents = iter(documents)
+
+        def __iter__(self):
+            return self.documents
+
+        def close(self):
+            pass
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.pipelines = []
+
+    def aggregate(self, pipeline, **options):
+        self.pipelines.append(pipeline)
+        documents = self.documents
+        for stage in pipeline:
+            documents = documents[stage.get('$skip', 0):][:stage.get('$limit')]
+        return self.Cursor(documents)
+
+
+class _Repository:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def collection(self, db_name, collection_name):
+        return self._collection
+
+
+class _Untouchable:
+    """Valor que no debe llegar a convertirse: format_cell tiene que parar antes."""
+
+    def __str__(self):
+        raise AssertionError("format_cell recorrió más de lo que cabe en la celda")
+
+
+def test_format_cell_scalars():
+    assert format_cell(None) == ""
+    assert format_cell("x" * 10, 4) == "xxxx"
+    assert format_cell(3.5) == "3.5"
+    assert format_cell(b"abc") == "Binary(3 B)"
+
+
+def test_format_cell_writes_compact_json():
+    value = {'a': 1, 'b': [True, None], 'd': datetime.datetime(2024, 1, 1), 'o': ObjectId('0' * 24)}
+    assert format_cell(value) == '{"a":1,"b":[true,null],"d":Date(2024-01-01T00:00:00),"o":ObjectId(000000000000000000000000)}'
+
+
+def test_format_cell_truncates_with_size_prefix():
+    assert format_cell({f"k{i}": i for i in range(100)}, 20) == '(100 claves) {"k0":0...'
+    assert format_cell(list(range(100)), 20) == '(100 elementos) [0,1...'
+
+
+def test_format_cell_stops_at_the_cell_width():
+    value = list(range(1000)) + [_Untouchable()]
+    assert format_cell(value, 30).startswith("(1001 elementos) [0,1,2")
+
+
+def test_format_cell_server_previews():
+    assert format_cell({PREVIEW_MARKER: 'array', 'size': 50, 'head': [1, 2]}) == '[1,2,…+48]'
+    assert format_cell({PREVIEW_MARKER: 'object', 'size': 7, 'head': None}) == '{…7 claves}'
+
+
+def test_summarize_explain_index_scan():
+    result = {
+        'queryPlanner': {'winningPlan': {'stage': 'LIMIT', 'inputStage': {
+            'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'modDate_1__id_1'}}}},
+        'executionStats': {'totalKeysExamined': 21, 'totalDocsExamined': 21, 'nReturned': 21, 'executionTimeMillis': 3},
+    }
+    summary = summarize_explain(result)
+    assert summary['plan'] == 'LIMIT ← FETCH ← IXSCAN'
+    assert summary['indexes'] == ['modDate_1__id_1']
+    assert not summary['collscan'] and not summary['in_memory_sort']
+    assert summary['returned'] == 21 and summary['time_ms'] == 3
+    assert summary['warnings'] == []
+
+
+def test_summarize_explain_warns_about_collscan_sort_and_ratio():
+    result = {
+        'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}}},
+        'executionStats': {'totalKeysExamined': 0, 'totalDocsExamined': 5000, 'nReturned': 20},
+    }
+    summary = summarize_explain(result)
+    assert summary['collscan'] and summary['in_memory_sort']
+    assert len(summary['warnings']) == 3
+    assert "5000" in summary['warnings'][2]
+
+
+def test_summarize_explain_reads_the_cursor_stage_of_an_aggregation():
+    result = {'stages': [
+        {'$cursor': {'queryPlanner': {'winningPlan': {'stage': 'IXSCAN', 'indexName': '_id_'}},
+                     'executionStats': {'nReturned': 5, 'totalKeysExamined': 5}}},
+        {'$project': {}},
+    ]}
+    summary = summarize_explain(result)
+    assert summary['plan'] == 'IXSCAN' and summary['indexes'] == ['_id_']
+    assert summary['returned'] == 5
+
+
+def test_parse_pipeline_reads_extended_json():
+    pipeline = parse_pipeline('[{"$match": {"_id": {"$oid": "%s"}}}, {"$limit": 5}]' % ('0' * 24))
+    assert pipeline == [{'$match': {'_id': ObjectId('0' * 24)}}, {'$limit': 5}]
+    # Una sola etapa sin corchetes también vale
+    assert parse_pipeline('{"$count": "n"}') == [{'$count': 'n'}]
+    assert parse_pipeline('') == []
+
+
+@pytest.mark.parametrize('text', [
+    '5',
+    '[{"$match": {}, "$limit": 1}]',
+    '[{"match": {}}]',
+    '[{"$out": "copia"}, {"$match": {}}]',
+])
+def test_parse_pipeline_rejects_invalid_stages(text):
+    with pytest.raises(ValueError):
+        parse_pipeline(text)
+
+
+def test_parse_filter_requires_an_object():
+    assert parse_filter('  ') == {}
+    assert parse_filter('{"modDate": {"$gt": {"$date": "2024-01-01T00:00:00Z"}}}')['modDate']['$gt'].year == 2024
+    with pytest.raises(ValueError):
+        parse_filter('[1]')
+
+
+def test_aggregation_keeps_a_window_of_pages():
+    collection = _AggregateCollection([{'n': i} for i in range(25)])
+    session = AggregationSession(_Repository(collection), 'orion', 'entities', [], page_size=2, preview_limit=0, page_window=3)
+    # Sin límite de vista previa, ir a la última página recorre el cursor sin quedarse con todo
+    assert session.read_page(AggregationSession.LAST) == (12, [{'n': 24}])
+    assert list(session.pages) == [10, 11, 12] and len(collection.pipelines) == 1
+    session.page_index = 12
+    assert session.page_label() == "Página 13 de 13 (25 docs)" and not session.has_next()
+    # Una página que salió de la ventana se vuelve a pedir con $skip
+    assert session.read_page(1) == (1, [{'n': 2}, {'n': 3}])
+    assert collection.pipelines[-1] == [{'$skip': 2}, {'$limit': 2}]
+    assert list(session.pages) == [11, 12, 1]
+    assert session.read_page(12) == (12, [{'n': 24}]) and len(collection.pipelines) == 2
@@ -0,0 +1,103 @@
+"""Pruebas de los lectores de importación y del reparto en lotes, sin servidor."""
+from collections import OrderedDict
+import gzip
+import io
+
+import bson
+from bson import json_util
+from bson.objectid import ObjectId
+from bson.raw_bson import RawBSONDocument
+import pytest
+
+from mongoexplorer.importer import ImportJob, import_format_for, iter_bson, iter_json, iter_jsonl
+
+
+class _Collection:
+    """Colección falsa que anota los lotes recibidos por insert_many."""
+
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+        class Result:
+            inserted_ids = [None] * len(documents)
+
+        return Result()
+
+
+class _UnchangedCollection:
+    """Colección falsa en la que todos los documentos del upsert ya existen tal cual."""
+
+    def bulk_write(self, requests, ordered=True):
+        class Result:
+            inserted_count = upserted_count = modified_count = 0
+            matched_count = len(requests)
+
+        return Result()
+
+
+def test_import_format_for():
+    assert import_format_for('dump/entities.bson') == 'bson'
+    assert import_format_for('entities.json.gz') == 'json'
+    assert import_format_for('entities.jsonl.zst') == 'jsonl'
+    assert import_format_for('entities.txt') == 'jsonl'
+
+
+def test_iter_jsonl_reads_extended_json_and_skips_blank_lines():
+    data = b'{"_id": {"$oid": "' + b'0' * 24 + b'"}}\n\n{"n": 1}\n'
+    assert list(iter_jsonl(io.BytesIO(data))) == [{'_id': ObjectId('0' * 24)}, {'n': 1}]
+
+
+def test_iter_json_reads_an_array_across_chunks(monkeypatch):
+    # Fragmentos diminutos para que cada documento quede partido entre lecturas
+    monkeypatch.setattr('mongoexplorer.importer.IMPORT_READ_CHUNK', 7)
+    documents = [{'n': i, 'text': 'ñ' * i} for i in range(20)]
+    data = ('[\n' + ',\n'.join(json_util.dumps(doc) for doc in documents) + '\n]').encode('utf-8')
+    assert list(iter_json(io.BytesIO(data))) == documents
+
+
+def test_iter_json_reads_concatenated_documents():
+    assert list(iter_json(io.BytesIO(b'{"a": 1} {"a": 2}'))) == [{'a': 1}, {'a': 2}]
+
+
+def test_iter_json_rejects_a_truncated_file():
+    with pytest.raises(ValueError):
+        list(iter_json(io.BytesIO(b'[{"a": 1}, {"a": ')))
+
+
+def test_iter_bson_keeps_documents_raw_and_decodes_those_without_id():
+    data = bson.encode({'_id': 1, 'a': 2}) + bson.encode({'a': 3}) + bson.encode(OrderedDict([('a', 4), ('_id', 5)]))
+    documents = list(iter_bson(io.BytesIO(data)))
+    assert isinstance(documents[0], RawBSONDocument) and documents[0]['_id'] == 1
+    # Sin _id se decodifica para que insert_many pueda asignarle uno
+    assert documents[1] == {'a': 3} and isinstance(documents[1], dict)
+    assert isinstance(documents[2], RawBSONDocument) and documents[2]['_id'] == 5
+
+
+def test_iter_bson_rejects_a_truncated_dump():
+    with pytest.raises(ValueError):
+        list(iter_bson(io.BytesIO(bson.encode({'a': 1})[:-2])))
+
+
+def test_import_job_writes_in_batches(tmp_path):
+    path = tmp_path / 'entities.jsonl.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for i in range(25):
+            f.write(f'{{"n": {i}}}\n')
+    collection = _Collection()
+    report = ImportJob(collection, str(path), batch_size=10, workers=2).run()
+    assert report['read'] == report['inserted'] == 25 and report['failed'] == 0
+    assert sorted(len(batch) for batch in collection.batches) == [5, 10, 10]
+
+
+def test_upsert_counts_unchanged_documents_as_written(tmp_path):
+    path = tmp_path / 'entities.jsonl'
+    path.write_text(''.join(f'{{"_id": {i}}}\n' for i in range(5)))
+    progress = []
+    report = ImportJob(_UnchangedCollection(), str(path), mode='upsert', batch_size=2, workers=1).run(
+        progress=lambda *args: progress.append(args))
+    assert report['matched'] == 5 and report['modified'] == 0 and report['failed'] == 0
+    # Volver a importar el mismo volcado no parece una pérdida de datos
+    assert progress[-1][:3] == (5, 5, 0)
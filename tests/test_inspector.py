@@ -0,0 +1,98 @@
+"""Pruebas del inspector de documentos sin servidor: rutas, resúmenes y recorrido en el cliente."""
+import bson
+from pymongo.errors import OperationFailure
+
+from mongoexplorer.inspector import (
+    INSPECTOR_PREVIEW_CHARS, MISSING, addressable, children, children_pipeline, describe, path_expr, path_text, subtree,
+)
+
+DOCUMENT = {'_id': 1, 'attrs': {'temp': {'value': 21.5, 'mdNames': []}, 'a.b': 5},
+            'attrNames': ['temp', 'x' * 300, {'nested': None}]}
+
+
+class _Collection:
+    """
+    Colección falsa de un servidor sin $bsonSize (anterior a 4.4): la agregación con resúmenes
+    falla y la que solo proyecta la ruta se resuelve aquí.
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self.find_calls = []
+
+    def aggregate(self, pipeline, **options):
+        bson.encode({'pipeline': pipeline})  # El pipeline tiene que poder enviarse
+        if 'bsonSize' in str(pipeline):
+            raise OperationFailure("Unrecognized expression '$bsonSize'")
+        if pipeline[0]['$match']['_id'] != self.document['_id']:
+            return iter([])
+        node = _resolve(self.document, pipeline[1]['$project']['node'])
+        # Como el servidor, una ruta que no existe no aparece en el resultado
+        return iter([{} if node is MISSING else {'node': node}])
+
+    def find_one(self, query_filter, projection=None, **options):
+        self.find_calls.append(projection)
+        return self.document if query_filter['_id'] == self.document['_id'] else None
+
+
+def _resolve(document, expr):
+    # Lo justo de path_expr para la prueba: rutas con puntos y $arrayElemAt
+    if isinstance(expr, str):
+        value = document
+        for key in expr[1:].split('.'):
+            value = value.get(key, MISSING) if isinstance(value, dict) else MISSING
+        return value
+    array, index = expr['$arrayElemAt']
+    return _resolve(document, array)[index]
+
+
+def test_paths():
+    assert path_text(('attrNames', 2, 'nested')) == 'attrNames.2.nested'
+    assert path_expr(()) == '$$ROOT'
+    assert path_expr(('attrs', 'temp')) == '$attrs.temp'
+    assert path_expr(('attrNames', 2, 'nested')) == {
+        '$let': {'vars': {'node': {'$arrayElemAt': ['$attrNames', 2]}}, 'in': '$$node.nested'}}
+    assert addressable(('attrNames', 2)) and not addressable(('attrs', 'a.b')) and not addressable(('$x',))
+
+
+def test_describe():
+    assert describe('attrs', DOCUMENT['attrs']) == {
+        'key': 'attrs', 'type': 'object', 'size': len(bson.encode({'v': DOCUMENT['attrs']})),
+        'count': 2, 'value': None, 'length': None}
+    text = describe(1, 'x' * 300)
+    assert text['type'] == 'string' and text['length'] == 300 and len(text['value']) == INSPECTOR_PREVIEW_CHARS
+    assert describe('n', 2 ** 40)['type'] == 'long'
+    assert describe('n', None)['type'] == 'null'
+
+
+def test_children_pipeline_pages_children():
+    pipeline = children_pipeline(1, ('attrNames',), offset=200, limit=100)
+    assert pipeline[0] == {'$match': {'_id': 1}}
+    assert pipeline[1] == {'$project': {'_id': 0, 'node': '$attrNames'}}
+    array_branch = pipeline[2]['$project']['children']['$switch']['branches'][1]['then']['$map']
+    assert array_branch['input'] == {'$range': [200, {'$min': [{'$size': '$node'}, 300]}]}
+
+
+def test_children_falls_back_to_the_client_without_bson_size():
+    collection = _Collection(DOCUMENT)
+    result = children(collection, 1, ('attrNames',), offset=1, limit=1)
+    assert result['type'] == 'array' and result['total'] == 3
+    assert [child['key'] for child in result['children']] == [1]
+    assert result['children'][0]['length'] == 300
+
+
+def test_children_of_the_root_and_unaddressable_paths():
+    collection = _Collection(DOCUMENT)
+    root = children(collection, 1, ())
+    assert [child['key'] for child in root['children']] == ['_id', 'attrs', 'attrNames']
+    # Una clave con '.' no cabe en una ruta: se trae el campo de primer nivel y se recorre aquí
+    nested = children(collection, 1, ('attrs', 'a.b'))
+    assert nested == {'type': 'int', 'total': 0, 'children': []}
+    assert collection.find_calls[-1] == {'attrs': 1}
+
+
+def test_missing_documents_and_paths():
+    collection = _Collection(DOCUMENT)
+    assert children(collection, 2, ()) is None
+    assert subtree(collection, 1, ('attrs', 'nope', 'x')) is MISSING
+    assert subtree(collection, 1, ('attrNames', 2)) == {'nested': None}
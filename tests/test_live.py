@@ -0,0 +1,62 @@
+"""Pruebas del modo en vivo sin servidor: pipeline del change stream y agrupación de cambios."""
+import pytest
+
+from mongoexplorer.live import ChangeTail, _prefix_filter, change_stream_pipeline
+
+
+class _Collection:
+    name = 'entities'
+
+    class database:
+        name = 'orion'
+
+
+def _change(operation, doc_id, document=None):
+    change = {'operationType': operation, 'documentKey': {'_id': doc_id}}
+    if document is not None:
+        change['fullDocument'] = document
+    return change
+
+
+def test_prefix_filter_applies_to_full_document():
+    assert _prefix_filter({'_id.type': 'Device', '$or': [{'a': 1}, {'b': {'$gt': 2}}]}) == {
+        'fullDocument._id.type': 'Device',
+        '$or': [{'fullDocument.a': 1}, {'fullDocument.b': {'$gt': 2}}],
+    }
+
+
+def test_prefix_filter_rejects_top_level_operators():
+    with pytest.raises(ValueError):
+        _prefix_filter({'$where': 'this.a > 1'})
+
+
+def test_change_stream_pipeline():
+    assert change_stream_pipeline({}) == []
+    (stage,) = change_stream_pipeline({'type': 'Device'})
+    deletes, writes = stage['$match']['$or']
+    # Los borrados y los eventos terminales pasan siempre; el resto debe cumplir el filtro
+    assert 'delete' in deletes['operationType']['$in'] and 'drop' in deletes['operationType']['$in']
+    assert writes['$and'][1] == {'fullDocument.type': 'Device'}
+
+
+def test_change_tail_keeps_only_the_last_state_of_each_document():
+    tail = ChangeTail(_Collection())
+    tail._record(_change('insert', 1, {'_id': 1, 'v': 1}))
+    tail._record(_change('update', 2, {'_id': 2, 'v': 1}))
+    tail._record(_change('update', 1, {'_id': 1, 'v': 2}))
+    tail._record(_change('delete', 2))
+    # Un update sin documento (ya borrado al buscarlo) cuenta como borrado
+    tail._record(_change('update', 3))
+    pending = tail.drain()
+    assert list(pending.items()) == [
+        (ChangeTail.row_key(1), ('upsert', {'_id': 1, 'v': 2})),
+        (ChangeTail.row_key(2), ('delete', None)),
+        (ChangeTail.row_key(3), ('delete', None)),
+    ]
+    assert tail.events == 5 and tail.drain() == {}
+
+
+def test_change_tail_stops_on_terminal_events():
+    tail = ChangeTail(_Collection())
+    tail._record({'operationType': 'drop'})
+    assert tail.ended == 'drop' and tail.stop_event.is_set()
@@ -0,0 +1,32 @@
+"""Pruebas de la URI con la que arranca la interfaz."""
+import pytest
+
+from mongoexplorer.startup import startup_uri
+
+
+@pytest.fixture(autouse=True)
+def no_env_uri(monkeypatch):
+    monkeypatch.delenv('MONGO_URI', raising=False)
+
+
+def test_positional_uri_as_passed_by_run_sh():
+    assert startup_uri(['mongodb://host:27018/']) == 'mongodb://host:27018/'
+
+
+def test_uri_option():
+    assert startup_uri(['--uri', 'mongodb://a/']) == 'mongodb://a/'
+    assert startup_uri(['--uri=mongodb://b/']) == 'mongodb://b/'
+    # --uri manda sobre un argumento suelto
+    assert startup_uri(['mongodb://a/', '--uri', 'mongodb://b/']) == 'mongodb://b/'
+
+
+def test_other_options_and_their_values_are_skipped():
+    assert startup_uri(['--metrics', 'out.json']) is None
+    assert startup_uri(['--metrics', 'out.json', 'mongodb://a/']) == 'mongodb://a/'
+    assert startup_uri(['-v', '--metrics=out.json', '--uri']) is None
+
+
+def test_falls_back_to_the_environment(monkeypatch):
+    monkeypatch.setenv('MONGO_URI', 'mongodb://env/')
+    assert startup_uri([]) == 'mongodb://env/'
+    assert startup_uri(['--metrics', 'out.json']) == 'mongodb://env/'
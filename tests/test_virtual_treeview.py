@@ -0,0 +1,114 @@
+"""Pruebas del viewport de la tabla virtualizada sin pantalla: slots, índices del buffer y selección."""
+from tkinter import ttk
+
+import pytest
+
+from mongoexplorer.gui import VirtualTreeview
+
+
+class _Tree(VirtualTreeview):
+    """VirtualTreeview sin Tk: los métodos del widget que usa el viewport guardan su estado en memoria."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = {}
+        self.inserted = 0
+        self.selected = ()
+        self.focused = ''
+        super().__init__(None, row_key=lambda doc: str(doc['_id']))
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def visible_capacity(self):
+        return self.capacity
+
+    def insert(self, parent, index, iid):
+        self.items[iid] = None
+        self.inserted += 1
+
+    def delete(self, iid):
+        del self.items[iid]
+
+    def item(self, iid, values, tags):
+        self.items[iid] = (values, tags)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def focus(self, item=None):
+        if item is None:
+            return self.focused
+        self.focused = item
+
+    def event_generate(self, sequence):
+        if sequence == '<<TreeviewSelect>>':
+            self._on_select()
+
+    def click(self, *slots, extend=False):
+        self.extend_selection = extend
+        self.selection_set(slots)
+        self._on_select()
+
+
+@pytest.fixture
+def tree(monkeypatch):
+    # Sin intérprete de Tk el constructor del widget no puede ejecutarse
+    monkeypatch.setattr(ttk.Treeview, '__init__', lambda self, master=None, **kwargs: None)
+    tree = _Tree(capacity=5)
+    tree.set_rows([{'_id': i, 'n': i} for i in range(100)], ['_id', 'n'])
+    return tree
+
+
+def test_only_visible_rows_get_a_slot(tree):
+    assert tree.slots == [f"slot{i}" for i in range(5)] and tree.inserted == 5
+    assert tree.items['slot0'][0] == ('0', '0')
+    tree.capacity = 3
+    tree.sync_viewport()
+    assert tree.slots == ['slot0', 'slot1', 'slot2'] and sorted(tree.items) == tree.slots
+
+
+def test_scrolling_reuses_the_slots(tree):
+    tree.scroll_rows(11)
+    assert tree.top == 11 and tree.inserted == 5
+    assert tree.row_index_for_slot('slot0') == 11 and tree.row_id_for_slot('slot4') == '15'
+    assert tree.doc_id_for_slot('slot2') == 13
+    # Las bandas alternas siguen a la fila del buffer, no al slot
+    assert tree.items['slot0'] == (('11', '11'), ['oddrow'])
+    assert tree.items['slot1'] == (('12', '12'), ['separator'])
+    tree.scroll_rows(1000)
+    assert tree.top == 95 and tree.row_index_for_slot('slot4') == 99
+    assert tree.row_index_for_slot('otro') is None
+
+
+def test_selection_is_kept_by_buffer_index_across_scrolls(tree):
+    tree.click('slot1', 'slot2')
+    assert tree.selected_rows == {1, 2}
+    tree.scroll_rows(50)
+    # Las filas seleccionadas no están a la vista, pero siguen seleccionadas
+    assert tree.selected == () and tree.selected_rows == {1, 2}
+    tree.click('slot0', extend=True)
+    assert tree.selected_rows == {1, 2, 50} and tree.selected_doc_ids() == [1, 2, 50]
+    tree.scroll_rows(-49)
+    assert tree.top == 1 and set(tree.selected) == {'slot0', 'slot1'}
+    tree.click('slot3')
+    assert tree.selected_rows == {4}
+
+
+def test_moving_the_focus_scrolls_the_viewport(tree):
+    tree.focus('slot4')
+    tree._move_focus(1)
+    assert tree.top == 1 and tree.focused == 'slot4' and tree.selected_rows == {5}
+    tree._move_focus(-len(tree.docs))
+    assert tree.top == 0 and tree.focused == 'slot0' and tree.selected_rows == {0}
+
+
+def test_backfill_at_the_start_renumbers_the_selection(tree):
+    tree.scroll_rows(10)
+    tree.click('slot0')
+    tree.backfill({'_id': -1, 'n': -1}, at_start=True)
+    assert tree.selected_rows == {11} and tree.top == 11
+    assert tree.row_id_for_slot('slot0') == '10' and tree.selected == ('slot0',)